@@ -3,6 +3,7 @@ The rest are in the subpackages: core, draw, evolve, format, maths, parse
 and phylo.
 """
 
+import importlib
 import os
 import pickle
 import re
@@ -11,38 +12,7 @@ import warnings
 
 import numpy
 
-from cogent3.app import available_apps
-from cogent3.core.alignment import (
-    Alignment,
-    ArrayAlignment,
-    SequenceCollection,
-)
-from cogent3.core.genetic_code import available_codes, get_code
-# note that moltype has to be imported last, because it sets the moltype in
-# the objects created by the other modules.
-from cogent3.core.moltype import (
-    ASCII,
-    DNA,
-    PROTEIN,
-    RNA,
-    STANDARD_CODON,
-    CodonAlphabet,
-    available_moltypes,
-    get_moltype,
-)
-from cogent3.core.tree import TreeBuilder, TreeError
-from cogent3.evolve.fast_distance import (
-    available_distances,
-    get_distance_calculator,
-)
-from cogent3.evolve.models import available_models, get_model
-from cogent3.parse.newick import parse_string as newick_parse_string
-from cogent3.parse.sequence import FromFilenameParser
-from cogent3.parse.table import autogen_reader, load_delimited
-from cogent3.parse.tree_xml import parse_string as tree_xml_parse_string
 from cogent3.util.misc import get_format_suffixes, open_
-from cogent3.util.table import Table as _Table
-from cogent3.util.table import cast_str_to_array
 
 
 __author__ = ""
@@ -97,6 +67,73 @@ if warn_env in os.environ:
     warnings.simplefilter(os.environ[warn_env])
 
 
+# Names in the top level namespace are imported on first access, so that
+# "import cogent3" only loads the modules that are actually used. Values are
+# the defining module, or (module, attribute) if the name differs.
+_lazy_attrs = {
+    "available_apps": "cogent3.app",
+    "Alignment": "cogent3.core.alignment",
+    "ArrayAlignment": "cogent3.core.alignment",
+    "SequenceCollection": "cogent3.core.alignment",
+    "available_codes": "cogent3.core.genetic_code",
+    "get_code": "cogent3.core.genetic_code",
+    "ASCII": "cogent3.core.moltype",
+    "DNA": "cogent3.core.moltype",
+    "PROTEIN": "cogent3.core.moltype",
+    "RNA": "cogent3.core.moltype",
+    "STANDARD_CODON": "cogent3.core.moltype",
+    "CodonAlphabet": "cogent3.core.moltype",
+    "available_moltypes": "cogent3.core.moltype",
+    "get_moltype": "cogent3.core.moltype",
+    "TreeBuilder": "cogent3.core.tree",
+    "TreeError": "cogent3.core.tree",
+    "available_distances": "cogent3.evolve.fast_distance",
+    "get_distance_calculator": "cogent3.evolve.fast_distance",
+    "available_models": "cogent3.evolve.models",
+    "get_model": "cogent3.evolve.models",
+    "newick_parse_string": ("cogent3.parse.newick", "parse_string"),
+    "FromFilenameParser": "cogent3.parse.sequence",
+    "autogen_reader": "cogent3.parse.table",
+    "load_delimited": "cogent3.parse.table",
+    "tree_xml_parse_string": ("cogent3.parse.tree_xml", "parse_string"),
+    "cast_str_to_array": "cogent3.util.table",
+}
+
+_subpackages = (
+    "align",
+    "app",
+    "cluster",
+    "core",
+    "data",
+    "draw",
+    "evolve",
+    "format",
+    "maths",
+    "parse",
+    "phylo",
+    "recalculation",
+    "util",
+)
+
+
+def __getattr__(name):
+    if name in _subpackages:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = _lazy_attrs[name]
+    module, attr = (module, name) if isinstance(module, str) else module
+    value = getattr(importlib.import_module(module), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs))
+
+
 def make_seq(seq, name=None, moltype=None):
     """
     Parameters
@@ -112,6 +149,8 @@ def make_seq(seq, name=None, moltype=None):
     -------
     returns a sequence object
     """
+    from cogent3.core.moltype import get_moltype
+
     moltype = moltype or "text"
     moltype = get_moltype(moltype)
     seq = moltype.make_seq(seq)
@@ -140,6 +179,8 @@ def make_unaligned_seqs(
     **kw
         other keyword arguments passed to SequenceCollection
     """
+    from cogent3.core.alignment import SequenceCollection
+    from cogent3.core.moltype import get_moltype
 
     if moltype is not None:
         moltype = get_moltype(moltype)
@@ -184,6 +225,9 @@ def make_aligned_seqs(
     **kw
         other keyword arguments passed to SequenceCollection
     """
+    from cogent3.core.alignment import Alignment, ArrayAlignment
+    from cogent3.core.moltype import get_moltype
+
     if moltype is not None:
         moltype = get_moltype(moltype)
 
@@ -228,6 +272,8 @@ def load_unaligned_seqs(
     -------
     ``SequenceCollection``
     """
+    from cogent3.parse.sequence import FromFilenameParser
+
     parser_kw = parser_kw or {}
     for other_kw in ("constructor_kw", "kw"):
         other_kw = kw.pop(other_kw, None) or {}
@@ -275,6 +321,8 @@ def load_aligned_seqs(
     -------
     ``ArrayAlignment`` or ``Alignment`` instance
     """
+    from cogent3.parse.sequence import FromFilenameParser
+
     parser_kw = parser_kw or {}
     for other_kw in ("constructor_kw", "kw"):
         other_kw = kw.pop(other_kw, None) or {}
@@ -347,6 +395,8 @@ def make_table(
         output format when using str(Table)
 
     """
+    from cogent3.util.table import Table
+
     data = kwargs.get("rows", data)
     if data_frame is not None:
         from pandas import DataFrame
@@ -356,7 +406,7 @@ def make_table(
 
         data = {c: data_frame[c].to_numpy() for c in data_frame}
 
-    table = _Table(
+    table = Table(
         header=header,
         data=data,
         digits=digits,
@@ -449,6 +499,9 @@ def load_table(
     skip_inconsistent
         skips rows that have different length to header row
     """
+    from cogent3.parse.table import load_delimited
+    from cogent3.util.table import Table, cast_str_to_array
+
     filename = str(filename)
     sep = sep or kwargs.pop("delimiter", None)
     file_format, compress_format = get_format_suffixes(filename)
@@ -458,7 +511,7 @@ def load_table(
             f = open_(filename, mode="rb")
             loaded_table = pickle.load(f)
             f.close()
-            r = _Table()
+            r = Table()
             r.__setstate__(loaded_table)
             return r
         elif file_format == "csv":
@@ -525,6 +578,10 @@ def make_tree(treestring=None, tip_names=None, format=None, underscore_unmunge=F
     of the Newick format. Set ``underscore_unmunge=True`` to replace underscores
     with spaces in all names read.
     """
+    from cogent3.core.tree import TreeBuilder
+    from cogent3.parse.newick import parse_string as newick_parse_string
+    from cogent3.parse.tree_xml import parse_string as tree_xml_parse_string
+
     assert treestring or tip_names, "must provide either treestring or tip_names"
     if tip_names:
         tree_builder = TreeBuilder().create_edge
@@ -16,6 +16,14 @@ __status__ = "Alpha"
 __all__ = ["align", "composable", "dist", "evo", "io", "sample", "translate", "tree"]
 
 
+def __getattr__(name):
+    # app modules are only imported when first accessed
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _get_app_attr(name, obj, mod, is_composable):
     """returns app details for display"""
 
@@ -2,12 +2,18 @@ import inspect
 import json
 import os
 import pathlib
+import pickle
+import queue
 import re
+import threading
 import time
 import traceback
+import warnings
 
 import scitrack
 
+from scitrack import get_text_hexdigest
+
 from cogent3 import make_aligned_seqs, make_unaligned_seqs
 from cogent3.core.alignment import SequenceCollection
 from cogent3.util import progress_display as UI
@@ -19,6 +25,7 @@ from .data_store import (
     RAISE,
     SKIP,
     DataStoreMember,
+    ResultCache,
     SingleReadDataStore,
     WritableDirectoryDataStore,
     WritableZippedDataStore,
@@ -61,6 +68,24 @@ def _get_source(source):
     return result
 
 
+def _get_md5(data):
+    """returns md5 hexdigest identifying data, None if not possible"""
+    if isinstance(data, DataStoreMember):
+        return data.md5
+
+    if isinstance(data, str):
+        if not os.path.isfile(data):
+            return None
+        return SingleReadDataStore(data)[0].md5
+
+    try:
+        data = data.to_json()
+    except AttributeError:
+        return None
+
+    return get_text_hexdigest(data)
+
+
 def _get_origin(origin):
     if type(origin) == str:
         result = origin
@@ -182,20 +207,137 @@ class ComposableType:
 
     def _validate_data_type(self, data):
         """checks data class name matches defined compatible types"""
-        if not self._data_types:
-            # not defined
-            return True
-
-        name = data.__class__.__name__
-        valid = False
-        for type_ in self._data_types:
-            if type_ == name:
-                valid = True
-                break
+        return _validate_data_type(self._data_types, self, data)
+
+
+def _validate_data_type(data_types, origin, data):
+    """returns True if data class name is in data_types, or if none are
+    defined, otherwise a NotCompleted"""
+    if not data_types:
+        # not defined
+        return True
+
+    name = data.__class__.__name__
+    valid = False
+    for type_ in data_types:
+        if type_ == name:
+            valid = True
+            break
+    if not valid:
+        msg = f"invalid data type, '{name}' not in {', '.join(data_types)}"
+        valid = NotCompleted("ERROR", origin, message=msg, source=data)
+    return valid
+
+
+class _SerialisedResult:
+    """result serialised by a worker, ready for storage by the master"""
+
+    def __init__(self, source, data):
+        self.source = source
+        self.data = data
+
+
+class _SerialisingProcess:
+    """applies process then serialises the result, for use in workers"""
+
+    def __init__(
+        self, process, serialise, name_callback=None, data_types=None, origin=None
+    ):
+        """
+        Parameters
+        ----------
+        process
+            the composable function applied in the worker
+        serialise
+            function returning the serialised form of a result
+        name_callback
+            writer's function for naming results, must be picklable
+        data_types
+            data types accepted by the writer
+        origin
+            name of the writer, used for a NotCompleted from invalid results
+        """
+        self.process = process
+        self.serialise = serialise
+        self.name_callback = name_callback
+        self.data_types = data_types
+        self.origin = origin or "serialise"
+
+    def __call__(self, val):
+        result = self.process(val)
+        if not result:
+            return result
+
+        # the writer would reject these on the master
+        valid = _validate_data_type(self.data_types, self.origin, result)
         if not valid:
-            msg = f"invalid data type, '{name}' not in {', '.join(self._data_types)}"
-            valid = NotCompleted("ERROR", self, message=msg, source=data)
-        return valid
+            return valid
+
+        name = self.name_callback(result) if self.name_callback else result
+        source = _get_source(name)
+        if source is None:
+            # master will raise an informative error
+            return result
+
+        try:
+            data = self.serialise(result)
+        except Exception:
+            return NotCompleted(
+                "ERROR", "serialise", traceback.format_exc(), source=val
+            )
+
+        return _SerialisedResult(source, data)
+
+
+class _BackgroundWriter:
+    """writes to a data store from a separate thread via a bounded queue
+
+    Notes
+    -----
+    The data store must not be used by other threads until join() has been
+    called.
+    """
+
+    def __init__(self, data_store, maxsize=100):
+        self.data_store = data_store
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    self.data_store.write(*item)
+            except Exception as err:
+                self._error = err
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def put(self, identifier, data):
+        """queues data for writing under identifier, blocks if queue is full"""
+        self._raise_error()
+        self._queue.put((identifier, data))
+
+    def join(self):
+        """blocks until all queued data has been written"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """writes all queued data and stops the thread"""
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
 
 
 class Composable(ComposableType):
@@ -208,6 +350,7 @@ class Composable(ComposableType):
         self._checkpointable = False
         self._load_checkpoint = None
         self._formatted = ["type='%s'" % self._type]
+        self.cache = None  # a ResultCache, opt-in
 
     def __str__(self):
         txt = "" if not self.input else str(self.input)
@@ -325,6 +468,13 @@ class Composable(ComposableType):
             if job_done:
                 return result
 
+        cache_key = self._get_cache_key(val)
+        if cache_key is not None:
+            # a hit means none of the steps up to and including self are run
+            result = self.cache.get(cache_key)
+            if result is not None:
+                return result
+
         if self.input:
             val = self._in(val, *args, **kwargs)
 
@@ -341,8 +491,49 @@ class Composable(ComposableType):
             origin = str(self)
             result = NotCompleted("BUG", origin, msg, source=val)
 
+        if cache_key is not None and result and hasattr(result, "to_json"):
+            self.cache.put(cache_key, result)
+
         return result
 
+    def _get_cache_key(self, val):
+        """returns key for the result of self applied to val, None if there is
+        no cache or val cannot be checksummed"""
+        if self.cache is None:
+            return None
+
+        md5 = _get_md5(val)
+        if md5 is None:
+            return None
+
+        # str(self) includes the settings of self and all input apps
+        return self.cache.make_key(str(self), md5)
+
+    def set_cache(self, path, max_size=None):
+        """sets an on-disk cache for results of this app
+
+        Parameters
+        ----------
+        path : str or ResultCache
+            directory for the cache
+        max_size : int or None
+            maximum total size of the cache in bytes. Least recently used
+            results are deleted when exceeded.
+
+        Notes
+        -----
+        Results are keyed on the settings of this app and all its inputs plus
+        the md5 checksum of the input data, so a pipeline that is re-run with
+        only downstream changes loads results from the cache and skips all
+        steps up to and including this one. Only results that can be
+        serialised to json are stored, NotCompleted results are not cached.
+        Use path=None to remove a cache.
+        """
+        if path is None or isinstance(path, ResultCache):
+            self.cache = path
+        else:
+            self.cache = ResultCache(path, max_size=max_size)
+
     @property
     def input(self):
         return self._in
@@ -381,6 +572,9 @@ class Composable(ComposableType):
         par_kw=None,
         logger=True,
         cleanup=False,
+        max_in_flight=None,
+        return_results=True,
+        serialise_in_workers=False,
         ui=None,
     ):
         """invokes self composable function on the provided data store
@@ -396,7 +590,11 @@ class Composable(ComposableType):
             process, with earlier steps being executed in parallel for each
             member of dstore.
         par_kw
-            dict of values for configuring parallel execution.
+            dict of values for configuring parallel execution. If it includes
+            schedule='dynamic', members are submitted to workers individually
+            and results are returned in the order they complete. Other values
+            are passed to cogent3.util.parallel.as_completed for the dynamic
+            schedule, cogent3.util.parallel.imap otherwise.
         logger
             Argument ignored if not an io.writer. A scitrack logger, a logfile
             name or True. If True, a scitrack logger is created with a name that
@@ -407,15 +605,98 @@ class Composable(ComposableType):
         cleanup : bool
             after copying of log files into the data store, they are deleted
             from their original location
+        max_in_flight : int or None
+            maximum number of members being processed, or processed but not
+            yet returned. In parallel, a single pool of workers is given a new
+            member as each result is taken. Members are checked with job_done
+            as they are needed, so memory use does not depend on the size of
+            dstore. If None, all members are handed over together.
+        return_results : bool
+            if False, results are discarded after being processed and only
+            counts are returned
+        serialise_in_workers : bool
+            only applies to parallel execution when self is a writer that
+            supports it (write_db). Results are serialised in the workers and
+            the master writes them to the data store from a separate thread.
 
         Returns
         -------
-        Result of the process as a list
+        Result of the process as a list, or if return_results is False, a
+        dict with the number of completed and not completed results.
         Notes
         -----
         If run in parallel, this instance serves as the master object and
         aggregates results.
         """
+        results = self._apply_to_iter(
+            dstore,
+            parallel=parallel,
+            mininterval=mininterval,
+            par_kw=par_kw,
+            logger=logger,
+            cleanup=cleanup,
+            max_in_flight=max_in_flight,
+            serialise_in_workers=serialise_in_workers,
+            ui=ui,
+        )
+        if return_results:
+            return list(results)
+
+        counts = {"completed": 0, "not_completed": 0}
+        for result in results:
+            counts["completed" if result else "not_completed"] += 1
+        return counts
+
+    @UI.display_wrap
+    def iter_apply_to(
+        self,
+        dstore,
+        parallel=False,
+        mininterval=2,
+        par_kw=None,
+        logger=True,
+        cleanup=False,
+        max_in_flight=None,
+        serialise_in_workers=False,
+        ui=None,
+    ):
+        """generator version of apply_to, see apply_to for a description of
+        the arguments
+
+        Yields
+        ------
+        The result of the process for each member of dstore, in order.
+
+        Notes
+        -----
+        Results are not retained, so combined with max_in_flight memory use
+        is independent of the size of dstore. Logs are finalised once the
+        generator is exhausted or closed.
+        """
+        yield from self._apply_to_iter(
+            dstore,
+            parallel=parallel,
+            mininterval=mininterval,
+            par_kw=par_kw,
+            logger=logger,
+            cleanup=cleanup,
+            max_in_flight=max_in_flight,
+            serialise_in_workers=serialise_in_workers,
+            ui=ui,
+        )
+
+    def _apply_to_iter(
+        self,
+        dstore,
+        parallel,
+        mininterval,
+        par_kw,
+        logger,
+        cleanup,
+        max_in_flight,
+        serialise_in_workers,
+        ui,
+    ):
         if isinstance(dstore, str):
             dstore = [dstore]
 
@@ -423,6 +704,14 @@ class Composable(ComposableType):
         if len(dstore) == 0:
             raise ValueError("dstore is empty")
 
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+
+        par_kw = dict(par_kw or {})
+        schedule = par_kw.pop("schedule", "static")
+        assert schedule in ("static", "dynamic"), f"invalid schedule '{schedule}'"
+        dynamic = parallel and schedule == "dynamic"
+
         start = time.time()
         loggable = hasattr(self, "data_store")
         if not loggable:
@@ -444,8 +733,7 @@ class Composable(ComposableType):
         if LOGGER:
             LOGGER.log_message(str(self), label="composable function")
             LOGGER.log_versions(["cogent3"])
-        results = []
-        i = 0
+
         process = self.input if self.input else self
         if self.input:
             # As we will be explicitly calling the input object, we disconnect
@@ -455,55 +743,137 @@ class Composable(ComposableType):
             process.output = None
             self.input = None
 
-        # with a tinydb dstore, this also excludes data that failed to complete
-        todo = [m for m in dstore if not self.job_done(m)]
-
-        for result in ui.imap(
-            process, todo, parallel=parallel, par_kw=par_kw, mininterval=mininterval
+        mapped = process
+        writer = None
+        if (
+            serialise_in_workers
+            and parallel
+            and process is not self
+            and getattr(self, "_serialise", None) is not None
         ):
-            outcome = result if process is self else self(result)
-            results.append(outcome)
-            if LOGGER:
-                member = dstore[i]
-                # ensure member is a DataStoreMember instance
-                if not isinstance(member, DataStoreMember):
-                    member = SingleReadDataStore(member)[0]
-
-                LOGGER.log_message(member, label="input")
-                if member.md5:
-                    LOGGER.log_message(member.md5, label="input md5sum")
-                mem_id = self.data_store.make_relative_identifier(member.name)
-                if outcome:
-                    member = self.data_store.get_member(mem_id)
-                    LOGGER.log_message(member, label="output")
-                    LOGGER.log_message(member.md5, label="output md5sum")
-                else:
-                    # we have a NotCompletedResult
-                    try:
-                        # tinydb supports storage
-                        self.data_store.write_incomplete(mem_id, outcome.to_rich_dict())
-                    except AttributeError:
-                        pass
-                    LOGGER.log_message(
-                        f"{outcome.origin} : {outcome.message}", label=outcome.type
-                    )
-
-            i += 1
-
-        finish = time.time()
-        taken = finish - start
-        if LOGGER:
-            LOGGER.log_message(f"{taken}", label="TIME TAKEN")
-            LOGGER.shutdown()
-            log_file_path = str(log_file_path)
-            self.data_store.add_file(log_file_path, cleanup=cleanup, keep_suffix=True)
-            self.data_store.close()
+            try:
+                # the writer's name_callback is applied in the workers
+                pickle.dumps(self._callback)
+            except Exception:
+                warnings.warn(
+                    "name_callback cannot be pickled, results will be "
+                    "serialised by the master",
+                    UserWarning,
+                )
+            else:
+                # workers return serialised results, the master only stores them
+                mapped = _SerialisingProcess(
+                    process,
+                    self._serialise,
+                    name_callback=self._callback,
+                    data_types=self._data_types,
+                    origin=self.__class__.__name__,
+                )
+                writer = _BackgroundWriter(self.data_store)
 
-        # now reconnect input
-        if process is not self:
-            self = process + self
+        # with a tinydb dstore, this also excludes data that failed to complete
+        # job_done is evaluated as members are needed
+        todo = (m for m in dstore if not self.job_done(m))
+        # members by their index in todo, until their result is processed
+        members = {}
+
+        def record(todo):
+            for index, member in enumerate(todo):
+                members[index] = member
+                yield member
+
+        progress = dict(mininterval=mininterval, count=len(dstore))
+        if dynamic or (parallel and max_in_flight):
+            # a single executor is fed members as earlier results are taken
+            par_kw.pop("chunksize", None)
+            if max_in_flight:
+                par_kw["max_pending"] = max_in_flight
+            par_kw["ordered"] = not dynamic
+            results = ui.as_completed(mapped, record(todo), par_kw=par_kw, **progress)
+        else:
+            # imap submits all members at once
+            todo = list(record(todo)) if parallel else record(todo)
+            results = ui.imap(
+                mapped, todo, parallel=parallel, par_kw=par_kw, **progress
+            )
+            results = enumerate(results)
 
-        return results
+        # outcomes are logged once written when using the writer
+        to_log = []
+        log_every = max_in_flight or len(dstore)
+        try:
+            for index, result in results:
+                member = members.pop(index)
+                if isinstance(result, _SerialisedResult):
+                    outcome = self.data_store.make_absolute_identifier(result.source)
+                    writer.put(outcome, result.data)
+                else:
+                    if writer:
+                        writer.join()
+                    outcome = result if process is self else self(result)
+
+                if LOGGER and writer:
+                    to_log.append((member, outcome))
+                elif LOGGER:
+                    self._log_outcome(LOGGER, member, outcome)
+                yield outcome
+
+                if len(to_log) >= log_every:
+                    writer.join()
+                    for member, outcome in to_log:
+                        self._log_outcome(LOGGER, member, outcome)
+                    to_log = []
+
+            if writer:
+                writer.join()
+            for member, outcome in to_log:
+                self._log_outcome(LOGGER, member, outcome)
+            to_log = []
+        finally:
+            if writer:
+                writer.close()
+                for member, outcome in to_log:
+                    self._log_outcome(LOGGER, member, outcome)
+
+            finish = time.time()
+            taken = finish - start
+            if LOGGER:
+                LOGGER.log_message(f"{taken}", label="TIME TAKEN")
+                LOGGER.shutdown()
+                log_file_path = str(log_file_path)
+                self.data_store.add_file(
+                    log_file_path, cleanup=cleanup, keep_suffix=True
+                )
+                self.data_store.close()
+
+            # now reconnect input
+            if process is not self:
+                self = process + self
+
+    def _log_outcome(self, LOGGER, member, outcome):
+        """logs the input member and corresponding output or failure"""
+        # ensure member is a DataStoreMember instance
+        if not isinstance(member, DataStoreMember):
+            member = SingleReadDataStore(member)[0]
+
+        LOGGER.log_message(member, label="input")
+        if member.md5:
+            LOGGER.log_message(member.md5, label="input md5sum")
+        mem_id = self.data_store.make_relative_identifier(member.name)
+        if outcome:
+            member = self.data_store.get_member(mem_id)
+            LOGGER.log_message(member, label="output")
+            LOGGER.log_message(member.md5, label="output md5sum")
+        else:
+            # we have a NotCompletedResult
+            try:
+                # tinydb supports storage
+                self.data_store.write_incomplete(mem_id, outcome.to_rich_dict())
+            except AttributeError:
+                pass
+            LOGGER.log_message(
+                f"{outcome.origin} : {outcome.message}", label=outcome.type
+            )
 
 
 class ComposableTabular(Composable):
@@ -583,6 +953,10 @@ class _seq_loader:
 
 
 class _checkpointable(Composable):
+    # function returning the serialised form of data, set in subclasses that
+    # support serialisation in parallel workers
+    _serialise = None
+
     def __init__(
         self,
         data_path,
@@ -612,8 +986,9 @@ class _checkpointable(Composable):
         super(_checkpointable, self).__init__(**kwargs)
         self._formatted_params()
 
-        if data_path.endswith(".tinydb") and not self.__class__.__name__.endswith("db"):
-            raise ValueError("tinydb suffix reserved for write_db")
+        db_suffix = data_path.endswith((".tinydb", ".sqlitedb"))
+        if db_suffix and not self.__class__.__name__.endswith("db"):
+            raise ValueError("tinydb and sqlitedb suffixes reserved for write_db")
 
         self._checkpointable = True
         if_exists = if_exists.lower()
@@ -1,11 +1,14 @@
 import glob
 import json
+import lzma
 import os
 import pathlib
 import re
 import shutil
+import sqlite3
 import weakref
 import zipfile
+import zlib
 
 from collections import defaultdict
 from fnmatch import fnmatch, translate
@@ -705,17 +708,185 @@ def _db_lockid(path):
     return lockid
 
 
-class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
-    """A TinyDB based json data store"""
+def _sqlite_lockid(path):
+    """returns value for pid in the lock table or None"""
+    if not os.path.exists(path):
+        return None
+    db = sqlite3.connect(path)
+    try:
+        got = db.execute("SELECT pid FROM lock").fetchone()
+    except sqlite3.DatabaseError:
+        # no lock table, or not a sqlite database
+        got = None
+    finally:
+        db.close()
+    return None if not got else got[0]
+
+
+def _db_create_delete(source, if_exists, create):
+    """applies if_exists and create to a single file database at source"""
+    exists = os.path.exists(source)
+    dirname = os.path.dirname(source)
+    if exists and if_exists == RAISE:
+        raise RuntimeError(f"'{source}' exists")
+    elif exists and if_exists == OVERWRITE:
+        try:
+            os.remove(source)
+        except PermissionError:
+            # probably user accidentally created a directory
+            shutil.rmtree(source)
+    elif dirname and not os.path.exists(dirname) and not create:
+        raise RuntimeError(f"'{dirname}' does not exist")
 
-    store_suffix = "tinydb"
+    if create and dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+
+class _ReadOnlyDbDataStoreBase(ReadOnlyDataStoreBase):
+    """base class for json data stores held in a single database file"""
 
     def __init__(self, *args, **kwargs):
         kwargs["suffix"] = "json"
-        super(ReadOnlyTinyDbDataStore, self).__init__(*args, **kwargs)
+        super(_ReadOnlyDbDataStoreBase, self).__init__(*args, **kwargs)
         self._db = None
         self._finish = None
 
+    def __del__(self):
+        self.close()
+
+    @property
+    def lock_id(self):
+        """returns pid of the lock, None if not locked"""
+        raise NotImplementedError
+
+    @property
+    def locked(self):
+        """returns lock pid or None if unlocked or pid matches self"""
+        return self.lock_id is not None
+
+    @property
+    def summary_incomplete(self):
+        """returns a table summarising incomplete results"""
+        types = defaultdict(list)
+        indices = "type", "origin"
+        for member in self.incomplete:
+            record = member.read()
+            record = deserialise_not_completed(record)
+            key = tuple(getattr(record, k, None) for k in indices)
+            types[key].append([record.message, record.source])
+
+        header = list(indices) + ["message", "num", "source"]
+        rows = []
+        for record in types:
+            messages, sources = list(zip(*types[record]))
+            messages = list(sorted(set(messages)))
+            if len(messages) > 3:
+                messages = messages[:3] + ["..."]
+
+            if len(sources) > 3:
+                sources = sources[:3] + ("...",)
+
+            row = list(record) + [
+                ", ".join(messages),
+                len(types[record]),
+                ", ".join(sources),
+            ]
+            rows.append(row)
+
+        table = Table(header=header, data=rows, title="incomplete records")
+        return table
+
+    @extend_docstring_from(ReadOnlyDataStoreBase.get_absolute_identifier, pre=True)
+    def get_absolute_identifier(self, identifier, from_relative=True):
+        """For db stores, this is the same as the relative identifier"""
+        return self.get_relative_identifier(identifier)
+
+    @extend_docstring_from(ReadOnlyDataStoreBase.get_relative_identifier)
+    def get_relative_identifier(self, identifier):
+        if isinstance(identifier, DataStoreMember) and identifier.parent is self:
+            return identifier
+
+        identifier = Path(identifier)
+        identifier = identifier.name
+        return identifier
+
+    def read(self, identifier):
+        data = self.open(identifier)
+        if self._md5 and isinstance(data, str):
+            self._checksums[identifier] = get_text_hexdigest(data)
+
+        return data
+
+    @extend_docstring_from(ReadOnlyDataStoreBase.md5)
+    def md5(self, member, force=True):
+        md5_setting = self._md5  # for restoring automatic md5 calc setting
+        if not getattr(member, "id", None):
+            member = self.filtered(member)[0]
+
+        if force and member not in self._checksums:
+            self._md5 = True
+            _ = member.read()
+
+        result = self._checksums.get(member, None)
+        self._md5 = md5_setting
+        return result
+
+    @property
+    def summary_logs(self):
+        """returns a table summarising log files"""
+        rows = []
+        for record in self.logs:
+            data = record.read().splitlines()
+            first = data.pop(0).split("\t")
+            row = [first[0], record.name]
+            data = [r.split("\t")[-1].split(" : ", maxsplit=1) for r in data]
+            data = dict(data)
+            row.extend(
+                [
+                    data["python"],
+                    data["user"],
+                    data["command_string"],
+                    data["composable function"],
+                ]
+            )
+            rows.append(row)
+        table = Table(
+            header=["time", "name", "python version", "who", "command", "composable"],
+            rows=rows,
+            title="summary of log files",
+        )
+        return table
+
+    @property
+    def describe(self):
+        """returns tables describing content types"""
+        lock_id = self.lock_id
+        if lock_id:
+            title = (
+                f"Locked db store. Locked to pid={lock_id}, current pid={os.getpid()}"
+            )
+        else:
+            title = "Unlocked db store."
+        num_incomplete = len(self.incomplete)
+        num_complete = len(self.members)
+        num_logs = len(self.logs)
+        summary = Table(
+            header=["record type", "number"],
+            rows=[
+                ["completed", num_complete],
+                ["incomplete", num_incomplete],
+                ["logs", num_logs],
+            ],
+            title=title,
+        )
+        return summary
+
+
+class ReadOnlyTinyDbDataStore(_ReadOnlyDbDataStoreBase):
+    """A TinyDB based json data store"""
+
+    store_suffix = "tinydb"
+
     def __contains__(self, identifier):
         """whether identifier has been stored here"""
         if isinstance(identifier, DataStoreMember):
@@ -749,9 +920,6 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
 
         return self._db
 
-    def __del__(self):
-        self.close()
-
     @classmethod
     def _close(cls, db):
         try:
@@ -780,9 +948,9 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
             self._db.storage.flush()
 
     @property
-    def locked(self):
-        """returns lock pid or None if unlocked or pid matches self"""
-        return _db_lockid(self.source) is not None
+    def lock_id(self):
+        """returns pid of the lock, None if not locked"""
+        return _db_lockid(self.source)
 
     def unlock(self, force=False):
         """remove a lock if pid matches. If force, ignores pid."""
@@ -812,38 +980,6 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
             incomplete.append(member)
         return incomplete
 
-    @property
-    def summary_incomplete(self):
-        """returns a table summarising incomplete results"""
-        types = defaultdict(list)
-        indices = "type", "origin"
-        for member in self.incomplete:
-            record = member.read()
-            record = deserialise_not_completed(record)
-            key = tuple(getattr(record, k, None) for k in indices)
-            types[key].append([record.message, record.source])
-
-        header = list(indices) + ["message", "num", "source"]
-        rows = []
-        for record in types:
-            messages, sources = list(zip(*types[record]))
-            messages = list(sorted(set(messages)))
-            if len(messages) > 3:
-                messages = messages[:3] + ["..."]
-
-            if len(sources) > 3:
-                sources = sources[:3] + ("...",)
-
-            row = list(record) + [
-                ", ".join(messages),
-                len(types[record]),
-                ", ".join(sources),
-            ]
-            rows.append(row)
-
-        table = Table(header=header, data=rows, title="incomplete records")
-        return table
-
     @property
     def members(self):
         if not self._members:
@@ -864,20 +1000,6 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
 
         return self._members
 
-    @extend_docstring_from(ReadOnlyDataStoreBase.get_absolute_identifier, pre=True)
-    def get_absolute_identifier(self, identifier, from_relative=True):
-        """For tinydb, this is the same as the relative identifier"""
-        return self.get_relative_identifier(identifier)
-
-    @extend_docstring_from(ReadOnlyDataStoreBase.get_relative_identifier)
-    def get_relative_identifier(self, identifier):
-        if isinstance(identifier, DataStoreMember) and identifier.parent is self:
-            return identifier
-
-        identifier = Path(identifier)
-        identifier = identifier.name
-        return identifier
-
     def open(self, identifier):
         if getattr(identifier, "parent", None) is not self:
             member = self.get_member(identifier)
@@ -887,27 +1009,6 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
         _, record, _ = load_record_from_json(self.db.get(doc_id=member.id))
         return record
 
-    def read(self, identifier):
-        data = self.open(identifier)
-        if self._md5 and isinstance(data, str):
-            self._checksums[identifier] = get_text_hexdigest(data)
-
-        return data
-
-    @extend_docstring_from(ReadOnlyDataStoreBase.md5)
-    def md5(self, member, force=True):
-        md5_setting = self._md5  # for restoring automatic md5 calc setting
-        if not getattr(member, "id", None):
-            member = self.filtered(member)[0]
-
-        if force and member not in self._checksums:
-            self._md5 = True
-            _ = member.read()
-
-        result = self._checksums.get(member, None)
-        self._md5 = md5_setting
-        return result
-
     @property
     def logs(self):
         """returns all records with a .log suffix"""
@@ -918,56 +1019,6 @@ class ReadOnlyTinyDbDataStore(ReadOnlyDataStoreBase):
             logfiles.append(member)
         return logfiles
 
-    @property
-    def summary_logs(self):
-        """returns a table summarising log files"""
-        rows = []
-        for record in self.logs:
-            data = record.read().splitlines()
-            first = data.pop(0).split("\t")
-            row = [first[0], record.name]
-            data = [r.split("\t")[-1].split(" : ", maxsplit=1) for r in data]
-            data = dict(data)
-            row.extend(
-                [
-                    data["python"],
-                    data["user"],
-                    data["command_string"],
-                    data["composable function"],
-                ]
-            )
-            rows.append(row)
-        table = Table(
-            header=["time", "name", "python version", "who", "command", "composable"],
-            rows=rows,
-            title="summary of log files",
-        )
-        return table
-
-    @property
-    def describe(self):
-        """returns tables describing content types"""
-        lock_id = _db_lockid(self.source)
-        if lock_id:
-            title = (
-                f"Locked db store. Locked to pid={lock_id}, current pid={os.getpid()}"
-            )
-        else:
-            title = "Unlocked db store."
-        num_incomplete = len(self.incomplete)
-        num_complete = len(self.members)
-        num_logs = len(self.logs)
-        summary = Table(
-            header=["record type", "number"],
-            rows=[
-                ["completed", num_complete],
-                ["incomplete", num_incomplete],
-                ["logs", num_logs],
-            ],
-            title=title,
-        )
-        return summary
-
 
 class WritableTinyDbDataStore(ReadOnlyTinyDbDataStore, WritableDataStoreBase):
     def __init__(self, *args, **kwargs):
@@ -980,21 +1031,7 @@ class WritableTinyDbDataStore(ReadOnlyTinyDbDataStore, WritableDataStoreBase):
         if _db_lockid(self.source):
             return
 
-        exists = os.path.exists(self.source)
-        dirname = os.path.dirname(self.source)
-        if exists and if_exists == RAISE:
-            raise RuntimeError(f"'{self.source}' exists")
-        elif exists and if_exists == OVERWRITE:
-            try:
-                os.remove(self.source)
-            except PermissionError:
-                # probably user accidentally created a directory
-                shutil.rmtree(self.source)
-        elif dirname and not os.path.exists(dirname) and not create:
-            raise RuntimeError(f"'{dirname}' does not exist")
-
-        if create and dirname:
-            os.makedirs(dirname, exist_ok=True)
+        _db_create_delete(self.source, if_exists, create)
 
     @extend_docstring_from(WritableDataStoreBase.write)
     def write(self, identifier, data):
@@ -1070,3 +1107,437 @@ class WritableTinyDbDataStore(ReadOnlyTinyDbDataStore, WritableDataStoreBase):
             path.unlink()
 
         return m
+
+
+_compressors = {
+    None: (lambda data: data, lambda data: data),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+class ReadOnlySqliteDataStore(_ReadOnlyDbDataStoreBase):
+    """A SQLite based json data store
+
+    Records are held in a single table with a unique index on the identifier,
+    so membership tests and lookups do not scan the stored records.
+    """
+
+    store_suffix = "sqlitedb"
+
+    def __contains__(self, identifier):
+        """whether identifier has been stored here"""
+        if isinstance(identifier, DataStoreMember):
+            return identifier.parent is self
+
+        return self._get_record_id(identifier) is not None
+
+    def __repr__(self):
+        txt = super().__repr__()
+        num = len(self.incomplete)
+        if num > 0:
+            txt = f"{txt}, {num}x incomplete"
+        return txt
+
+    def _connect(self):
+        """returns a read only connection to the database"""
+        if not os.path.exists(self.source):
+            raise FileNotFoundError(f"'{self.source}' does not exist")
+
+        uri = pathlib.Path(os.path.abspath(self.source)).as_uri()
+        return sqlite3.connect(f"{uri}?mode=ro", uri=True, check_same_thread=False)
+
+    @property
+    def db(self):
+        if self._db is None:
+            # access from a writer thread is serialised by the caller
+            self._db = self._connect()
+            self._finish = weakref.finalize(self, self._close, self._db)
+
+        return self._db
+
+    @classmethod
+    def _close(cls, db):
+        try:
+            db.commit()
+            db.close()
+        except sqlite3.ProgrammingError:
+            # connection already closed
+            pass
+
+    def close(self):
+        """closes the data store"""
+        if self._db is None:
+            return
+
+        if self._finish.alive:
+            # otherwise, already closed at interpreter exit
+            self.unlock()
+            self._finish()
+        self._db = None
+
+    def lock(self):
+        """if writable, and not locked, locks the database to this pid"""
+        if "readonly" in self.__class__.__name__.lower():
+            # the connection is read only
+            return
+
+        if not self.locked:
+            self.db.execute("INSERT INTO lock (pid) VALUES (?)", (os.getpid(),))
+            self.db.commit()
+
+    @property
+    def lock_id(self):
+        """returns pid of the lock, None if not locked"""
+        got = self.db.execute("SELECT pid FROM lock").fetchone()
+        return None if not got else got[0]
+
+    def unlock(self, force=False):
+        """remove a lock if pid matches. If force, ignores pid."""
+        if "readonly" in self.__class__.__name__.lower():
+            # not allowed to touch a lock
+            return
+
+        lock_id = self.lock_id
+        if lock_id is None:
+            return
+
+        if lock_id == os.getpid() or force:
+            self.db.execute("DELETE FROM lock")
+            self.db.commit()
+
+        return lock_id
+
+    def _get_record_id(self, identifier):
+        identifier = self.get_relative_identifier(identifier)
+        got = self.db.execute(
+            "SELECT id FROM results WHERE identifier = ?", (str(identifier),)
+        ).fetchone()
+        return None if not got else got[0]
+
+    def _select_members(self, where, *args):
+        sql = f"SELECT id, identifier FROM results WHERE {where} ORDER BY id"
+        return [
+            DataStoreMember(name, self, id=id_)
+            for id_, name in self.db.execute(sql, args)
+        ]
+
+    @property
+    def incomplete(self):
+        """returns database records with completed=False"""
+        return self._select_members("completed = 0")
+
+    @property
+    def members(self):
+        if not self._members:
+            pattern = f"*.{self.suffix}" if self.suffix else "*"
+            where = "completed = 1 AND identifier GLOB ?"
+            members = self._select_members(where, pattern)
+            if self.limit:
+                members = members[: self.limit]
+            self._members = members
+
+        return self._members
+
+    def get_member(self, identifier):
+        """returns DataStoreMember"""
+        identifier = self.get_relative_identifier(identifier)
+        members = self._select_members(
+            "completed = 1 AND identifier = ?", str(identifier)
+        )
+        return members[0] if members else None
+
+    def open(self, identifier):
+        if getattr(identifier, "parent", None) is not self:
+            member = self.get_member(identifier)
+        else:
+            member = identifier
+
+        compression, data = self.db.execute(
+            "SELECT compression, data FROM results WHERE id = ?", (member.id,)
+        ).fetchone()
+        _, decompress = _compressors[compression]
+        data = decompress(data)
+        return json.loads(data)
+
+    @property
+    def logs(self):
+        """returns all records with a .log suffix"""
+        return self._select_members("identifier GLOB ?", "*.log")
+
+
+class WritableSqliteDataStore(ReadOnlySqliteDataStore, WritableDataStoreBase):
+    def __init__(self, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        compress : str or None
+            compression applied to stored records, either 'zlib', 'lzma' or
+            None
+        batch_size : int
+            number of records written per transaction
+        """
+        if_exists = kwargs.pop("if_exists", RAISE)
+        create = kwargs.pop("create", None)
+        compress = kwargs.pop("compress", None)
+        batch_size = kwargs.pop("batch_size", 100)
+        ReadOnlySqliteDataStore.__init__(self, *args, **kwargs)
+        if compress not in _compressors:
+            raise ValueError(f"compress={compress!r} not one of 'zlib', 'lzma'")
+
+        self._persistent |= dict(compress=compress, batch_size=batch_size)
+        self.compress = compress
+        self.batch_size = batch_size
+        self._pending = 0
+        WritableDataStoreBase.__init__(self, if_exists=if_exists, create=create)
+
+    def _source_create_delete(self, if_exists, create):
+        if _sqlite_lockid(self.source):
+            return
+
+        for suffix in ("-wal", "-shm"):
+            # WAL files left behind by a crashed writer
+            if if_exists == OVERWRITE and os.path.exists(self.source + suffix):
+                os.remove(self.source + suffix)
+
+        _db_create_delete(self.source, if_exists, create)
+
+    def _connect(self):
+        """returns a connection to the database, creating the tables and
+        locking it to this process"""
+        db = sqlite3.connect(self.source, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY, "
+            "identifier TEXT UNIQUE NOT NULL, "
+            "completed INTEGER NOT NULL, "
+            "compression TEXT, "
+            "data BLOB)"
+        )
+        db.execute("CREATE TABLE IF NOT EXISTS lock (pid INTEGER)")
+        db.commit()
+        if not db.execute("SELECT pid FROM lock").fetchone():
+            db.execute("INSERT INTO lock (pid) VALUES (?)", (os.getpid(),))
+            db.commit()
+        return db
+
+    def close(self):
+        """closes the data store"""
+        if self._db is not None and self._finish.alive:
+            self.commit()
+        super(WritableSqliteDataStore, self).close()
+
+    def commit(self):
+        """commits pending writes to disk"""
+        self.db.commit()
+        self._pending = 0
+
+    def _insert(self, identifier, data, completed):
+        compress, _ = _compressors[self.compress]
+        data = make_record_for_json(identifier, data, completed)["data"]
+        data = compress(data.encode("utf8"))
+        cursor = self.db.execute(
+            "INSERT INTO results (identifier, completed, compression, data) "
+            "VALUES (?, ?, ?, ?)",
+            (identifier, int(completed), self.compress, data),
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+        return DataStoreMember(identifier, self, id=cursor.lastrowid)
+
+    @extend_docstring_from(WritableDataStoreBase.write)
+    def write(self, identifier, data):
+        relative_id = str(self.get_relative_identifier(identifier))
+        member_id = self._get_record_id(relative_id)
+        if member_id is not None:
+            return DataStoreMember(relative_id, self, id=member_id)
+
+        members = self.members  # ensures existing records are loaded first
+        member = self._insert(relative_id, data, True)
+        if relative_id.endswith(self.suffix):
+            members.append(member)
+
+        return member
+
+    def write_incomplete(self, identifier, not_completed):
+        """stores an incomplete result object"""
+        relative_id = str(self.get_relative_identifier(identifier))
+        member_id = self._get_record_id(relative_id)
+        if member_id is not None:
+            return DataStoreMember(relative_id, self, id=member_id)
+
+        return self._insert(relative_id, not_completed, False)
+
+    def add_file(self, path, make_unique=True, keep_suffix=True, cleanup=False):
+        """
+        Parameters
+        ----------
+        path : str
+            location of file to be added to the data store
+        keep_suffix : bool
+            new path will retain the suffix of the provided file
+        make_unique : bool
+            a successive number will be added to the name before the suffix
+            until the name is unique
+        cleanup : bool
+            delete the original
+        """
+        relativeid = self.make_relative_identifier(path)
+        relativeid = Path(relativeid)
+        path = Path(path)
+        if keep_suffix:
+            relativeid = str(relativeid).replace(
+                relativeid.suffix, "".join(path.suffixes)
+            )
+            relativeid = Path(relativeid)
+
+        if make_unique:
+            suffixes = "".join(relativeid.suffixes)
+            name_wo_suffix = str(relativeid).replace(suffixes, "")
+            new = relativeid
+            num = 0
+            while self._get_record_id(new) is not None:
+                num += 1
+                new = f"{name_wo_suffix}-{num}{suffixes}"
+            relativeid = new
+
+        data = path.read_text()
+        m = self.write(str(relativeid), data)
+
+        if cleanup:
+            path.unlink()
+
+        return m
+
+
+class ResultCache:
+    """content addressed on-disk cache of app results
+
+    Results are stored as json in a directory, one file per key. When
+    max_size is set, the least recently used entries are deleted once the
+    total size of the cache exceeds it. The total is tracked as results are
+    put, and recalculated from the directory only when evicting, so it does
+    not include results stored by other processes since.
+    """
+
+    def __init__(self, path, max_size=None):
+        """
+        Parameters
+        ----------
+        path : str
+            directory for the cache, created if it does not exist
+        max_size : int or None
+            maximum total size of stored results in bytes. If None, the size
+            of the cache is not limited.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        # running total of stored bytes, from a scan on the first put
+        self._size = None
+
+    def __repr__(self):
+        name = self.__class__.__name__
+        return f"{name}(path='{self.path}', max_size={self.max_size})"
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return self._make_path(key).exists()
+
+    @staticmethod
+    def make_key(*parts):
+        """returns md5 hexdigest of the str of parts"""
+        return get_text_hexdigest("\n".join(str(p) for p in parts))
+
+    def _make_path(self, key):
+        return self.path / f"{key}.json"
+
+    def _entries(self):
+        return list(self.path.glob("*.json"))
+
+    @property
+    def size(self):
+        """total size of stored results in bytes"""
+        return sum(p.stat().st_size for p in self._entries())
+
+    def get(self, key, default=None):
+        """returns deserialised result for key, default if key not present"""
+        from cogent3.util.deserialise import deserialise_object
+
+        path = self._make_path(key)
+        try:
+            data = path.read_text()
+            # record the use for least recently used eviction
+            os.utime(path)
+        except FileNotFoundError:
+            # possibly evicted by another process
+            return default
+
+        return deserialise_object(data)
+
+    def put(self, key, data):
+        """stores json serialisation of data under key
+
+        Parameters
+        ----------
+        key : str
+            from make_key
+        data
+            object with a to_json() method
+        """
+        path = self._make_path(key)
+        if self.max_size is not None:
+            if self._size is None:
+                self._size = self.size
+            try:
+                # replacing an existing result
+                self._size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+
+        with atomic_write(path, tmpdir=self.path) as out:
+            out.write(data.to_json())
+
+        if self.max_size is None:
+            return
+
+        self._size += path.stat().st_size
+        if self._size > self.max_size:
+            self.evict(self.max_size)
+
+    def evict(self, max_size):
+        """deletes least recently used results until total size <= max_size
+
+        Returns
+        -------
+        the total size of the remaining results
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        self._size = total
+        return total
+
+    def clear(self):
+        """deletes all stored results"""
+        self.evict(0)
@@ -59,6 +59,8 @@ class model(ComposableModel):
         split_codons=False,
         show_progress=False,
         verbose=False,
+        profile=False,
+        warm_start=False,
     ):
         """
         Parameters
@@ -95,6 +97,17 @@ class model(ComposableModel):
             show progress bars during numerical optimisation
         verbose : bool
             prints intermediate states to screen during fitting
+        profile : bool
+            if True, per-cell call counts and timings of the likelihood
+            calculation are recorded as the profile attribute of the
+            model_result
+        warm_start : bool
+            if True, the likelihood function is kept between successive
+            alignments with the same sequence names, the next alignment
+            replacing the last. A new one is made when the names change.
+            Its construction is skipped and optimisation starts from the
+            parameter values fitted to the previous alignment. The
+            model_result stores the serialised likelihood function.
 
         Returns
         -------
@@ -125,6 +138,8 @@ class model(ComposableModel):
             raise TypeError(f"invalid tree type {type(tree)}")
 
         self._tree = tree
+        # a tree made from the names of each alignment
+        self._tree_from_aln = tree is None
         self._lf_args = lf_args or {}
         if not name:
             name = sm.name or "unnamed model"
@@ -142,6 +157,9 @@ class model(ComposableModel):
         self._param_rules = param_rules
         self._time_het = time_het
         self._split_codons = split_codons
+        self._profile = profile
+        self._warm_start = warm_start
+        self._warm_lfs = {}
         self.func = self.fit
 
     def _configure_lf(self, aln, identifier, initialise=None):
@@ -183,7 +201,20 @@ class model(ComposableModel):
         self, aln, identifier=None, initialise=None, construct=True, **opt_args
     ):
         if construct:
-            self._configure_lf(aln=aln, identifier=identifier, initialise=initialise)
+            # the last likelihood function for identifier, and its seq names
+            names = frozenset(aln.names)
+            warm_names, lf = self._warm_lfs.get(identifier, (None, None))
+            if warm_names == names:
+                lf.set_alignment(aln)
+                if initialise:
+                    initialise(lf, identifier)
+                self._lf = lf
+            else:
+                self._configure_lf(
+                    aln=aln, identifier=identifier, initialise=initialise
+                )
+                if self._warm_start:
+                    self._warm_lfs[identifier] = names, self._lf
         lf = self._lf
         kwargs = self._opt_args.copy()
         kwargs.update(opt_args)
@@ -191,7 +222,7 @@ class model(ComposableModel):
         if self._verbose:
             print("Fit...")
 
-        calc = lf.optimise(return_calculator=True, **kwargs)
+        calc = lf.optimise(return_calculator=True, profile=self._profile, **kwargs)
         lf.calculator = calc
 
         if identifier:
@@ -212,7 +243,9 @@ class model(ComposableModel):
             return NotCompleted("ERROR", self, msg, source=aln)
 
         evaluation_limit = opt_args.get("max_evaluations", None)
-        if self._tree is None:
+        if self._tree is None or (
+            self._tree_from_aln and set(self._tree.get_tip_names()) != set(aln.names)
+        ):
             assert len(aln.names) == 3
             self._tree = make_tree(tip_names=aln.names)
 
@@ -226,12 +259,15 @@ class model(ComposableModel):
             lf = self._fit_aln(
                 aln, initialise=initialise, construct=construct, **opt_args
             )
-            result[self.name] = lf
+            result[self.name] = lf.to_rich_dict() if self._warm_start else lf
             result.num_evaluations = lf.calculator.evaluations
             result.elapsed_time = lf.calculator.elapsed_time
+            if self._profile:
+                result.profile = lf.calculator.get_profile()
         else:
             num_evals = 0
             elapsed_time = 0
+            profiles = []
             for i in range(3):
                 codon_pos = aln[i::3]
                 lf = self._fit_aln(
@@ -241,12 +277,18 @@ class model(ComposableModel):
                     construct=construct,
                     **opt_args,
                 )
-                result[i + 1] = lf
+                result[i + 1] = lf.to_rich_dict() if self._warm_start else lf
                 num_evals += lf.calculator.evaluations
                 elapsed_time += lf.calculator.elapsed_time
+                if self._profile:
+                    profile = lf.calculator.get_profile()
+                    profile.title = str(i + 1)
+                    profiles.append(profile)
 
             result.num_evaluations = num_evals
             result.elapsed_time = elapsed_time
+            if self._profile:
+                result.profile = profiles[0].appended("codon position", profiles[1:])
 
         return result
 
@@ -333,7 +375,23 @@ class bootstrap(ComposableHypothesis):
     _output_types = (RESULT_TYPE, BOOTSTRAP_RESULT_TYPE, SERIALISABLE_TYPE)
     _data_types = ("ArrayAlignment", "Alignment")
 
-    def __init__(self, hyp, num_reps, parallel=False, verbose=False):
+    def __init__(self, hyp, num_reps, parallel=False, verbose=False, par_kw=None):
+        """
+        Parameters
+        ----------
+        hyp
+            a hypothesis app
+        num_reps : int
+            number of simulated replicates
+        parallel : bool
+            fit replicates in parallel
+        verbose : bool
+            not used
+        par_kw
+            dict of values for configuring parallel execution, see
+            cogent3.util.parallel.imap. A WorkerPool, passed as pool, is
+            reused across calls.
+        """
         super(bootstrap, self).__init__(
             input_types=self._input_types,
             output_types=self._output_types,
@@ -344,6 +402,7 @@ class bootstrap(ComposableHypothesis):
         self._num_reps = num_reps
         self._verbose = verbose
         self._parallel = parallel
+        self._par_kw = par_kw or {}
         self.func = self.run
 
     def _fit_sim(self, rep_num):
@@ -367,8 +426,11 @@ class bootstrap(ComposableHypothesis):
         self._null = obs.null
         self._inpath = aln.info.source
 
-        map_fun = map if not self._parallel else parallel.imap
-        sym_results = [r for r in map_fun(self._fit_sim, range(self._num_reps)) if r]
+        if self._parallel:
+            reps = parallel.imap(self._fit_sim, range(self._num_reps), **self._par_kw)
+        else:
+            reps = map(self._fit_sim, range(self._num_reps))
+        sym_results = [r for r in reps if r]
         for sym_result in sym_results:
             if not sym_result:
                 continue
@@ -2,6 +2,8 @@ import json
 import os
 import zipfile
 
+from functools import partial
+
 import numpy
 
 from cogent3 import load_aligned_seqs as _load_aligned_seqs
@@ -40,9 +42,11 @@ from .data_store import (
     RAISE,
     SKIP,
     ReadOnlyDirectoryDataStore,
+    ReadOnlySqliteDataStore,
     ReadOnlyTinyDbDataStore,
     ReadOnlyZippedDataStore,
     SingleReadDataStore,
+    WritableSqliteDataStore,
     WritableTinyDbDataStore,
     load_record_from_json,
     make_record_for_json,
@@ -93,9 +97,10 @@ def get_data_store(base_path, suffix=None, limit=None, verbose=False):
         the number of matches to return
     Returns
     -------
-    ReadOnlyDirectoryDataStore or ReadOnlyZippedDataStore
+    ReadOnlyDirectoryDataStore, ReadOnlyZippedDataStore, ReadOnlyTinyDbDataStore
+    or ReadOnlySqliteDataStore
     """
-    if base_path.endswith("tinydb"):
+    if base_path.endswith(("tinydb", "sqlitedb")):
         suffix = "json"
 
     if suffix is None:
@@ -109,6 +114,8 @@ def get_data_store(base_path, suffix=None, limit=None, verbose=False):
     zipped = zipfile.is_zipfile(base_path)
     if base_path.endswith("tinydb"):
         klass = ReadOnlyTinyDbDataStore
+    elif base_path.endswith("sqlitedb"):
+        klass = ReadOnlySqliteDataStore
     elif zipped:
         klass = ReadOnlyZippedDataStore
     else:
@@ -437,7 +444,7 @@ class write_seqs(_checkpointable):
 
 
 class load_json(Composable):
-    """Loads json serialised cogent3 objects from a json file. 
+    """Loads json serialised cogent3 objects from a json file.
     Returns whatever object type was stored."""
 
     _type = "output"
@@ -515,7 +522,7 @@ class write_json(_checkpointable):
 
 
 class load_db(Composable):
-    """Loads json serialised cogent3 objects from a TinyDB file. 
+    """Loads json serialised cogent3 objects from a TinyDB or SQLite file.
     Returns whatever object type was stored."""
 
     _type = "output"
@@ -530,11 +537,11 @@ class load_db(Composable):
         self.func = self.read
 
     def read(self, identifier):
-        """returns object deserialised from a TinyDb"""
+        """returns object deserialised from a TinyDb or SQLite db"""
         id_ = getattr(identifier, "id", None)
         if id_ is None:
             msg = (
-                f"{identifier} not connected to a TinyDB. "
+                f"{identifier} not connected to a db store. "
                 "If a json file path, use io.load_json()"
             )
             raise TypeError(msg)
@@ -553,7 +560,7 @@ class load_db(Composable):
 
 
 class write_db(_checkpointable):
-    """Writes json serialised objects to a TinyDB instance."""
+    """Writes json serialised objects to a TinyDB or SQLite instance."""
 
     _type = "output"
 
@@ -561,8 +568,41 @@ class write_db(_checkpointable):
     _output_types = (IDENTIFIER_TYPE, SERIALISABLE_TYPE)
 
     def __init__(
-        self, data_path, name_callback=None, create=False, if_exists=SKIP, suffix="json"
+        self,
+        data_path,
+        name_callback=None,
+        create=False,
+        if_exists=SKIP,
+        suffix="json",
+        compress=None,
     ):
+        """
+        Parameters
+        ----------
+        data_path
+            path to the db. A SQLite store is used if it ends with '.sqlitedb',
+            otherwise a TinyDB store.
+        name_callback
+            function that takes the data object and returns a base
+            file name
+        create : bool
+            whether to create the data_path reference
+        if_exists : str
+            behaviour if output exists. Either 'skip', 'raise' (raises an
+            exception), 'overwrite', 'ignore'
+        suffix : str
+            suffix for member names
+        compress : str or None
+            compression of stored records, either 'zlib' or 'lzma'. Only
+            applies to SQLite stores.
+        """
+        if data_path.endswith(".sqlitedb"):
+            writer_class = partial(WritableSqliteDataStore, compress=compress)
+        elif compress:
+            raise ValueError("compress only supported for '.sqlitedb' stores")
+        else:
+            writer_class = WritableTinyDbDataStore
+
         super(write_db, self).__init__(
             input_types=self._input_types,
             output_types=self._output_types,
@@ -571,21 +611,26 @@ class write_db(_checkpointable):
             create=create,
             if_exists=if_exists,
             suffix=suffix,
-            writer_class=WritableTinyDbDataStore,
+            writer_class=writer_class,
         )
         self.func = self.write
 
     def _set_checkpoint_loader(self):
         self._load_checkpoint = self
 
-    def write(self, data, identifier=None):
-        if identifier is None:
-            identifier = self._make_output_identifier(data)
-        # todo revisit this when we establish immutability behaviour of database
+    @staticmethod
+    def _serialise(data):
         try:
             out = data.to_json()
         except AttributeError:
             out = json.dumps(data)
+        return out
+
+    def write(self, data, identifier=None):
+        if identifier is None:
+            identifier = self._make_output_identifier(data)
+        # todo revisit this when we establish immutability behaviour of database
+        out = self._serialise(data)
         stored = self.data_store.write(identifier, out)
         # todo is anything actually using this stored attriubte? if not, delete this
         #  code and all other cases
@@ -137,6 +137,7 @@ class model_result(generic_result):
         self._nfp = nfp
         self._DLC = DLC
         self._unique_Q = unique_Q
+        self.profile = None
 
     def _get_repr_data_(self):
         self.deserialised_values()  # making sure we're fully reloaded
@@ -29,3 +29,7 @@ __version__ = "2020.2.7a"
 __maintainer__ = "Gavin Huttley"
 __email__ = "gavin.huttley@anu.edu.au"
 __status__ = "Production"
+
+# moltype sets the default moltype on the classes defined in the other core
+# modules, so it must be loaded whenever any of them are used
+from cogent3.core import moltype  # noqa
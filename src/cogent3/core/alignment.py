@@ -35,6 +35,9 @@ import numpy
 from numpy import (
     arange,
     array,
+    empty,
+    flatnonzero,
+    isin,
     logical_and,
     logical_not,
     logical_or,
@@ -46,11 +49,12 @@ from numpy import (
     transpose,
     uint8,
     vstack,
+    where,
     zeros,
 )
 from numpy.random import choice, permutation, randint
 
-import cogent3  # will use to get at cogent3.parse.fasta.MinimalFastaParser,
+import cogent3  # will use to get at cogent3.DNA etc.
 
 from cogent3.core.annotation import Map, _Annotatable
 from cogent3.core.genetic_code import DEFAULT, get_code
@@ -110,32 +114,64 @@ eps = 1e-6
 # factory functions for identifying whether character set conditions are satsified
 
 
-def AllowedCharacters(chars, is_array=False, negate=False):
-    """factory function for evaluating whether a sequence contains only
-    the specified gap characters"""
-    try:
-        chars = set(chars)
-    except TypeError:
-        chars = set([chars])
+class AllowedCharacters:
+    """evaluates whether a sequence contains only the specified characters"""
 
-    def just_chars(data):
-        if is_array:
-            data = set(data.flatten())
-        else:
-            data = set("".join(data))
-        return data <= chars
+    def __init__(self, chars, is_array=False, negate=False):
+        """
+        Parameters
+        ----------
+        chars
+            the allowed characters
+        is_array : bool
+            whether input will be a numpy array
+        negate : bool
+            if True, evaluates whether none of chars are present
 
-    def not_chars(data):
-        if is_array:
-            data = set(data.flatten())
-        else:
-            data = set("".join(data))
-        return not data & chars
+        Notes
+        -----
+        When is_array, instances provide array_mask() for evaluating all
+        columns of a (num_seqs, num_motifs, motif_length) array at once.
+        """
+        try:
+            chars = set(chars)
+        except TypeError:
+            chars = set([chars])
+        self.chars = chars
+        self.is_array = is_array
+        self.negate = negate
+        self._func = self.not_chars if negate else self.just_chars
+        if not is_array:
+            self.array_mask = None
+
+    def _get_chars(self, data):
+        if self.is_array:
+            return set(data.flatten())
+        return set("".join(data))
+
+    def just_chars(self, data):
+        """only chars are present"""
+        return self._get_chars(data) <= self.chars
+
+    def not_chars(self, data):
+        """none of chars are present"""
+        return not self._get_chars(data) & self.chars
+
+    def array_mask(self, data):
+        """returns bool array indicating motifs satisfying the condition
 
-    if negate:
-        return not_chars
+        Parameters
+        ----------
+        data
+            array of shape (num_seqs, num_motifs, motif_length)
+        """
+        matched = isin(data, list(self.chars))
+        if self.negate:
+            return ~matched.any(axis=(0, 2))
+        return matched.all(axis=(0, 2))
 
-    return just_chars
+    def __call__(self, data):
+        return self._func(data)
 
 
 class GapsOk:
@@ -175,6 +211,7 @@ class GapsOk:
         self.is_array = is_array
         self.allowed_frac = allowed_frac
         self.allowed_run = allowed_run
+        self.negate = negate
         if gap_run:
             self._func = self.gap_run_ok
         elif negate:
@@ -186,6 +223,8 @@ class GapsOk:
             self.gap_chars = set(gap_chars)
         except TypeError:
             self.gap_chars = set([gap_chars])
+        if gap_run or not is_array:
+            self.array_mask = None
 
     def _get_gap_frac(self, data):
         length = len(data) * self.motif_length
@@ -209,6 +248,20 @@ class GapsOk:
         gap_frac = self._get_gap_frac(data)
         return gap_frac >= self.allowed_frac
 
+    def array_mask(self, data):
+        """returns bool array indicating motifs satisfying the gap fraction
+
+        Parameters
+        ----------
+        data
+            array of shape (num_seqs, num_motifs, motif_length)
+        """
+        num_gap = isin(data, list(self.gap_chars)).sum(axis=(0, 2))
+        gap_frac = num_gap / (data.shape[0] * self.motif_length)
+        if self.negate:
+            return gap_frac >= self.allowed_frac
+        return gap_frac <= self.allowed_frac
+
     def gap_run_ok(self, seq):
         """runs of gaps <= allowed_run"""
         curr_run = max_run = 0
@@ -306,9 +359,11 @@ def seqs_from_fasta(seqs, alphabet=None):
     string or collection of lines into a SequenceCollection object, preserving
     order..
     """
+    from cogent3.parse.fasta import MinimalFastaParser
+
     if isinstance(seqs, str):
         seqs = seqs.splitlines()
-    names, seqs = list(zip(*list(cogent3.parse.fasta.MinimalFastaParser(seqs))))
+    names, seqs = list(zip(*list(MinimalFastaParser(seqs))))
     return list(seqs), list(names)
 
 
@@ -3051,16 +3106,10 @@ class AlignmentI(object):
         if alert and len(self) != length:
             warnings.warn(f"trimmed {len(self) - length}", UserWarning)
 
-        is_array = isinstance(self, ArrayAlignment)
         counts = []
         motifs = set()
         for name in self.names:
-            if is_array:
-                seq = self.moltype.make_array_seq(
-                    self.array_seqs[self.names.index(name)]
-                )
-            else:
-                seq = self.get_gapped_seq(name)
+            seq = self.get_gapped_seq(name)
             c = seq.counts(
                 motif_length=motif_length,
                 include_ambiguity=include_ambiguity,
@@ -3140,7 +3189,14 @@ class AlignmentI(object):
         new = klass(data=data, moltype=moltype, info=self.info, names=self.names)
         return new
 
-    def distance_matrix(self, calc="percent", show_progress=False, drop_invalid=False):
+    def distance_matrix(
+        self,
+        calc="percent",
+        show_progress=False,
+        drop_invalid=False,
+        parallel=False,
+        par_kw=None,
+    ):
         """Returns pairwise distances between sequences.
 
         Parameters
@@ -3154,6 +3210,12 @@ class AlignmentI(object):
             If True, sequences for which a pairwise distance could not be
             calculated are excluded. If False, an ArithmeticError is raised if
             a distance could not be computed on observed data.
+        parallel : bool
+            compute blocks of pairwise distances in parallel, according to
+            arguments in par_kw
+        par_kw
+            dict of values for configuring parallel execution, see
+            cogent3.util.parallel.imap
         """
         from cogent3.evolve.fast_distance import get_distance_calculator
 
@@ -3164,7 +3226,9 @@ class AlignmentI(object):
                 alignment=self,
                 invalid_raises=not drop_invalid,
             )
-            calculator.run(show_progress=show_progress)
+            calculator.run(
+                show_progress=show_progress, parallel=parallel, par_kw=par_kw
+            )
         except ArithmeticError:
             msg = "not all pairwise distances could be computed, try drop_invalid=True"
             raise ArithmeticError(msg)
@@ -3598,6 +3662,8 @@ def aln_from_fasta(seqs, array_type=None, alphabet=None):
 
     WARNING: Data type of return array is not guaranteed -- check in caller!
     """
+    from cogent3.parse.fasta import MinimalFastaParser
+
     if isinstance(seqs, bytes):
         seqs = seqs.decode("utf-8")
     if isinstance(seqs, str):
@@ -3605,7 +3671,7 @@ def aln_from_fasta(seqs, array_type=None, alphabet=None):
     return aln_from_array_seqs(
         [
             ArraySequence(s, name=l, alphabet=alphabet)
-            for l, s in cogent3.parse.fasta.MinimalFastaParser(seqs)
+            for l, s in MinimalFastaParser(seqs)
         ],
         array_type,
     )
@@ -3664,6 +3730,69 @@ def aln_from_empty(obj, *args, **kwargs):
     raise ValueError("Cannot create empty alignment.")
 
 
+_ARRAY_FILE_MAGIC = b"C3ARRALN"
+
+
+def _as_slice(indices):
+    """returns a slice equivalent to indices if they are evenly spaced and
+    increasing, so indexing with it produces a view, otherwise indices"""
+    if len(indices) == 0:
+        return indices
+
+    start = indices[0]
+    if len(indices) == 1:
+        return slice(start, start + 1)
+
+    step = indices[1] - start
+    if step <= 0 or (numpy.diff(indices) != step).any():
+        return indices
+
+    return slice(start, indices[-1] + 1, step)
+
+
+def load_array_alignment(filename, mode="r"):
+    """returns an ArrayAlignment memory mapped from a file written by
+    ArrayAlignment.write_array()
+
+    Parameters
+    ----------
+    filename
+        path to the file
+    mode : str
+        numpy.memmap mode. 'r' (default) is read only, 'c' is copy-on-write.
+
+    Notes
+    -----
+    Sequence data is read from disk on access. Slices, sliding windows,
+    take_seqs() of evenly spaced sequences and filtered() results that are
+    contiguous share the mapped data.
+    """
+    with open(filename, "rb") as infile:
+        magic = infile.read(len(_ARRAY_FILE_MAGIC))
+        if magic != _ARRAY_FILE_MAGIC:
+            raise ValueError(f"'{filename}' is not an array alignment file")
+        size = int.from_bytes(infile.read(8), "little")
+        header = json.loads(infile.read(size).decode("utf8"))
+
+    data = numpy.memmap(
+        filename,
+        dtype=uint8,
+        mode=mode,
+        offset=len(_ARRAY_FILE_MAGIC) + 8 + size,
+        shape=tuple(header["shape"]),
+    )
+    result = ArrayAlignment(
+        data,
+        names=header["names"],
+        moltype=header["moltype"],
+        info=dict(source=filename),
+        force_same_data=True,
+    )
+    if list(result.alphabet) != header["alphabet"]:
+        raise ValueError(f"'{filename}' alphabet does not match moltype")
+    return result
+
+
 # Implementation of Alignment base class
 
 
@@ -3748,7 +3877,12 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
         """
         kwargs["suppress_named_seqs"] = True
         super(ArrayAlignment, self).__init__(*args, **kwargs)
-        self.array_positions = transpose(self.seq_data.astype(self.alphabet.array_type))
+        # with force_same_data, the array (e.g. a memmap) is used without copying
+        # if it already has the alphabet array type
+        copy = not kwargs.get("force_same_data", False)
+        self.array_positions = transpose(
+            self.seq_data.astype(self.alphabet.array_type, copy=copy)
+        )
         self.array_seqs = transpose(self.array_positions)
         self.seq_data = self.array_seqs
         self.seq_len = len(self.array_positions)
@@ -3790,19 +3924,37 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
         """
         return iter(self.positions)
 
+    def _view(self, array_seqs):
+        """returns an instance with array_seqs, a view on self.array_seqs
+
+        The constructor is bypassed, so array_seqs is not validated and the
+        names, moltype, alphabet and info of self are used as is.
+        """
+        result = object.__new__(self.__class__)
+        result.name = None
+        result.alphabet = self.alphabet
+        result.moltype = self.moltype
+        result.info = self.info
+        result.names = list(self.names)
+        result.array_seqs = result.seq_data = result._seqs = array_seqs
+        result.array_positions = array_seqs.T
+        result.seq_len = array_seqs.shape[1]
+        result._type = self._type
+        result._repr_policy = dict(self._repr_policy)
+        return result
+
     def __getitem__(self, item):
-        if not isinstance(item, slice):
-            data = self.array_seqs[:, item]
-            data = vstack(data)
+        if isinstance(item, slice):
+            result = self._view(self.array_seqs[:, item])
         else:
-            data = self.array_seqs[:, item]
-        result = self.__class__(
-            data.T,
-            list(map(str, self.names)),
-            self.alphabet,
-            conversion_f=aln_from_array,
-            info=self.info,
-        )
+            data = vstack(self.array_seqs[:, item])
+            result = self.__class__(
+                data.T,
+                list(map(str, self.names)),
+                self.alphabet,
+                conversion_f=aln_from_array,
+                info=self.info,
+            )
         result._repr_policy.update(self._repr_policy)
         return result
 
@@ -3965,7 +4117,9 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
         ----------
         predicate : callable
             a callback function that takes an tuple of motifs and returns
-            True/False
+            True/False. If predicate has an array_mask method, it is applied
+            (ArrayAlignment only) to the array of shape (num_seqs, num_motifs,
+            motif_length) and must return a bool array of length num_motifs.
         motif_length : int
             length of the motifs the sequences should be split  into, eg. 3 for
             filtering aligned codons.
@@ -3985,19 +4139,22 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
             shaped = shaped[:, : num_motifs * motif_length]
 
         shaped = shaped.reshape((self.num_seqs, num_motifs, motif_length))
-        indices = []
-        elements = arange(motif_length)
-        for i in range(num_motifs):
-            if not predicate(shaped[:, i]):
-                continue
-
-            start = motif_length * i
-            indices.extend(elements + start)
+        array_mask = getattr(predicate, "array_mask", None)
+        if array_mask is not None:
+            keep = array_mask(shaped)
+        else:
+            keep = array(
+                [bool(predicate(shaped[:, i])) for i in range(num_motifs)], dtype=bool
+            )
 
-        if not indices:
+        if not keep.any():
             return None
 
-        positions = self.array_seqs.take(indices, axis=1)
+        indices = flatnonzero(keep)
+        if motif_length != 1:
+            indices = (indices[:, None] * motif_length + arange(motif_length)).ravel()
+
+        positions = self.array_seqs[:, _as_slice(indices)]
         result = self.__class__(
             positions,
             force_same_data=True,
@@ -4007,6 +4164,280 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
         )
         return result
 
+    @extend_docstring_from(_SequenceCollectionBase.take_seqs)
+    def take_seqs(self, seqs, negate=False, **kwargs):
+        if kwargs or not isinstance(self.array_seqs, numpy.memmap):
+            return super(ArrayAlignment, self).take_seqs(seqs, negate=negate, **kwargs)
+
+        if type(seqs) == str:
+            seqs = [seqs]
+
+        if negate:
+            exclude = set(seqs)
+            seqs = [n for n in self.names if n not in exclude]
+
+        if not seqs:
+            return {}  # safe value; can't construct empty alignment
+
+        index = {n: i for i, n in enumerate(self.names)}
+        rows = array([index[n] for n in seqs], dtype=int)
+        return self.__class__(
+            self.array_seqs[_as_slice(rows)],
+            names=list(seqs),
+            alphabet=self.alphabet,
+            moltype=self.moltype,
+            info=self.info,
+            force_same_data=True,
+        )
+
+    def write_array(self, filename):
+        """writes the alignment as a binary file that can be memory mapped
+
+        Parameters
+        ----------
+        filename
+            path to write to, see load_array_alignment()
+
+        Notes
+        -----
+        The file has a header, containing the names, moltype and alphabet,
+        followed by the sequences as a contiguous (num_seqs, seq_len) uint8
+        matrix.
+        """
+        if len(self.alphabet) > 256:
+            raise ValueError("alphabet too large to be stored as uint8")
+
+        header = dict(
+            version=1,
+            names=list(map(str, self.names)),
+            moltype=self.moltype.label,
+            alphabet=list(self.alphabet),
+            shape=[self.num_seqs, self.seq_len],
+        )
+        header = json.dumps(header).encode("utf8")
+        # pad so the matrix is aligned
+        offset = len(_ARRAY_FILE_MAGIC) + 8 + len(header)
+        header += b" " * (-offset % 64)
+        with open(filename, "wb") as outfile:
+            outfile.write(_ARRAY_FILE_MAGIC)
+            outfile.write(len(header).to_bytes(8, "little"))
+            outfile.write(header)
+            for seq in self.array_seqs:
+                outfile.write(seq.astype(uint8).tobytes())
+
+    def _get_motif_codes(self, motif_length):
+        """returns the index of non-overlapping motifs in each sequence and
+        the unique observed motifs
+
+        Returns
+        -------
+        array of shape (num_seqs, num_motifs) indexing the list of motifs
+        """
+        num_motifs = self.seq_len // motif_length
+        data = self.array_seqs[:, : num_motifs * motif_length].astype(int)
+        data = data.reshape((self.num_seqs, num_motifs, motif_length))
+        base = len(self.alphabet)
+        # base-N encoding of motif elements
+        powers = base ** arange(motif_length - 1, -1, -1)
+        codes = data.dot(powers)
+        unique, indices = numpy.unique(codes, return_inverse=True)
+        indices = indices.reshape(codes.shape)
+        digits = (unique[:, None] // powers) % base
+        chars = self.alphabet
+        motifs = ["".join(chars[d] for d in row) for row in digits]
+        return indices, motifs
+
+    def _get_motif_counts(self, motif_length, axis):
+        """returns motif counts per sequence (axis=0) or per position (axis=1)
+        and the observed motifs"""
+        indices, motifs = self._get_motif_codes(motif_length)
+        if axis == 1:
+            indices = indices.T
+        num_rows = indices.shape[0]
+        num_motifs = len(motifs)
+        offsets = arange(num_rows)[:, None] * num_motifs
+        counts = numpy.bincount(
+            (indices + offsets).ravel(), minlength=num_rows * num_motifs
+        )
+        return counts.reshape((num_rows, num_motifs)), motifs
+
+    @staticmethod
+    def _select_motifs(counts, observed, motifs):
+        """returns counts for motifs, zero for those not in observed"""
+        result = zeros((counts.shape[0], len(motifs)), dtype=counts.dtype)
+        observed = {m: i for i, m in enumerate(observed)}
+        columns = [(j, observed[m]) for j, m in enumerate(motifs) if m in observed]
+        if columns:
+            dest, src = zip(*columns)
+            result[:, list(dest)] = counts[:, list(src)]
+        return result
+
+    @extend_docstring_from(AlignmentI.counts_per_pos)
+    def counts_per_pos(
+        self, motif_length=1, include_ambiguity=False, allow_gap=False, alert=False
+    ):
+        length = (len(self) // motif_length) * motif_length
+        if alert and len(self) != length:
+            warnings.warn(f"trimmed {len(self) - length}", UserWarning)
+
+        counts, observed = self._get_motif_counts(motif_length, axis=1)
+        alpha = self.moltype.alphabet.get_word_alphabet(motif_length)
+        alpha = list(alpha) + sorted(set(observed) - set(alpha))
+        exclude_chars = set()
+        if not allow_gap:
+            exclude_chars.update(self.moltype.gap)
+
+        if not include_ambiguity:
+            ambigs = [c for c, v in self.moltype.ambiguities.items() if len(v) > 1]
+            exclude_chars.update(ambigs)
+
+        if exclude_chars:
+            alpha = [m for m in alpha if not (set(m) & exclude_chars)]
+
+        result = self._select_motifs(counts, observed, alpha)
+        return MotifCountsArray(result, alpha)
+
+    @extend_docstring_from(AlignmentI.counts_per_seq)
+    def counts_per_seq(
+        self,
+        motif_length=1,
+        include_ambiguity=False,
+        allow_gap=False,
+        exclude_unobserved=False,
+        alert=False,
+    ):
+        length = (len(self) // motif_length) * motif_length
+        if alert and len(self) != length:
+            warnings.warn(f"trimmed {len(self) - length}", UserWarning)
+
+        counts, observed = self._get_motif_counts(motif_length, axis=0)
+        is_degen = self.moltype.is_degenerate
+        is_gap = self.moltype.is_gapped
+        motifs = set()
+        for i, m in enumerate(observed):
+            if (include_ambiguity or not is_degen(m)) and (allow_gap or not is_gap(m)):
+                motifs.add(m)
+            else:
+                # may be restored as an unobserved motif
+                counts[:, i] = 0
+
+        if not exclude_unobserved:
+            motifs.update(self.moltype.alphabet.get_word_alphabet(motif_length))
+
+        motifs = list(sorted(motifs))
+        if not motifs:
+            return None
+
+        result = self._select_motifs(counts, observed, motifs)
+        return MotifCountsArray(result, motifs, row_indices=self.names)
+
+    def _get_window_starts(self, window, step, start=None, end=None):
+        """returns array of window start positions, consistent with
+        sliding_windows()"""
+        start = [start, 0][start is None]
+        end = [end, len(self) - window + 1][end is None]
+        end = min(len(self) - window + 1, end)
+        if start < end and len(self) - end >= window - 1:
+            return arange(start, end, step)
+        return arange(0)
+
+    def _sum_per_window(self, values, starts, window):
+        """returns sums of values (first axis is positions) over windows"""
+        # prefix sums make each window a single difference
+        totals = numpy.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+        numpy.cumsum(values, axis=0, out=totals[1:])
+        return totals[starts + window] - totals[starts]
+
+    def counts_per_window(
+        self,
+        window,
+        step,
+        start=None,
+        end=None,
+        include_ambiguity=False,
+        allow_gap=False,
+    ):
+        """returns MotifCountsArray of counts per window, rows are the window
+        start positions
+
+        Parameters
+        ----------
+        window
+            the length of each window
+        step
+            the interval between the start of successive windows
+        start
+            first window start position
+        end
+            last window start position
+        include_ambiguity
+            if True, ambiguous characters are counted
+        allow_gap
+            if True, gap characters are counted
+
+        Notes
+        -----
+        Windows are those of sliding_windows(), but all are counted in a
+        single pass over the alignment.
+        """
+        starts = self._get_window_starts(window, step, start=start, end=end)
+        if not len(starts):
+            return None
+
+        counts = self.counts_per_pos(
+            include_ambiguity=include_ambiguity, allow_gap=allow_gap
+        )
+        result = self._sum_per_window(counts.array, starts, window)
+        return MotifCountsArray(result, counts.motifs, row_indices=starts)
+
+    def entropy_per_window(
+        self,
+        window,
+        step,
+        start=None,
+        end=None,
+        include_ambiguity=False,
+        allow_gap=False,
+    ):
+        """returns shannon entropy of the motif frequencies in each window
+
+        Parameters are as for counts_per_window().
+        """
+        counts = self.counts_per_window(
+            window,
+            step,
+            start=start,
+            end=end,
+            include_ambiguity=include_ambiguity,
+            allow_gap=allow_gap,
+        )
+        if counts is None:
+            return None
+        return counts.to_freq_array().entropy()
+
+    def gap_frac_per_window(
+        self, window, step, start=None, end=None, include_ambiguity=True
+    ):
+        """returns DictArray of the fraction of gap characters in each window,
+        keyed by the window start position
+
+        Parameters
+        ----------
+        window, step, start, end
+            as for counts_per_window()
+        include_ambiguity : bool
+            if True, ambiguity characters that include the gap state are
+            included
+        """
+        starts = self._get_window_starts(window, step, start=start, end=end)
+        if not len(starts):
+            return None
+
+        gaps = self.get_gap_array(include_ambiguity=include_ambiguity).sum(axis=0)
+        result = self._sum_per_window(gaps, starts, window)
+        result = result / (self.num_seqs * window)
+        return DictArrayTemplate(starts).wrap(result)
+
     def get_gapped_seq(self, seq_name, recode_gaps=False, moltype=None):
         """Return a gapped Sequence object for the specified seqname.
 
@@ -4244,6 +4675,11 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
         mask_degen
             if True, degenerate characters are ignored
 
+        Notes
+        -----
+        Sequences are grouped by hashing their bytes, with degenerate
+        characters replaced by a single code when mask_degen. Only groups
+        that differ in their degenerate positions are compared directly.
         """
         if mask_degen and not hasattr(self.moltype, "alphabets"):
             UserWarning(
@@ -4252,54 +4688,64 @@ class ArrayAlignment(AlignmentI, _SequenceCollectionBase):
             )
             mask_degen = False
 
+        data = self.array_seqs
+        if mask_degen:
+            # we get the indexes range for non-degenerate characters
+            indices = [self.alphabet.index(c) for c in self.moltype]
+            # make sure they're all consecutive
+            diffs = set([indices[i - 1] - indices[i] for i in range(1, len(indices))])
+            assert diffs == set([-1]), diffs
+            start, end = min(indices), max(indices)
+            # identify non-masked positions
+            canonical = logical_and(data >= start, data <= end)
+            data = where(canonical, data, end + 1)
+
+        groups = defaultdict(list)
+        for i, row in enumerate(data):
+            groups[row.tobytes()].append(i)
+
+        groups = list(groups.values())
         if not mask_degen:
-            seqs_names = list(zip(self.array_seqs.tolist(), self.names))
-            seqs_names.sort()
-            matched = None
-            dupes = defaultdict(set)
-            for i in range(self.num_seqs - 1):
-                if seqs_names[i][0] == seqs_names[i + 1][0]:
-                    matched = seqs_names[i][1] if matched is None else matched
-                    dupes[matched].update([seqs_names[i + 1][1], matched])
-                else:
-                    matched = None
-            identical_sets = list(dupes.values())
-            return identical_sets
-
-        # we get the indexes range for non-degenerate characters
-        indices = [self.alphabet.index(c) for c in self.moltype]
-        # make sure they're all consecutive
-        diffs = set([indices[i - 1] - indices[i] for i in range(1, len(indices))])
-        assert diffs == set([-1]), diffs
-        start, end = min(indices), max(indices)
-        # identify non-masked positions
-        degen_masks = {}
-        for i in range(self.num_seqs):
-            s1 = self.array_seqs[i]
-            degen_masks[i] = logical_or(s1 <= start, s1 <= end)
+            return [set(self.names[i] for i in g) for g in groups if len(g) > 1]
+
+        # sequences in the same group share their degenerate positions, so
+        # are compared as a unit using the first member
+        firsts = array([g[0] for g in groups])
+        canonical = canonical[firsts]
+        data = data[firsts]
+        patterns = defaultdict(list)
+        for i, row in enumerate(canonical):
+            patterns[row.tobytes()].append(i)
+
+        pattern_ids = empty(len(groups), dtype=int)
+        for pattern_id, members in enumerate(patterns.values()):
+            pattern_ids[members] = pattern_id
+
+        # groups that match ignoring degenerate positions also match on the
+        # columns that are canonical in every sequence
+        buckets = defaultdict(list)
+        for i, row in enumerate(data[:, canonical.all(axis=0)]):
+            buckets[row.tobytes()].append(i)
 
         identical_sets = []
-        seen = set()
-        for i in range(self.num_seqs - 1):
-            if i in seen:
-                continue
-
-            s1 = self.array_seqs[i]
-            m1 = degen_masks[i]
-            group = set()
-            for j in range(i + 1, self.num_seqs):
-                if j in seen:
-                    continue
-
-                s2 = self.array_seqs[j]
-                m2 = degen_masks[j]
-                valid_pos = logical_and(m1, m2)  # non-degen positions
-                if (s1[valid_pos] == s2[valid_pos]).all():
-                    seen.update([i, j])
-                    group.update([i, j])
-
-            if group:
-                identical_sets.append(set(self.names[i] for i in group))
+        for bucket in buckets.values():
+            bucket = array(bucket)
+            while len(bucket):
+                i, others = bucket[0], bucket[1:]
+                # groups with the same degenerate positions differ somewhere
+                matched = others[pattern_ids[others] != pattern_ids[i]]
+                for begin in range(0, data.shape[1], 64):
+                    if not len(matched):
+                        break
+                    cols = slice(begin, begin + 64)
+                    valid_pos = canonical[matched, cols] & canonical[i, cols]
+                    same = (data[matched, cols] == data[i, cols]) | ~valid_pos
+                    matched = matched[same.all(axis=1)]
+
+                group = [j for k in [i] + matched.tolist() for j in groups[k]]
+                if len(group) > 1:
+                    identical_sets.append(set(self.names[j] for j in group))
+                bucket = others[~isin(others, matched)]
 
         return identical_sets
 
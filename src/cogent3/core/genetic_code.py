@@ -9,8 +9,6 @@ import re
 
 from itertools import product
 
-from cogent3.util.table import Table
-
 
 __author__ = "Greg Caporaso and Rob Knight"
 __copyright__ = "Copyright 2007-2020, The Cogent Project"
@@ -198,6 +196,7 @@ class GeneticCode:
 
     def to_table(self):
         from cogent3.core.moltype import IUPAC_PROTEIN_code_aa
+        from cogent3.util.table import Table
 
         rows = []
         headers = ["aa", "IUPAC code", "codons"]
@@ -31,7 +31,7 @@ class _MotifNumberArray(DictArray):
         # strings
         # todo change row_indices argument name to row_keys
         if isinstance(data, numpy.ndarray):
-            some_data = data.any()
+            some_data = data.size > 0
         else:
             some_data = any(data)
 
@@ -5,8 +5,10 @@ include "../../include/numerical_pyrex.pyx"
 version_info = (2, 2)
 __version__ = "('2020', '2', '7a')"
 
-cdef extern from "math.h":
+cdef extern from "math.h" nogil:
     double log (double x)
+    float frexpf (float x, int *exp)
+    float ldexpf (float x, int exp)
 
 
 def sum_input_likelihoods(child_indexes, Double2D result, likelihoods):
@@ -26,18 +28,71 @@ def sum_input_likelihoods(child_indexes, Double2D result, likelihoods):
         U = 0
         checkArray1D(index, &S)
         checkArray2D(plhs, &U, &M)
-        if child == 0:
+        with nogil:
+            if child == 0:
+                for parent_col in range(S):
+                    child_col = index[parent_col]
+                    for motif in range(M):
+                        result[parent_col, motif] = plhs[child_col, motif]
+            else:
+                for parent_col in range(S):
+                    child_col = index[parent_col]
+                    for motif in range(M):
+                        result[parent_col, motif] *= plhs[child_col, motif]
+    return result
+    
+def sum_input_likelihoods_scaled(child_indexes, float[:, ::1] result,
+        long[::1] exponents, likelihoods, child_exponents):
+    # Single precision version of sum_input_likelihoods. Each row of the
+    # result, and of the likelihoods, is scaled by 2**exponents[row]. After
+    # each child's likelihoods are multiplied in the row is rescaled so its
+    # largest value is in [0.5, 1), so even a large polytomy can't underflow.
+    cdef int M, S, U, C, motif, parent_col, child_col, child, exponent
+    cdef float[:, ::1] plhs
+    cdef long[::1] plh_exponents
+    cdef Long1D index
+    cdef float largest
+
+    C = len(child_indexes)
+    M = S = 0
+    if result.shape[0] != exponents.shape[0]:
+        raise ValueError("result and exponents differ in length")
+    S = result.shape[0]
+    M = result.shape[1]
+
+    for child in range(C):
+        index = child_indexes[child]
+        plhs = likelihoods[child]
+        plh_exponents = child_exponents[child]
+        U = 0
+        checkArray1D(index, &S)
+        U = plhs.shape[0]
+        if plhs.shape[1] != M or plh_exponents.shape[0] != U:
+            raise ValueError("child likelihoods are the wrong shape")
+        with nogil:
             for parent_col in range(S):
                 child_col = index[parent_col]
+                if child_col < 0 or child_col >= U:
+                    with gil:
+                        raise ValueError((child_col, U))
+                largest = 0.0
                 for motif in range(M):
-                    result[parent_col, motif] = plhs[child_col, motif]
-        else:
-            for parent_col in range(S):
-                child_col = index[parent_col]
+                    if child == 0:
+                        result[parent_col, motif] = plhs[child_col, motif]
+                    else:
+                        result[parent_col, motif] *= plhs[child_col, motif]
+                    if result[parent_col, motif] > largest:
+                        largest = result[parent_col, motif]
+                frexpf(largest, &exponent)
                 for motif in range(M):
-                    result[parent_col, motif] *= plhs[child_col, motif]
+                    result[parent_col, motif] = ldexpf(
+                        result[parent_col, motif], -exponent)
+                if child == 0:
+                    exponents[parent_col] = plh_exponents[child_col] + exponent
+                else:
+                    exponents[parent_col] += plh_exponents[child_col] + exponent
     return result
-    
+
 def get_total_log_likelihood(Double1D counts, Double2D input_likelihoods, Double1D mprobs):
     cdef int S, M, col, motif
     cdef double posn, total
@@ -49,11 +104,12 @@ def get_total_log_likelihood(Double1D counts, Double2D input_likelihoods, Double
     checkArray2D(input_likelihoods, &S, &M)
     
     total = 0.0
-    for col in range(S):
-        posn = 0.0
-        for motif in range(M):
-            posn += input_likelihoods[col, motif] * mprobs[motif]
-        total += log(posn)*counts[col]
+    with nogil:
+        for col in range(S):
+            posn = 0.0
+            for motif in range(M):
+                posn += input_likelihoods[col, motif] * mprobs[motif]
+            total += log(posn)*counts[col]
     return total
 
 def get_log_sum_across_sites(Double1D counts, Double1D input_likelihoods):
@@ -65,8 +121,9 @@ def get_log_sum_across_sites(Double1D counts, Double1D input_likelihoods):
     checkArray1D(input_likelihoods, &S)
     
     total = 0.0
-    for col in range(S):
-        total += log(input_likelihoods[col])*counts[col]
+    with nogil:
+        for col in range(S):
+            total += log(input_likelihoods[col])*counts[col]
     return total
 
 def log_dot_reduce(Long1D index, object patch_probs, Double2D switch_probs, Double2D plhs):
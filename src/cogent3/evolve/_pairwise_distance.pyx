@@ -1,3 +1,4 @@
+cimport cython
 cimport numpy as np
 
 __version__ = "('2020', '2', '7a')"
@@ -18,3 +19,41 @@ def _fill_diversity_matrix(np.ndarray[np.float64_t, ndim=2] matrix, np.ndarray[n
         matrix[seq1[i], seq2[i]] += 1.0
     
 
+# fills in a stack of diversity matrices, one per pair of sequences
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _fill_diversity_matrices(np.float64_t[:, :, ::1] matrices, np.int32_t[:, ::1] indexed_seqs, np.int64_t[::1] seqs1, np.int64_t[::1] seqs2):
+    """fills matrices[k] with the diversity matrix for the sequence pair
+    seqs1[k], seqs2[k] of indexed_seqs.
+    
+    Characters with an index that is negative, or not less than the matrix
+    dimension, are invalid. The GIL is released while filling."""
+    cdef Py_ssize_t k, i
+    cdef Py_ssize_t num_pairs = seqs1.shape[0]
+    cdef Py_ssize_t length = indexed_seqs.shape[1]
+    cdef np.int32_t dim = matrices.shape[1]
+    cdef np.int32_t a, b
+    cdef np.int32_t *first
+    cdef np.int32_t *second
+    
+    if seqs2.shape[0] != num_pairs or matrices.shape[0] < num_pairs:
+        raise ValueError("inconsistent number of sequence pairs")
+    if matrices.shape[2] != dim:
+        raise ValueError("matrices must be square")
+    for k in range(num_pairs):
+        if not (0 <= seqs1[k] < indexed_seqs.shape[0] and 0 <= seqs2[k] < indexed_seqs.shape[0]):
+            raise IndexError("sequence index out of range")
+    if length == 0:
+        return
+    
+    with nogil:
+        for k in range(num_pairs):
+            first = &indexed_seqs[seqs1[k], 0]
+            second = &indexed_seqs[seqs2[k], 0]
+            for i in range(length):
+                a = first[i]
+                b = second[i]
+                if a < 0 or b < 0 or a >= dim or b >= dim:
+                    continue
+                
+                matrices[k, a, b] += 1.0
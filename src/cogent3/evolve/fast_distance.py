@@ -1,9 +1,22 @@
+import multiprocessing
+
 from collections import defaultdict, namedtuple
 from numbers import Number
 
 import numpy
 
-from numpy import array, diag, dot, eye, float64, int32, log, sqrt, zeros
+from numpy import (
+    array,
+    diag,
+    dot,
+    eye,
+    float64,
+    int32,
+    int64,
+    log,
+    sqrt,
+    zeros,
+)
 from numpy.linalg import LinAlgError, det, inv, norm
 
 from cogent3 import DNA, RNA, get_moltype
@@ -268,12 +281,201 @@ def _logdet(matrix, use_tk_adjustment=True):
     return total, p, d_xy, var
 
 
+def _fill_diversity_matrices(matrices, indexed_seqs, seqs1, seqs2):
+    """fills matrices[k] with the diversity matrix for the sequence pair
+    seqs1[k], seqs2[k] of indexed_seqs.
+
+    Parameters
+    ----------
+    matrices : array
+        float64 array of shape (num pairs, dim, dim)
+    indexed_seqs : array
+        2D array of sequences converted to indices. Characters with an index
+        that is negative, or not less than dim, are invalid.
+    seqs1, seqs2 : array
+        indices into indexed_seqs of the first and second member of each pair
+    """
+    num_pairs = len(seqs1)
+    dim = matrices.shape[1]
+    # invalid characters are counted in an extra row / column that is dropped
+    size = (dim + 1) ** 2
+    dtype = int32 if num_pairs * size < 2 ** 31 else int64
+    first = indexed_seqs.take(seqs1, axis=0).astype(dtype)
+    second = indexed_seqs.take(seqs2, axis=0).astype(dtype)
+    first[(first < 0) | (first >= dim)] = dim
+    second[(second < 0) | (second >= dim)] = dim
+    first *= dim + 1
+    first += second
+    # each pair gets its own block of bins
+    first += (numpy.arange(num_pairs, dtype=dtype) * size)[:, None]
+    counts = numpy.bincount(first.ravel(), minlength=num_pairs * size)
+    matrices[:num_pairs] += counts.reshape(num_pairs, dim + 1, dim + 1)[:, :dim, :dim]
+
+
+def _hamming_from_matrices(matrices):
+    """vectorised version of _hamming, applied to a stack of matrices
+
+    Returns
+    -------
+    total, proportion of changes, hamming distance, variance (None) and a
+    boolean array indicating which pairs have valid values
+    """
+    total = matrices.sum(axis=(1, 2))
+    dist = total - numpy.trace(matrices, axis1=1, axis2=2)
+    valid = total != 0
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        p = dist / total
+
+    return total, p, dist, None, valid
+
+
+def _jc69_from_matrices(matrices):
+    """vectorised version of _jc69_from_matrix, applied to a stack of matrices"""
+    total = matrices.sum(axis=(1, 2))
+    diffs = total - numpy.trace(matrices, axis1=1, axis2=2)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        p = diffs / total
+        valid = (total != 0) & (p < 0.75)
+        factor = 1 - (4 / 3) * p
+        dist = -3.0 * log(factor) / 4
+        var = p * (1 - p) / (factor * factor * total)
+
+    return total, p, dist, var, valid
+
+
+def _tn93_from_matrices(
+    matrices, freqs, pur_indices, pyr_indices, pur_coords, pyr_coords, tv_coords
+):
+    """vectorised version of _tn93_from_matrix, applied to a stack of matrices"""
+    num = matrices.shape[0]
+    total = matrices.sum(axis=(1, 2))
+    flat = matrices.reshape(num, -1)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        freqs = matrices.sum(axis=1) + matrices.sum(axis=2)
+        freqs /= 2 * total[:, None]
+
+        p = flat.take(pur_coords + pyr_coords + tv_coords, axis=1).sum(axis=1)
+        p /= total
+
+        freq_purs = freqs.take(pur_indices, axis=1).sum(axis=1)
+        prod_purs = freqs.take(pur_indices, axis=1).prod(axis=1)
+        freq_pyrs = freqs.take(pyr_indices, axis=1).sum(axis=1)
+        prod_pyrs = freqs.take(pyr_indices, axis=1).prod(axis=1)
+
+        pur_ts_diffs = flat.take(pur_coords, axis=1).sum(axis=1) / total
+        pyr_ts_diffs = flat.take(pyr_coords, axis=1).sum(axis=1) / total
+        tv_diffs = flat.take(tv_coords, axis=1).sum(axis=1) / total
+
+        coeff1 = 2 * prod_purs / freq_purs
+        coeff2 = 2 * prod_pyrs / freq_pyrs
+        coeff3 = 2 * (
+            freq_purs * freq_pyrs
+            - (prod_purs * freq_pyrs / freq_purs)
+            - (prod_pyrs * freq_purs / freq_pyrs)
+        )
+
+        term1 = 1 - pur_ts_diffs / coeff1 - tv_diffs / (2 * freq_purs)
+        term2 = 1 - pyr_ts_diffs / coeff2 - tv_diffs / (2 * freq_pyrs)
+        term3 = 1 - tv_diffs / (2 * freq_purs * freq_pyrs)
+        # nan terms are not rejected, matching _tn93_from_matrix
+        valid = (total != 0) & ~(term1 <= 0) & ~(term2 <= 0) & ~(term3 <= 0)
+
+        dist = -coeff1 * log(term1) - coeff2 * log(term2) - coeff3 * log(term3)
+        v1 = 1 / term1
+        v2 = 1 / term2
+        v3 = 1 / term3
+        v4 = (
+            (coeff1 * v1 / (2 * freq_purs))
+            + (coeff2 * v2 / (2 * freq_pyrs))
+            + (coeff3 * v3 / (2 * freq_purs * freq_pyrs))
+        )
+        var = (
+            v1 ** 2 * pur_ts_diffs
+            + v2 ** 2 * pyr_ts_diffs
+            + v4 ** 2 * tv_diffs
+            - (v1 * pur_ts_diffs + v2 * pyr_ts_diffs + v4 * tv_diffs) ** 2
+        )
+        var /= total
+
+    return total, p, dist, var, valid
+
+
+def _logdetcommon_matrices(matrices):
+    """vectorised version of _logdetcommon, applied to a stack of matrices
+
+    Returns
+    -------
+    total, p, frequency, freqs, var_term, valid. The frequency related values
+    are only defined where valid is True.
+    """
+    num, dim = matrices.shape[:2]
+    total = matrices.sum(axis=(1, 2))
+    diffs = total - numpy.trace(matrices, axis1=1, axis2=2)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        p = diffs / total
+
+    valid = (total != 0) & (diffs != 0)
+
+    # we replace the missing diagonal states with a frequency of 0.5,
+    # then normalise
+    frequency = matrices.copy()
+    diagonal = frequency[:, numpy.arange(dim), numpy.arange(dim)]
+    diagonal[diagonal == 0] = 0.5
+    frequency[:, numpy.arange(dim), numpy.arange(dim)] = diagonal
+    frequency /= frequency.sum(axis=(1, 2))[:, None, None]
+
+    dets = det(frequency)
+    valid &= dets > 0
+
+    var_term = numpy.zeros(num, dtype=float64)
+    if valid.any():
+        # the inverse matrix of frequency, every element is squared
+        M_matrix = inv(frequency[valid]) ** 2
+        var_term[valid] = numpy.einsum("kij,kji->k", M_matrix, frequency[valid])
+
+    freqs = [frequency.sum(axis=axis) for axis in (1, 2)]
+    return total, p, frequency, dets, freqs, var_term, valid
+
+
+def _paralinear_from_matrices(matrices):
+    """vectorised version of _paralinear, applied to a stack of matrices"""
+    total, p, _, dets, freqs, var_term, valid = _logdetcommon_matrices(matrices)
+    r = matrices.shape[1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        d_xy = -log(dets / sqrt((freqs[0] * freqs[1]).prod(axis=1))) / r
+        var = (var_term - (1 / sqrt(freqs[0] * freqs[1])).sum(axis=1)) / (
+            r ** 2 * total
+        )
+
+    return total, p, d_xy, var, valid
+
+
+def _logdet_from_matrices(matrices, use_tk_adjustment=True):
+    """vectorised version of _logdet, applied to a stack of matrices"""
+    total, p, _, dets, freqs, var_term, valid = _logdetcommon_matrices(matrices)
+    r = matrices.shape[1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        if use_tk_adjustment:
+            coeff = (((freqs[0] + freqs[1]) ** 2).sum(axis=1) / 4 - 1) / (r - 1)
+            d_xy = coeff * log(dets / sqrt((freqs[0] * freqs[1]).prod(axis=1)))
+            var = None
+        else:
+            d_xy = -log(dets) / r - log(r)
+            var = (var_term / r ** 2 - 1) / total
+
+    return total, p, d_xy, var, valid
+
+
 try:
     from ._pairwise_distance import _fill_diversity_matrix as fill_diversity_matrix
+    from ._pairwise_distance import (
+        _fill_diversity_matrices as fill_diversity_matrices,
+    )
 
     # raise ImportError # for testing
 except ImportError:
     fill_diversity_matrix = _fill_diversity_matrix
+    fill_diversity_matrices = _fill_diversity_matrices
 
 
 def _number_formatter(template):
@@ -289,9 +491,72 @@ def _number_formatter(template):
     return call
 
 
+def _as_list(values, num):
+    """returns values as a list of length num, None becomes a list of None"""
+    if values is None:
+        return [None] * num
+    if isinstance(values, numpy.ndarray):
+        return values.tolist()
+    return list(values)
+
+
 Stats = namedtuple("Stats", ["length", "fraction_variable", "dist", "variance"])
 
 
+class _PairBlockStats:
+    """computes the statistics for a block of sequence pairs
+
+    Instances are picklable so they can be sent to worker processes.
+    """
+
+    def __init__(self, indexed_seqs, dim, func, block_func, func_args):
+        """
+        Parameters
+        ----------
+        indexed_seqs : array
+            2D int32 array of sequences converted to indices, invalid
+            characters are negative numbers
+        dim : int
+            number of valid states
+        func
+            applied to each diversity matrix if block_func is None
+        block_func
+            vectorised version of func, applied to a stack of matrices
+        func_args
+            additional arguments for func / block_func
+        """
+        self.indexed_seqs = indexed_seqs
+        self.dim = dim
+        self.func = func
+        self.block_func = block_func
+        self.func_args = func_args
+        self._off_diag = ~eye(dim, dtype=bool)
+
+    def __call__(self, pairs):
+        """
+        Parameters
+        ----------
+        pairs
+            tuple of arrays with the first and second sequence indices
+
+        Returns
+        -------
+        seqs1, seqs2, identical, total, p, dist, var, valid as lists
+        """
+        seqs1, seqs2 = [numpy.ascontiguousarray(s, dtype=int64) for s in pairs]
+        matrices = zeros((len(seqs1), self.dim, self.dim), float64)
+        fill_diversity_matrices(matrices, self.indexed_seqs, seqs1, seqs2)
+        identical = ~(matrices[:, self._off_diag] > 0).any(axis=1)
+        if self.block_func is not None:
+            stats = self.block_func(matrices, *self.func_args)
+        else:
+            stats = [self.func(matrix, *self.func_args) for matrix in matrices]
+            stats = list(map(list, zip(*stats))) + [[True] * len(stats)]
+
+        result = [seqs1, seqs2, identical] + list(stats)
+        return [_as_list(v, len(seqs1)) for v in result]
+
+
 def _make_stat_table(stats, names, **kwargs):
     from cogent3.util.table import Table
 
@@ -337,6 +602,7 @@ class _PairwiseDistance(object):
         self._dupes = None
         self._duped = None
         self._invalid_raises = invalid_raises
+        self._invalid = invalid
 
         self.names = None
         self.indexed_seqs = None
@@ -345,6 +611,8 @@ class _PairwiseDistance(object):
             self._convert_seqs_to_indices(alignment)
 
         self._func_args = []
+        # vectorised equivalent of func, applied to a stack of matrices
+        self._block_func = None
 
     def _convert_seqs_to_indices(self, alignment):
         assert isinstance(
@@ -353,6 +621,19 @@ class _PairwiseDistance(object):
 
         self._dists = {}
         self.names = alignment.names[:]
+        canonical = list(self.moltype)
+        array_seqs = getattr(alignment, "array_seqs", None)
+        if (
+            array_seqs is not None
+            and list(alignment.alphabet)[: self._dim] == canonical
+        ):
+            # ArrayAlignment encodes canonical states first, so we can
+            # convert the whole alignment in one operation
+            indexed_seqs = array_seqs.astype(int32)
+            indexed_seqs[indexed_seqs >= self._dim] = self._invalid
+            self.indexed_seqs = indexed_seqs
+            return
+
         indexed_seqs = []
         for name in self.names:
             seq = alignment.get_gapped_seq(name)
@@ -371,9 +652,40 @@ class _PairwiseDistance(object):
     def func():
         pass  # over ride in subclasses
 
+    def _block_size(self, max_block_bytes):
+        """number of sequence pairs processed together"""
+        length = self.indexed_seqs.shape[1]
+        # the two selected sequences as codes, plus the bincount and float
+        # diversity matrices
+        per_pair = length * (8 + 8) + 16 * (self._dim + 1) ** 2
+        return max(1, max_block_bytes // per_pair)
+
     @display_wrap
-    def run(self, alignment=None, ui=None):
-        """computes the pairwise distances"""
+    def run(
+        self,
+        alignment=None,
+        max_block_bytes=2 ** 27,
+        parallel=False,
+        par_kw=None,
+        ui=None,
+    ):
+        """computes the pairwise distances
+
+        Parameters
+        ----------
+        alignment
+            the alignment, if None uses the previously provided alignment
+        max_block_bytes : int
+            approximate upper bound on the memory used for the diversity
+            matrices of a single block of sequence pairs. Pairs are processed
+            in blocks ordered by row, so large alignments are streamed.
+        parallel : bool
+            blocks of sequence pairs are distributed across processes
+            according to par_kw
+        par_kw
+            dict of values for configuring parallel execution, see
+            cogent3.util.parallel.imap
+        """
         self._dupes = None
         self._duped = None
 
@@ -384,41 +696,57 @@ class _PairwiseDistance(object):
             self._convert_seqs_to_indices(alignment)
 
         names = self.names[:]
-        matrix = zeros((self._dim, self._dim), float64)
-        off_diag = [
-            (i, j) for i in range(self._dim) for j in range(self._dim) if i != j
+        num_seqs = len(names)
+        indexed_seqs = numpy.ascontiguousarray(self.indexed_seqs, dtype=int32)
+        block_stats = _PairBlockStats(
+            indexed_seqs, self._dim, self.func, self._block_func, self._func_args
+        )
+
+        upper = numpy.triu_indices(num_seqs, k=1)
+        to_do = len(upper[0])
+        block_size = self._block_size(max_block_bytes)
+        if parallel:
+            par_kw = dict(par_kw or {})
+            # balanced tiles, each a run of the upper triangle in row order
+            if par_kw.get("pool"):
+                num_workers = par_kw["pool"].max_workers
+            else:
+                num_workers = par_kw.get("max_workers") or multiprocessing.cpu_count()
+            block_size = max(1, min(block_size, -(-to_do // (4 * num_workers))))
+            par_kw["chunksize"] = par_kw.get("chunksize") or 1
+
+        blocks = [
+            (upper[0][start : start + block_size], upper[1][start : start + block_size])
+            for start in range(0, to_do, block_size)
         ]
-        off_diag = tuple([tuple(a) for a in zip(*off_diag)])
 
-        done = 0.0
-        to_do = (len(names) * len(names) - 1) / 2
-        for i in range(len(names) - 1):
-            if i in dupes:
-                continue
+        if parallel:
+            # workers cannot skip known duplicates, these are resolved here
+            results = ui.imap(block_stats, blocks, parallel=True, par_kw=par_kw)
+        else:
+            results = self._serial_blocks(block_stats, blocks, dupes, ui)
 
-            name_1 = names[i]
-            s1 = self.indexed_seqs[i]
-            for j in range(i + 1, len(names)):
-                if j in dupes:
+        for seqs1, seqs2, identical, total, p, dist, var, valid in results:
+            for k, (i, j) in enumerate(zip(seqs1, seqs2)):
+                if i in dupes or j in dupes:
                     continue
 
-                name_2 = names[j]
-                ui.display("%s vs %s" % (name_1, name_2), done / to_do)
-                done += 1
-                matrix.fill(0)
-                s2 = self.indexed_seqs[j]
-                fill_diversity_matrix(matrix, s1, s2)
-                if not (matrix[off_diag] > 0).any():
+                if identical[k]:
                     # j is a duplicate of i
-                    dupes.update([j])
+                    dupes.add(j)
                     duped[i].append(j)
                     continue
 
-                total, p, dist, var = self.func(matrix, *self._func_args)
-                if self._invalid_raises and not isinstance(dist, Number):
+                name_1, name_2 = names[i], names[j]
+                if valid[k]:
+                    result = Stats(total[k], p[k], dist[k], var[k])
+                else:
+                    result = Stats(None, None, None, None)
+
+                if self._invalid_raises and not isinstance(result.dist, Number):
                     msg = f"distance could not be calculated for {name_1} - {name_2}"
                     raise ArithmeticError(msg)
-                result = Stats(total, p, dist, var)
+
                 self._dists[(name_1, name_2)] = result
                 self._dists[(name_2, name_1)] = result
 
@@ -437,6 +765,18 @@ class _PairwiseDistance(object):
                 if set(key) & remove:
                     del self._dists[key]
 
+    def _serial_blocks(self, block_stats, blocks, dupes, ui):
+        """yields block_stats results, skipping pairs with known duplicates"""
+        is_dupe = numpy.zeros(len(self.names), dtype=bool)
+        for num, (seqs1, seqs2) in enumerate(blocks):
+            ui.display(f"{self.names[seqs1[0]]} vs ...", num / len(blocks))
+            is_dupe[list(dupes)] = True
+            keep = ~(is_dupe.take(seqs1) | is_dupe.take(seqs2))
+            if not keep.any():
+                continue
+
+            yield block_stats((seqs1[keep], seqs2[keep]))
+
     __call__ = run
 
     def get_pairwise_distances(self, include_duplicates=True):
@@ -546,6 +886,7 @@ class HammingPair(_PairwiseDistance):
         """states: the valid sequence states"""
         super(HammingPair, self).__init__(moltype, *args, **kwargs)
         self.func = _hamming
+        self._block_func = _hamming_from_matrices
 
 
 class PercentIdentityPair(_PairwiseDistance):
@@ -557,6 +898,7 @@ class PercentIdentityPair(_PairwiseDistance):
         """states: the valid sequence states"""
         super(PercentIdentityPair, self).__init__(moltype, *args, **kwargs)
         self.func = _hamming
+        self._block_func = _hamming_from_matrices
 
     def get_pairwise_distances(self, include_duplicates=True):
         """returns a matrix of pairwise distances.
@@ -598,6 +940,7 @@ class JC69Pair(_NucleicSeqPair):
         """states: the valid sequence states"""
         super(JC69Pair, self).__init__(moltype, *args, **kwargs)
         self.func = _jc69_from_matrix
+        self._block_func = _jc69_from_matrices
 
 
 class TN93Pair(_NucleicSeqPair):
@@ -624,6 +967,7 @@ class TN93Pair(_NucleicSeqPair):
         self.tv_coords = [i * 4 + j for i, j in self.tv_coords]
 
         self.func = _tn93_from_matrix
+        self._block_func = _tn93_from_matrices
         self._func_args = [
             self._freqs,
             self.pur_indices,
@@ -646,6 +990,7 @@ class LogDetPair(_PairwiseDistance):
         """
         super(LogDetPair, self).__init__(moltype, *args, **kwargs)
         self.func = _logdet
+        self._block_func = _logdet_from_matrices
         self._func_args = [use_tk_adjustment]
 
     def run(self, use_tk_adjustment=None, *args, **kwargs):
@@ -663,6 +1008,7 @@ class ParalinearPair(_PairwiseDistance):
     def __init__(self, moltype="dna", *args, **kwargs):
         super(ParalinearPair, self).__init__(moltype, *args, **kwargs)
         self.func = _paralinear
+        self._block_func = _paralinear_from_matrices
 
 
 _calculators = {
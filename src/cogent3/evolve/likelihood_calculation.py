@@ -10,7 +10,12 @@ in addition to binary trees.
 """
 import numpy
 
-from cogent3.evolve.likelihood_tree import LikelihoodTreeEdge
+from cogent3.evolve.likelihood_tree import (
+    LikelihoodTreeEdge,
+    ScaledLikelihoods,
+    SiteBlocks,
+    concatenated_leaf,
+)
 from cogent3.evolve.simulate import argpick
 from cogent3.maths.markov import SiteClassTransitionMatrix
 from cogent3.recalculation.definition import (
@@ -59,6 +64,12 @@ class PartialLikelihoodProductDefn(_PartialLikelihoodDefn):
             recycled_result = lh_edge.make_partial_likelihoods_array()
         return lh_edge.sum_input_likelihoodsR(recycled_result, *child_likelihoods)
 
+    def grad(self, g, recycled_result, lh_edge, *child_likelihoods):
+        grads = lh_edge.sum_input_likelihoods_grad(
+            g, *child_likelihoods, result=recycled_result
+        )
+        return [None, None] + grads
+
 
 class PartialLikelihoodProductDefnFixedMotif(PartialLikelihoodProductDefn):
     def calc(self, recycled_result, fixed_motif, lh_edge, *child_likelihoods):
@@ -66,11 +77,22 @@ class PartialLikelihoodProductDefnFixedMotif(PartialLikelihoodProductDefn):
             recycled_result = lh_edge.make_partial_likelihoods_array()
         result = lh_edge.sum_input_likelihoodsR(recycled_result, *child_likelihoods)
         if fixed_motif not in [None, -1]:
-            for motif in range(result.shape[-1]):
+            values = getattr(result, "likelihoods", result)
+            for motif in range(values.shape[-1]):
                 if motif != fixed_motif:
-                    result[:, motif] = 0.0
+                    values[:, motif] = 0.0
         return result
 
+    def grad(self, g, recycled_result, fixed_motif, lh_edge, *child_likelihoods):
+        if fixed_motif not in [None, -1]:
+            mask = numpy.zeros(g.shape[-1])
+            mask[fixed_motif] = 1.0
+            g = g * mask
+        grads = lh_edge.sum_input_likelihoods_grad(
+            g, *child_likelihoods, result=recycled_result
+        )
+        return [None, None, None] + grads
+
 
 class LhtEdgeLookupDefn(CalculationDefn):
     name = "col_index"
@@ -78,7 +100,10 @@ class LhtEdgeLookupDefn(CalculationDefn):
     def setup(self, edge_name):
         self.edge_name = edge_name
         # so that it can be found by reconstruct_ancestral_seqs etc:
-        if edge_name == "root":
+        # (the root of patterns pooled across loci is no one locus's root)
+        if edge_name == "root" and not isinstance(
+            self.args[0], PooledLikelihoodTreeDefn
+        ):
             self.name = "root"
 
     def calc(self, lht):
@@ -96,7 +121,9 @@ def make_partial_likelihood_defns(edge, lht, psubs, fixed_motifs):
         for child in edge.children:
             child_plh = make_partial_likelihood_defns(child, lht, psubs, fixed_motifs)
             psub = psubs.select_from_dimension("edge", child.name)
-            child_plh = CalcDefn(numpy.inner)(child_plh, psub)
+            child_plh = CalcDefn(edge_inner, name="inner", grad=_edge_inner_grad)(
+                lht_edge, child_plh, psub
+            )
             children.append(child_plh)
 
         if fixed_motifs:
@@ -110,36 +137,100 @@ def make_partial_likelihood_defns(edge, lht, psubs, fixed_motifs):
     return plh
 
 
-def recursive_lht_build(edge, leaves):
+def recursive_lht_build(edge, leaves, site_blocks=None, precision="double"):
     if edge.istip():
         lhe = leaves[edge.name]
     else:
         lht_children = []
         for child in edge.children:
-            lht = recursive_lht_build(child, leaves)
+            lht = recursive_lht_build(child, leaves, site_blocks, precision)
             lht_children.append(lht)
-        lhe = LikelihoodTreeEdge(lht_children, edge_name=edge.name)
+        lhe = LikelihoodTreeEdge(
+            lht_children,
+            edge_name=edge.name,
+            site_blocks=site_blocks,
+            precision=precision,
+        )
     return lhe
 
 
 class LikelihoodTreeDefn(CalculationDefn):
     name = "lht"
 
-    def setup(self, tree):
+    def setup(self, tree, threads=None, precision="double"):
         self.tree = tree
+        # blocks of site patterns calculated in parallel
+        self.site_blocks = SiteBlocks(threads) if threads and threads > 1 else None
+        self.precision = precision
 
     def calc(self, leaves):
-        return recursive_lht_build(self.tree, leaves)
+        return recursive_lht_build(self.tree, leaves, self.site_blocks, self.precision)
+
+
+class PooledLikelihoodTreeDefn(LikelihoodTreeDefn):
+    """A likelihood tree of the site patterns of all loci together, so that
+    patterns shared by loci are calculated once"""
+
+    name = "pooled_lht"
+
+    def calc(self, *loci):
+        leaves = {
+            name: concatenated_leaf([locus[name] for locus in loci]) for name in loci[0]
+        }
+        root = recursive_lht_build(self.tree, leaves, self.site_blocks, self.precision)
+        # the columns of each locus, which is identified by its leaves
+        root.pooled_loci = []
+        start = 0
+        for locus in loci:
+            end = start + len(next(iter(locus.values())))
+            root.pooled_loci.append((locus, start, end))
+            start = end
+        return root
+
+
+def locus_lht(pooled, leaves):
+    # the part of a pooled likelihood tree for the locus with these leaves
+    for (locus, start, end) in pooled.pooled_loci:
+        if locus is leaves:
+            return pooled.locus_view(start, end)
+    raise ValueError("leaves are not those of a pooled locus")
 
 
 def make_total_loglikelihood_defn(
-    tree, leaves, psubs, mprobs, bprobs, bin_names, locus_names, sites_independent
+    tree,
+    leaves,
+    psubs,
+    mprobs,
+    bprobs,
+    bin_names,
+    locus_names,
+    sites_independent,
+    threads=None,
+    precision="double",
+    pool_loci=False,
 ):
+    if precision not in ("double", "single"):
+        raise ValueError("precision must be 'double' or 'single'")
+    if precision == "single" and len(bin_names) > 1:
+        raise ValueError("single precision is not supported with bins")
 
     fixed_motifs = NonParamDefn("fixed_motif", ["edge"])
 
-    lht = LikelihoodTreeDefn(leaves, tree=tree)
-    plh = make_partial_likelihood_defns(tree, lht, psubs, fixed_motifs)
+    if pool_loci and len(locus_names) > 1:
+        # The partial likelihoods are of the site patterns of all loci, each
+        # locus having its own counts of them for summing across sites.
+        patterns = PooledLikelihoodTreeDefn(
+            *leaves.across_dimension("locus", locus_names),
+            tree=tree,
+            threads=threads,
+            precision=precision,
+        )
+        lht = CalcDefn(locus_lht, name="lht")(patterns, leaves)
+    else:
+        lht = patterns = LikelihoodTreeDefn(
+            leaves, tree=tree, threads=threads, precision=precision
+        )
+    plh = make_partial_likelihood_defns(tree, patterns, psubs, fixed_motifs)
 
     # After the root partial likelihoods have been calculated it remains to
     # sum over the motifs, local sites, other sites (ie: cpus), bins and loci.
@@ -149,7 +240,9 @@ def make_total_loglikelihood_defn(
     # minimise inter-CPU communicaton.
 
     root_mprobs = mprobs.select_from_dimension("edge", "root")
-    lh = CalcDefn(numpy.inner, name="lh")(plh, root_mprobs)
+    lh = CalcDefn(edge_inner, name="lh", grad=_edge_inner_grad)(
+        patterns, plh, root_mprobs
+    )
     if len(bin_names) > 1:
         if sites_independent:
             site_pattern = CalcDefn(BinnedSiteDistribution, name="bdist")(bprobs)
@@ -160,7 +253,7 @@ def make_total_loglikelihood_defn(
         tll = CallDefn(blh, *lh.across_dimension("bin", bin_names), **dict(name="tll"))
     else:
         lh = lh.select_from_dimension("bin", bin_names[0])
-        tll = CalcDefn(log_sum_across_sites, name="logsum")(lht, lh)
+        tll = CalcDefn(log_sum_across_sites, name="logsum", grad=_log_sum_grad)(lht, lh)
 
     if len(locus_names) > 1:
         # currently has no .make_likelihood_function() method.
@@ -171,10 +264,37 @@ def make_total_loglikelihood_defn(
     return tll
 
 
+def _inner_grad(g, a, b):
+    # gradients for numpy.inner(a, b), a being [site, motif] partial
+    # likelihoods and b a psub matrix or motif probs
+    if b.ndim == 1:
+        return [numpy.outer(g, b), numpy.dot(g, a)]
+    return [numpy.dot(g, b), numpy.dot(g.T, a)]
+
+
+def edge_inner(lh_edge, likelihoods, matrix):
+    return lh_edge.inner(likelihoods, matrix)
+
+
+def _edge_inner_grad(g, lh_edge, likelihoods, matrix):
+    # single precision gradients are with respect to the stored likelihoods,
+    # as each site keeps its exponent
+    likelihoods = getattr(likelihoods, "likelihoods", likelihoods)
+    return [None] + _inner_grad(g, likelihoods, matrix)
+
+
 def log_sum_across_sites(root, root_lh):
     return root.get_log_sum_across_sites(root_lh)
 
 
+def _log_sum_grad(g, root, root_lh):
+    if isinstance(root_lh, ScaledLikelihoods):
+        # log(likelihoods * 2**exponents) differs from log(likelihoods) by a
+        # constant, so the stored likelihoods are differentiated in double
+        root_lh = root_lh.likelihoods.astype(float)
+    return [None, g * root.counts / root_lh]
+
+
 class BinnedSiteDistribution(object):
     def __init__(self, bprobs):
         self.bprobs = bprobs
@@ -244,6 +364,12 @@ class BinnedLikelihood(object):
         result = self.distrib.get_weighted_sum_lh(lhs)
         return self.root.get_log_sum_across_sites(result)
 
+    def grad(self, g, *lhs):
+        # the bin probabilities are not differentiated
+        result = self.distrib.get_weighted_sum_lh(lhs)
+        g = g * self.root.counts / result
+        return [None] + [g * bprob for bprob in self.distrib.bprobs]
+
     def get_posterior_probs(self, *lhs):
         # posterior bin probs, not motif probs
         assert len(lhs) == len(self.distrib.bprobs)
@@ -389,13 +389,13 @@ class LikelihoodFunction(ParameterController):
     def get_full_length_likelihoods(self, locus=None):
         """Array of [site, motif] likelihoods from the root of the tree"""
         root_lh = self._getLikelihoodValuesSummedAcrossAnyBins(locus=locus)
-        root_lht = self.get_param_value("root", locus=locus)
+        root_lht = self.get_param_value("lht", locus=locus)
         return root_lht.get_full_length_likelihoods(root_lh)
 
     def get_G_statistic(self, return_table=False, locus=None):
         """Goodness-of-fit statistic derived from the unambiguous columns"""
         root_lh = self._getLikelihoodValuesSummedAcrossAnyBins(locus=locus)
-        root_lht = self.get_param_value("root", locus=locus)
+        root_lht = self.get_param_value("lht", locus=locus)
         return root_lht.calc_G_statistic(root_lh, return_table)
 
     def reconstruct_ancestral_seqs(self, locus=None):
@@ -408,40 +408,34 @@ class LikelihoodFunction(ParameterController):
             a named locus
 
         """
+        lht = self.get_param_value("lht", locus=locus)
+        if self.bin_names and len(self.bin_names) > 1:
+            bin_names = self.bin_names
+            bprobs = self.get_param_value("bprobs")
+        else:
+            bin_names = [None]
+            bprobs = [1.0]
+
+        edge_names = [e.name for e in self._tree.get_edge_vector() if not e.isroot()]
         result = {}
-        array_template = None
-        for restricted_edge in self._tree.get_edge_vector():
-            if restricted_edge.istip():
-                continue
-            try:
-                r = []
-                for motif in range(len(self._motifs)):
-                    self.set_param_rule(
-                        "fixed_motif",
-                        value=motif,
-                        edge=restricted_edge.name,
-                        locus=locus,
-                        is_constant=True,
-                    )
-                    likelihoods = self.get_full_length_likelihoods(locus=locus)
-                    r.append(likelihoods)
-                    if array_template is None:
-                        array_template = DictArrayTemplate(
-                            likelihoods.shape[0], self._motifs
-                        )
-            finally:
-                self.set_param_rule(
-                    "fixed_motif",
-                    value=-1,
-                    edge=restricted_edge.name,
-                    locus=locus,
-                    is_constant=True,
-                )
-            # dict of site x motif arrays
-            result[restricted_edge.name] = array_template.wrap(
-                numpy.transpose(numpy.asarray(r))
-            )
-        return result
+        for (bin, bprob) in zip(bin_names, bprobs):
+            kw = dict(locus=locus) if bin is None else dict(locus=locus, bin=bin)
+            psubs = {
+                name: self.get_psub_for_edge(name, **kw).array for name in edge_names
+            }
+            mprobs = self.get_param_value("mprobs", edge="root", **kw)
+            mprobs = self._model.calc_word_probs(mprobs)
+            # dict of site x motif arrays, summed across bins
+            lhs = lht.get_ancestral_likelihoods(psubs, mprobs)
+            for (name, lh) in lhs.items():
+                result[name] = result.get(name, 0) + bprob * lh
+
+        array_template = DictArrayTemplate(len(lht.index), self._motifs)
+        return {
+            edge.name: array_template.wrap(result[edge.name])
+            for edge in self._tree.get_edge_vector()
+            if not edge.istip()
+        }
 
     def likely_ancestral_seqs(self, locus=None):
         """Returns the most likely reconstructed ancestral sequences as an
@@ -3,6 +3,11 @@
 Each leaf holds a sequence.  Used by a likelihood function."""
 
 
+import copy
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy
 
 from cogent3.util.modules import ExpectedImportError, importVersionedModule
@@ -30,10 +35,98 @@ except ImportError:
     pyrex = None
 
 
+# threads shared by all SiteBlocks, with as many as the most requested
+_executor = None
+_executor_threads = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(threads):
+    global _executor, _executor_threads
+    with _executor_lock:
+        if threads > _executor_threads:
+            # the threads of a replaced executor exit once it is no longer used
+            _executor = ThreadPoolExecutor(max_workers=threads)
+            _executor_threads = threads
+        return _executor
+
+
+class SiteBlocks(object):
+    """Calculations over contiguous blocks of unique site patterns, run
+    in a pool of threads. The compiled kernels release the GIL."""
+
+    # smaller blocks aren't worth the overhead of a thread
+    min_block_size = 1000
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def __repr__(self):
+        return "%s(threads=%s)" % (self.__class__.__name__, self.threads)
+
+    def blocks(self, num_rows):
+        """(start, end) of each block of num_rows rows"""
+        num_blocks = min(self.threads, max(num_rows // self.min_block_size, 1))
+        bounds = numpy.linspace(0, num_rows, num_blocks + 1).astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def map(self, func, num_rows):
+        """returns [func(start, end)] for each block of num_rows rows"""
+        blocks = self.blocks(num_rows)
+        if len(blocks) == 1:
+            return [func(*blocks[0])]
+        executor = _get_executor(self.threads)
+        return list(executor.map(lambda block: func(*block), blocks))
+
+
+class ScaledLikelihoods(object):
+    """Single precision likelihoods, [site, motif] or [site], the true values
+    of each site being those stored multiplied by 2**exponents[site]"""
+
+    __slots__ = ["likelihoods", "exponents"]
+
+    def __init__(self, likelihoods, exponents):
+        self.likelihoods = likelihoods
+        self.exponents = exponents
+
+    def __len__(self):
+        return len(self.likelihoods)
+
+    def __getitem__(self, index):
+        return self.__class__(self.likelihoods[index], self.exponents[index])
+
+    @property
+    def nbytes(self):
+        return self.likelihoods.nbytes + self.exponents.nbytes
+
+    def unscaled(self):
+        """the double precision values, which may underflow to zero"""
+        exponents = self.exponents.reshape(
+            self.exponents.shape + (1,) * (self.likelihoods.ndim - 1)
+        )
+        return numpy.ldexp(self.likelihoods.astype(float), exponents)
+
+
+def _unscaled(likelihoods):
+    if isinstance(likelihoods, ScaledLikelihoods):
+        likelihoods = likelihoods.unscaled()
+    return likelihoods
+
+
 class _LikelihoodTreeEdge(object):
-    def __init__(self, children, edge_name, alignment=None):
+    def __init__(
+        self,
+        children,
+        edge_name,
+        alignment=None,
+        site_blocks=None,
+        precision="double",
+    ):
         self.edge_name = edge_name
         self.alphabet = children[0].alphabet
+        self.site_blocks = site_blocks
+        assert precision in ("double", "single"), precision
+        self.precision = precision
 
         M = children[0].shape[-1]
         for child in children:
@@ -104,21 +197,94 @@ class _LikelihoodTreeEdge(object):
         mask[fixed_motif] = 1.0
         input_likelihoods *= mask
 
+    def get_ancestral_likelihoods(self, psubs, mprobs):
+        """returns {edge name: [site, motif] array} of the likelihood of
+        the data jointly with each motif at every internal node, this one
+        included, using a pruning pass followed by a single outside pass.
+
+        Parameters
+        ----------
+        psubs : dict
+            substitution probability matrices keyed by edge name
+        mprobs
+            motif probabilities at this edge
+        """
+        partials = {}
+        self._prune(psubs, partials)
+        num_uniq = len(self.uniq)
+        outside = numpy.tile(numpy.asarray(mprobs, self.float_type), (num_uniq, 1))
+        result = {}
+        self._outside(outside, numpy.arange(num_uniq), psubs, partials, result)
+        return {
+            name: self.get_full_length_likelihoods(lh) for (name, lh) in result.items()
+        }
+
+    def _prune(self, psubs, partials):
+        # partial likelihoods of each internal edge, with the contributions
+        # of each child to them, for get_ancestral_likelihoods
+        contributions = []
+        for (index, child) in self._indexed_children:
+            if isinstance(child, _LikelihoodTreeEdge):
+                plh = child._prune(psubs, partials)
+            else:
+                plh = child.input_likelihoods
+            contributions.append(numpy.inner(plh, psubs[child.edge_name]))
+        plh = self.sum_input_likelihoods(*contributions)
+        partials[self.edge_name] = (plh, contributions)
+        return plh
+
+    def _outside(self, outside, index, psubs, partials, result):
+        # outside is the likelihood of the data not below this edge jointly
+        # with each motif at this edge, index maps root columns to ours
+        (plh, contributions) = partials[self.edge_name]
+        result[self.edge_name] = outside * plh[index]
+        contributions = [
+            contrib[child_index[index]]
+            for ((child_index, child), contrib) in zip(
+                self._indexed_children, contributions
+            )
+        ]
+        for (i, (child_index, child)) in enumerate(self._indexed_children):
+            if not isinstance(child, _LikelihoodTreeEdge):
+                continue
+            siblings = outside.copy()
+            for (j, contrib) in enumerate(contributions):
+                if j != i:
+                    siblings *= contrib
+            child_outside = numpy.dot(siblings, psubs[child.edge_name])
+            child._outside(child_outside, child_index[index], psubs, partials, result)
+
     def select_columns(self, cols):
         children = []
         for (index, child) in self._indexed_children:
             child = child.select_columns(cols)
             children.append(child)
-        return self.__class__(children, self.edge_name)
+        return self.__class__(
+            children,
+            self.edge_name,
+            site_blocks=self.site_blocks,
+            precision=self.precision,
+        )
 
     def get_full_length_likelihoods(self, likelihoods):
-        return likelihoods[self.index]
+        return _unscaled(likelihoods)[self.index]
+
+    def locus_view(self, start, end):
+        """a copy of this edge for columns start:end of its alignment, which
+        shares its site patterns but counts only those in these columns"""
+        view = copy.copy(self)
+        view.index = self.index[start:end]
+        counts = numpy.bincount(view.index, minlength=len(self.uniq))
+        view.counts = counts.astype(self.float_type)
+        return view
 
     def calc_G_statistic(self, likelihoods, return_table=False):
         # A Goodness-of-fit statistic
         from cogent3.util.table import Table
 
-        unambig = (self.ambig == 1.0).nonzero()[0]
+        likelihoods = _unscaled(likelihoods)
+        # patterns of a pooled tree can be absent from a locus
+        unambig = ((self.ambig == 1.0) & (self.counts > 0)).nonzero()[0]
         observed = self.counts[unambig].astype(int)
         expected = likelihoods[unambig] * observed.sum()
         # chisq = ((observed-expected)**2 / expected).sum()
@@ -146,6 +312,11 @@ class _LikelihoodTreeEdge(object):
         return None
 
     def make_partial_likelihoods_array(self):
+        if self.precision == "single":
+            return ScaledLikelihoods(
+                numpy.ones(self.shape, SINGLE_FLOAT_TYPE),
+                numpy.zeros(self.shape[:1], self.integer_type),
+            )
         return numpy.ones(self.shape, self.float_type)
 
     def sum_input_likelihoods(self, *likelihoods):
@@ -153,6 +324,112 @@ class _LikelihoodTreeEdge(object):
         self.sum_input_likelihoodsR(result, *likelihoods)
         return result
 
+    def sum_input_likelihoodsR(self, result, *likelihoods):
+        if isinstance(result, ScaledLikelihoods):
+            sum_input_likelihoods = self._sum_input_likelihoods_scaled
+        else:
+            sum_input_likelihoods = self._sum_input_likelihoods
+
+        if self.site_blocks is None:
+            sum_input_likelihoods(self.indexes, result, likelihoods)
+            return result
+
+        def calc(start, end):
+            indexes = [index[start:end] for index in self.indexes]
+            sum_input_likelihoods(indexes, result[start:end], likelihoods)
+
+        self.site_blocks.map(calc, len(result))
+        return result
+
+    def inner(self, likelihoods, matrix):
+        """numpy.inner of likelihoods, a [site, motif] array of this edge or
+        one of its children, with a psub matrix or motif probs"""
+        if self.precision == "single" or isinstance(likelihoods, ScaledLikelihoods):
+            if not isinstance(likelihoods, ScaledLikelihoods):
+                # a leaf, which needs no scaling
+                likelihoods = ScaledLikelihoods(
+                    numpy.asarray(likelihoods, SINGLE_FLOAT_TYPE),
+                    numpy.zeros(len(likelihoods), self.integer_type),
+                )
+            matrix = numpy.asarray(matrix, SINGLE_FLOAT_TYPE)
+            values = self._inner(likelihoods.likelihoods, matrix)
+            return ScaledLikelihoods(values, likelihoods.exponents)
+        return self._inner(likelihoods, matrix)
+
+    def _inner(self, likelihoods, matrix):
+        if self.site_blocks is None:
+            return numpy.inner(likelihoods, matrix)
+
+        dtype = numpy.result_type(likelihoods, matrix)
+        result = numpy.empty(likelihoods.shape[:1] + matrix.shape[:-1], dtype)
+
+        def calc(start, end):
+            numpy.dot(likelihoods[start:end], matrix.T, out=result[start:end])
+
+        self.site_blocks.map(calc, len(result))
+        return result
+
+    # For root
+
+    def get_total_log_likelihood(self, input_likelihoods, mprobs):
+        if isinstance(input_likelihoods, ScaledLikelihoods):
+            return self.get_log_sum_across_sites(self.inner(input_likelihoods, mprobs))
+
+        if self.site_blocks is None:
+            return self._total_log_likelihood(self.counts, input_likelihoods, mprobs)
+
+        def calc(start, end):
+            return self._total_log_likelihood(
+                self.counts[start:end], input_likelihoods[start:end], mprobs
+            )
+
+        return sum(self.site_blocks.map(calc, len(self.counts)))
+
+    def get_log_sum_across_sites(self, lhs):
+        if isinstance(lhs, ScaledLikelihoods):
+            log_sum = self._scaled_log_sum_across_sites
+        else:
+            log_sum = self._log_sum_across_sites
+
+        if self.site_blocks is None:
+            return log_sum(self.counts, lhs)
+
+        def calc(start, end):
+            return log_sum(self.counts[start:end], lhs[start:end])
+
+        return sum(self.site_blocks.map(calc, len(self.counts)))
+
+    def _scaled_log_sum_across_sites(self, counts, lhs):
+        result = self._log_sum_across_sites(
+            counts, lhs.likelihoods.astype(self.float_type)
+        )
+        return result + numpy.dot(lhs.exponents, counts) * LOG_2
+
+    def sum_input_likelihoods_grad(self, grad, *likelihoods, result=None):
+        """returns gradients with respect to each of the likelihoods
+        given grad, that with respect to sum_input_likelihoods() of which
+        result is the value. For single precision, gradients are with respect
+        to the stored likelihoods, each site's exponent being held fixed."""
+        if isinstance(result, ScaledLikelihoods):
+            # rows of result were divided by 2**shift when they were rescaled
+            shift = result.exponents.copy()
+            for (index, lh) in zip(self.indexes, likelihoods):
+                shift -= numpy.take(lh.exponents, index)
+            grad = grad * numpy.ldexp(1.0, -shift)[:, None]
+            likelihoods = [lh.likelihoods for lh in likelihoods]
+
+        selected = [
+            numpy.take(lh, index, 0) for (index, lh) in zip(self.indexes, likelihoods)
+        ]
+        result = []
+        for (i, (index, lh)) in enumerate(zip(self.indexes, likelihoods)):
+            g = grad.copy()
+            for (j, other) in enumerate(selected):
+                if j != i:
+                    g *= other
+            result.append(_sum_by_index(index, g, len(lh)))
+        return result
+
     def as_leaf(self, likelihoods):
         assert len(likelihoods) == len(self.counts)
         return LikelihoodTreeLeaf(
@@ -176,11 +453,25 @@ class _PyLikelihoodTreeEdge(_LikelihoodTreeEdge):
     BASE = 2.0 ** 100
     LOG_BASE = numpy.log(BASE)
 
-    def sum_input_likelihoodsR(self, result, *likelihoods):
+    def _sum_input_likelihoods(self, indexes, result, likelihoods):
         result[:] = 1.0
-        for (i, index) in enumerate(self.indexes):
+        for (i, index) in enumerate(indexes):
             result *= numpy.take(likelihoods[i], index, 0)
-        return result
+
+    def _sum_input_likelihoods_scaled(self, indexes, result, likelihoods):
+        values = result.likelihoods
+        exponents = result.exponents
+        for (i, (index, lh)) in enumerate(zip(indexes, likelihoods)):
+            if i == 0:
+                values[:] = numpy.take(lh.likelihoods, index, 0)
+                exponents[:] = numpy.take(lh.exponents, index)
+            else:
+                values *= numpy.take(lh.likelihoods, index, 0)
+                exponents += numpy.take(lh.exponents, index)
+            # keep the largest of each row in [0.5, 1)
+            (mantissas, exponent) = numpy.frexp(values.max(axis=1))
+            values *= numpy.ldexp(1.0, -exponent).astype(values.dtype)[:, None]
+            exponents += exponent
 
     # For root
 
@@ -194,32 +485,40 @@ class _PyLikelihoodTreeEdge(_LikelihoodTreeEdge):
                 exponent -= 1
         return numpy.log(sum(state_probs)) + exponent * self.LOG_BASE
 
-    def get_total_log_likelihood(self, input_likelihoods, mprobs):
+    def _total_log_likelihood(self, counts, input_likelihoods, mprobs):
         lhs = numpy.inner(input_likelihoods, mprobs)
-        return self.get_log_sum_across_sites(lhs)
+        return self._log_sum_across_sites(counts, lhs)
 
-    def get_log_sum_across_sites(self, lhs):
-        return numpy.inner(numpy.log(lhs), self.counts)
+    def _log_sum_across_sites(self, counts, lhs):
+        return numpy.inner(numpy.log(lhs), counts)
 
 
 class _PyxLikelihoodTreeEdge(_LikelihoodTreeEdge):
     integer_type = numerictypes(int)  # match checkArrayInt1D
     float_type = numerictypes(float)  # match checkArrayDouble1D/2D
 
-    def sum_input_likelihoodsR(self, result, *likelihoods):
-        pyrex.sum_input_likelihoods(self.indexes, result, likelihoods)
-        return result
+    def _sum_input_likelihoods(self, indexes, result, likelihoods):
+        pyrex.sum_input_likelihoods(indexes, result, likelihoods)
+
+    def _sum_input_likelihoods_scaled(self, indexes, result, likelihoods):
+        pyrex.sum_input_likelihoods_scaled(
+            indexes,
+            result.likelihoods,
+            result.exponents,
+            [lh.likelihoods for lh in likelihoods],
+            [lh.exponents for lh in likelihoods],
+        )
 
     # For root
 
     def log_dot_reduce(self, patch_probs, switch_probs, plhs):
         return pyrex.log_dot_reduce(self.index, patch_probs, switch_probs, plhs)
 
-    def get_total_log_likelihood(self, input_likelihoods, mprobs):
-        return pyrex.get_total_log_likelihood(self.counts, input_likelihoods, mprobs)
+    def _total_log_likelihood(self, counts, input_likelihoods, mprobs):
+        return pyrex.get_total_log_likelihood(counts, input_likelihoods, mprobs)
 
-    def get_log_sum_across_sites(self, lhs):
-        return pyrex.get_log_sum_across_sites(self.counts, lhs)
+    def _log_sum_across_sites(self, counts, lhs):
+        return pyrex.get_log_sum_across_sites(counts, lhs)
 
 
 if pyrex is None:
@@ -229,6 +528,8 @@ else:
 
 FLOAT_TYPE = LikelihoodTreeEdge.float_type
 INTEGER_TYPE = LikelihoodTreeEdge.integer_type
+SINGLE_FLOAT_TYPE = numerictypes(numpy.float32)
+LOG_2 = numpy.log(2.0)
 
 
 def _indexed(values):
@@ -251,6 +552,16 @@ def _indexed(values):
     return unique, counts, index
 
 
+def _sum_by_index(index, values, size):
+    # sums of rows of values, grouped by their index, into an array of size rows
+    order = numpy.argsort(index, kind="stable")
+    index = index[order]
+    starts = numpy.flatnonzero(numpy.r_[True, index[1:] != index[:-1]])
+    result = numpy.zeros((size,) + values.shape[1:], values.dtype)
+    result[index[starts]] = numpy.add.reduceat(values[order], starts, axis=0)
+    return result
+
+
 def make_likelihood_tree_leaf(sequence, alphabet=None, seq_name=None):
     if alphabet is None:
         alphabet = sequence.moltype.alphabet
@@ -282,6 +593,40 @@ def make_likelihood_tree_leaf(sequence, alphabet=None, seq_name=None):
     )
 
 
+def concatenated_leaf(leaves):
+    """returns a leaf with the columns of each of 'leaves' in turn, their
+    unique motifs being pooled"""
+    uniq = []
+    rows = []
+    index = []
+    seen = {}
+    for leaf in leaves:
+        # the last unique motif of each leaf is for gaps
+        mapping = numpy.zeros([len(leaf.uniq)], INTEGER_TYPE)
+        for (u, motif) in enumerate(leaf.uniq[:-1]):
+            if motif not in seen:
+                seen[motif] = len(uniq)
+                uniq.append(motif)
+                rows.append(leaf.input_likelihoods[u])
+            mapping[u] = seen[motif]
+        index.append(mapping[numpy.asarray(leaf.index, INTEGER_TYPE)])
+
+    first = leaves[0]
+    uniq.append(first.uniq[-1])
+    rows.append(first.input_likelihoods[-1])
+    index = numpy.concatenate(index)
+    counts = numpy.bincount(index, minlength=len(uniq)).astype(FLOAT_TYPE)
+    return LikelihoodTreeLeaf(
+        uniq,
+        numpy.array(rows, FLOAT_TYPE),
+        counts,
+        index,
+        first.edge_name,
+        first.alphabet,
+        None,
+    )
+
+
 class LikelihoodTreeLeaf(object):
     def __init__(self, uniq, likelihoods, counts, index, edge_name, alphabet, sequence):
         if sequence is not None:
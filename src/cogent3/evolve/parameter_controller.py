@@ -488,7 +488,20 @@ class AlignmentLikelihoodFunction(_LikelihoodParameterController):
         except KeyError:
             pass
 
-    def make_likelihood_defn(self, sites_independent=True, discrete_edges=None):
+    def make_likelihood_defn(
+        self,
+        sites_independent=True,
+        discrete_edges=None,
+        threads=None,
+        precision="double",
+        pool_loci=False,
+    ):
+        # threads > 1 splits the unique site patterns into blocks that are
+        # calculated in parallel. precision='single' stores partial
+        # likelihoods as float32 with per site pattern scaling exponents,
+        # halving their memory and avoiding underflow on very deep trees.
+        # pool_loci calculates the site patterns of all loci together, so
+        # those shared by loci are calculated once if their parameters are.
         defns = self.model.make_param_controller_defns(bin_names=self.bin_names)
         if discrete_edges is not None:
             from .discrete_markov import PartialyDiscretePsubsDefn
@@ -505,6 +518,9 @@ class AlignmentLikelihoodFunction(_LikelihoodParameterController):
             self.bin_names,
             self.locus_names,
             sites_independent,
+            threads=threads,
+            precision=precision,
+            pool_loci=pool_loci,
         )
 
     def set_alignment(self, aligns, motif_pseudocount=None):
@@ -103,3 +103,16 @@ class ExpDefn(CalculationDefn):
             return eigen
         else:
             return _EigenPade(eigen=eigen)
+
+
+class QdDefn(CalculationDefn):
+    """Rate matrix prepared for exponentiation by the function from ExpDefn"""
+
+    name = "Qd"
+
+    def calc(self, exp, Q):
+        return exp(Q)
+
+    def grad(self, g, exp, Q):
+        # gradients with respect to an exponentiator are those for its Q
+        return [None, g]
@@ -41,7 +41,7 @@ import numpy
 from numpy.linalg import svd
 
 from cogent3.core import moltype
-from cogent3.evolve import motif_prob_model, parameter_controller, predicate
+from cogent3.evolve import motif_prob_model, predicate
 from cogent3.evolve.discrete_markov import PsubMatrixDefn
 from cogent3.evolve.likelihood_tree import make_likelihood_tree_leaf
 from cogent3.evolve.substitution_calculation import (
@@ -56,6 +56,7 @@ from cogent3.evolve.substitution_calculation import (
     NonParamDefn,
     PartitionDefn,
     ProductDefn,
+    QdDefn,
     RateDefn,
     SelectForDimension,
 )
@@ -320,6 +321,9 @@ class _SubstitutionModel(object):
         space=None,
         **kw,
     ):
+        # imported here as parameter_controller imports likelihood_function,
+        # which imports this module
+        from cogent3.evolve import parameter_controller
 
         if motif_probs_from_align is None:
             motif_probs_from_align = self.motif_probs_from_align
@@ -594,7 +598,7 @@ class _ContinuousSubstitutionModel(_SubstitutionModel):
         Q = CalcDefn(self.calcQ, name="Q")(word_probs, mprobs_matrix, *rate_params)
         expm = NonParamDefn("expm")
         exp = ExpDefn(expm)
-        Qd = CallDefn(exp, Q, name="Qd")
+        Qd = QdDefn(exp, Q)
         return Qd
 
     def _make_bin_param_defn(self, edge_par_name, bin_par_name, bprob_defn):
@@ -54,6 +54,34 @@ class EigenExponentiator(_Exponentiator):
         result = numpy.maximum(result, 0.0)
         return result
 
+    def batch(self, ts):
+        """returns a list of exp(Q*t) for each t in ts, calculated together"""
+        exp_roots = numpy.exp(numpy.multiply.outer(ts, self.roots))
+        result = numpy.matmul(self.evT * exp_roots[:, numpy.newaxis, :], self.evI.T)
+        if result.dtype.kind == "c":
+            result = numpy.asarray(result.real)
+        result = numpy.maximum(result, 0.0)
+        return list(result)
+
+    def grad(self, g, t):
+        """returns gradients with respect to Q and t given g, the gradient
+        with respect to P=exp(Q*t)"""
+        roots = self.roots
+        exp_roots = numpy.exp(t * roots)
+        dP_dt = numpy.inner(self.evT * (roots * exp_roots), self.evI)
+        g_t = numpy.sum(g * dP_dt.real)
+
+        # Frechet derivative of exp, in the eigenbasis
+        diff = numpy.subtract.outer(roots, roots)
+        same = numpy.abs(diff) <= 1e-10 * numpy.maximum(1.0, numpy.abs(roots))
+        diff[same] = 1.0
+        phi = numpy.subtract.outer(exp_roots, exp_roots) / diff
+        phi = numpy.where(same, t * exp_roots[:, numpy.newaxis], phi)
+        # Q = R.diag(roots).R^-1, with R = evT and R^-1 = evI.T
+        ginner = numpy.dot(numpy.dot(self.evT.T, g), self.evI)
+        g_Q = numpy.dot(numpy.dot(self.evI, phi * ginner), self.evT.T)
+        return [g_Q.real, g_t]
+
 
 def SemiSymmetricExponentiator(motif_probs, Q):
     """Like EigenExponentiator, but more numerically stable and
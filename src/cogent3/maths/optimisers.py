@@ -10,7 +10,7 @@ import numpy
 
 from cogent3.util import progress_display as UI
 
-from .scipy_optimisers import Powell
+from .scipy_optimisers import LBFGSB, Powell
 from .simannealingoptimiser import SimulatedAnnealing
 
 
@@ -140,17 +140,24 @@ def maximise(
     global_tolerance=1e-1,
     ui=None,
     return_eval_count=False,
+    local_method="Powell",
+    gradient=None,
     **kw,
 ):
     """Find input values that optimise this function.
     'local' controls the choice of optimiser, the default being to run
-    both the global and local optimisers. 'filename' and 'interval'
+    both the global and local optimisers. 'local_method' is the local
+    optimiser, either 'Powell' or 'L-BFGS-B', the latter using the
+    function 'gradient' if provided. 'filename' and 'interval'
     control checkpointing.  Unknown keyword arguments get passed on to
     the global optimiser.
     """
     do_global = (not local) or local is None
     do_local = local or local is None
 
+    if local_method.lower() not in ("powell", "l-bfgs-b"):
+        raise ValueError("local_method must be 'Powell' or 'L-BFGS-B'")
+
     assert limit_action in ["ignore", "warn", "raise", "error"]
     (get_best, f) = limited_use(f, max_evaluations)
 
@@ -167,6 +174,7 @@ def maximise(
             if lower is None:
                 lower = -numpy.inf
             f = bounded_function(f, upper, lower)
+            bounds = [numpy.broadcast_to(b, x.shape) for b in (upper, lower)]
     try:
         fval = f(x)
     except (ArithmeticError, ParameterOutOfBoundsError) as detail:
@@ -208,7 +216,10 @@ def maximise(
         if do_local:
             callback = unsteadyProgressIndicator(ui.display, "Local", gend, 1.0)
             # ui.display('local opt', 1.0-per_opt, per_opt)
-            opt = LocalOptimiser()
+            if local_method.lower() == "l-bfgs-b":
+                opt = LBFGSB(gradient=gradient, bounds=bounds)
+            else:
+                opt = LocalOptimiser()
             x = opt.maximise(
                 f,
                 x,
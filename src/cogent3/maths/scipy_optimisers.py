@@ -112,4 +112,124 @@ class Powell(_SciPyOptimiser):
         return (xopt, fval, iterations, func_calls, warnflag)
 
 
+class LBFGSB(object):
+    """Bounded limited memory BFGS from scipy, using the gradient of the
+    optimised function if provided, otherwise a numerical approximation."""
+
+    def __init__(self, gradient=None, bounds=None):
+        self.gradient = gradient
+        self.bounds = bounds
+
+    def maximise(self, function, *args, **kw):
+        def nf(x):
+            return -1 * function(x)
+
+        ng = None
+        if self.gradient is not None:
+
+            def ng(x):
+                return -1 * self.gradient(x)
+
+        return self._minimise(nf, ng, *args, **kw)
+
+    def minimise(self, function, *args, **kw):
+        return self._minimise(function, self.gradient, *args, **kw)
+
+    def _minimise(
+        self,
+        function,
+        gradient,
+        xopt,
+        show_remaining,
+        max_restarts=None,
+        tolerance=None,
+    ):
+        try:
+            from scipy.optimize import minimize
+        except ImportError:
+            raise ImportError("scipy not installed")
+
+        if max_restarts is None:
+            max_restarts = 0
+        if tolerance is None:
+            tolerance = 1e-6
+
+        if len(xopt) == 0:
+            return xopt
+
+        bounds = None
+        if self.bounds is not None and not any(b is None for b in self.bounds):
+            bounds = [
+                tuple(b if numpy.isfinite(b) else None for b in bound)
+                for bound in zip(*self.bounds)
+            ]
+
+        fcalls = [0]
+        fvals = [numpy.inf, numpy.inf]
+        last = [None, None]
+        best = [None, numpy.inf]
+        # scale and penalty are reset before each run
+        scaling = [1.0, numpy.inf]
+
+        def f(x):
+            fcalls[0] += 1
+            fval = function(x)
+            last[:] = [x.copy(), fval]
+            if fval < best[1]:
+                best[:] = [x.copy(), fval]
+            if not numpy.isfinite(fval):
+                return scaling[1]
+            return fval * scaling[0]
+
+        def jac(x):
+            return numpy.nan_to_num(gradient(x)) * scaling[0]
+
+        def _callback(x):
+            # called once per iteration, usually with the last x evaluated
+            fval = last[1] if numpy.array_equal(x, last[0]) else function(x)
+            fvals[:] = [fval, fvals[0]]
+            delta = fvals[1] - fvals[0]
+            if show_remaining and numpy.isfinite(delta):
+                remaining = math.log(max(abs(delta) / tolerance, 1.0))
+                show_remaining(remaining, -fvals[0], delta, fcalls[0])
+
+        xopt = numpy.atleast_1d(numpy.asarray(xopt, dtype=float))
+        fval_last = function(xopt)
+        restarts = 0
+        while True:
+            # L-BFGS-B starts from an identity Hessian so its first step is the
+            # negative gradient, which for a likelihood lands well outside the
+            # useful region. Scaling by the gradient keeps that step near unit
+            # length. An infinite value is replaced by one worse than the start
+            # so the line search backtracks rather than giving up.
+            scale = 1.0
+            if gradient is not None:
+                g0 = numpy.abs(jac(xopt) / scaling[0]).max()
+                if numpy.isfinite(g0) and g0 > 1.0:
+                    scale = 1.0 / g0
+            scaling[:] = [scale, (fval_last + abs(fval_last) + 1.0) * scale]
+            result = minimize(
+                f,
+                xopt,
+                jac=None if gradient is None else jac,
+                method="L-BFGS-B",
+                bounds=bounds,
+                callback=_callback,
+                options=dict(ftol=tolerance * 1e-3, gtol=1e-5 * scale),
+            )
+            # a failed line search, when the curvature estimate is poor near a
+            # bound, stops early so we restart from the best point found
+            xopt, fval = best
+            xopt = numpy.atleast_1d(xopt)
+            if 2.0 * (fval_last - fval) <= tolerance * (abs(fval_last) + abs(fval)):
+                break
+            fval_last = fval
+            if result.success:
+                restarts += 1
+                if restarts > max_restarts:
+                    break
+
+        return xopt
+
+
 DefaultLocalOptimiser = Powell
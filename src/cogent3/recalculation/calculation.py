@@ -4,10 +4,14 @@ import os
 import time
 import warnings
 
+from collections import OrderedDict
+from operator import itemgetter
+
 import numpy
 
 from cogent3.maths.optimisers import ParameterOutOfBoundsError, maximise
 from cogent3.maths.solve import find_root
+from cogent3.util.table import Table
 
 
 Float = numpy.core.numerictypes.sctype2char(float)
@@ -34,6 +38,14 @@ class CalculationInterupted(Exception):
     pass
 
 
+def _arg_getter(ranks):
+    # A function giving the tuple of values at 'ranks' of a data list
+    if len(ranks) > 1:
+        return itemgetter(*ranks)
+    ranks = tuple(ranks)
+    return lambda data: tuple([data[rank] for rank in ranks])
+
+
 class OptPar(object):
     """One parameter, as seen by the optimiser, eg: length of one edge.
     An OptPar reports changes to the ParameterValueSet for its parameter.
@@ -98,6 +110,10 @@ class OptPar(object):
     def transform_to_optimiser(self, value):
         return value
 
+    def transform_from_optimiser_gradient(self, value):
+        # derivative of transform_from_optimiser at value
+        return 1.0
+
 
 class LogOptPar(OptPar):
     # For ratios, optimiser sees log(param value).  Conversions to/from
@@ -113,6 +129,9 @@ class LogOptPar(OptPar):
         except OverflowError:
             raise OverflowError("log(%s)" % value)
 
+    def transform_from_optimiser_gradient(self, value):
+        return numpy.exp(value)
+
 
 class EvaluatedCell(object):
     __slots__ = [
@@ -128,12 +147,18 @@ class EvaluatedCell(object):
         "consequences",
         "recycled",
         "default",
+        "grad",
+        "batch",
     ]
 
-    def __init__(self, name, calc, args, recycling=None, default=None):
+    def __init__(
+        self, name, calc, args, recycling=None, default=None, grad=None, batch=None
+    ):
         self.name = name
         self.rank = None
         self.calc = calc
+        self.grad = grad
+        self.batch = batch
         self.default = default
         self.args = tuple(args)
 
@@ -158,8 +183,9 @@ class EvaluatedCell(object):
         data[self.rank] = self.calc(*[data[arg_rank] for arg_rank in self.arg_ranks])
 
     def prime(self, data_sets):
-        if self.is_constant:
-            # Just calc once
+        if self.is_constant or not self.recycled:
+            # Just calc once, as values are replaced rather than modified
+            # unless recycled
             self.update(data_sets[0])
             for data in data_sets[1:]:
                 data[self.rank] = data_sets[0][self.rank]
@@ -195,11 +221,101 @@ class ConstCell(object):
         self.clients.append(client)
 
 
+class SnapshotCache(object):
+    """Least recently used cache of the values of all cells, keyed by the
+    values of the optimiser parameters, so that points visited more than one
+    step ago need not be recalculated.  At most 'size' snapshots are kept,
+    and fewer if the values they hold (numpy arrays and other objects with an
+    nbytes attribute) would exceed 'max_bytes'."""
+
+    def __init__(self, size, max_bytes=None):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshots = OrderedDict()
+        self._held = {}  # id(value) -> [value, number of snapshots]
+        self._released = {}  # rank -> recycled values no longer held
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __contains__(self, key):
+        return key in self._snapshots
+
+    def get(self, key):
+        if key not in self._snapshots:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._snapshots.move_to_end(key)
+        return self._snapshots[key][0]
+
+    def holds(self, value):
+        return id(value) in self._held
+
+    def put(self, key, values, ranks, recycled_ranks):
+        # 'ranks' are the cells whose values are accounted for, those of
+        # 'recycled_ranks' are made available for reuse once released
+        if key in self._snapshots:
+            self._snapshots.move_to_end(key)
+            return
+        values = list(values)
+        for rank in ranks:
+            self._hold(values[rank])
+        self._snapshots[key] = (values, ranks, recycled_ranks)
+        while self._snapshots and (
+            len(self._snapshots) > self.size
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            (_, evicted) = self._snapshots.popitem(last=False)
+            self._discard(*evicted)
+
+    def pop_released(self, rank):
+        # a recycled value of cell 'rank' that no snapshot holds, or None
+        released = self._released.get(rank)
+        return released.pop() if released else None
+
+    def clear(self):
+        self._snapshots.clear()
+        self._held.clear()
+        self._released.clear()
+        self.nbytes = 0
+
+    def _hold(self, value):
+        held = self._held.get(id(value))
+        if held is None:
+            self._held[id(value)] = [value, 1]
+            self.nbytes += getattr(value, "nbytes", 0)
+        else:
+            held[1] += 1
+
+    def _discard(self, values, ranks, recycled_ranks):
+        for rank in ranks:
+            value = values[rank]
+            held = self._held[id(value)]
+            held[1] -= 1
+            if held[1]:
+                continue
+            del self._held[id(value)]
+            self.nbytes -= getattr(value, "nbytes", 0)
+            if rank in recycled_ranks:
+                # one spare per cell is enough for recycling
+                self._released[rank] = [value]
+
+
 class Calculator(object):
     """A complete hierarchical function with N evaluation steps to call
     for each change of inputs.  Made by a ParameterController."""
 
-    def __init__(self, cells, defns, trace=None, with_undo=True):
+    # If false plain_update() interprets each program rather than running
+    # its compiled form, for benchmarking.
+    compile_programs = True
+
+    def __init__(
+        self, cells, defns, trace=None, with_undo=True, profile=False, cache_size=0
+    ):
         if trace is None:
             trace = TRACE_DEFAULT
         self.with_undo = with_undo
@@ -244,7 +360,13 @@ class Calculator(object):
 
         self._switch = 0
         self.recycled_cells = [cell.rank for cell in self._cells if cell.recycled]
+        self._recycled_ranks = frozenset(self.recycled_cells)
         self.spare = [None] * len(self._cells)
+        self._variable_ranks = [
+            cell.rank
+            for cell in self._cells
+            if isinstance(cell, EvaluatedCell) and not cell.is_constant
+        ]
 
         for cell in self._cells[::-1]:
             for arg in cell.args:
@@ -252,6 +374,8 @@ class Calculator(object):
                 arg.consequences.update(cell.consequences)
 
         self._programs = {}
+        self._batched_programs = {}
+        self._compiled_programs = {}
         # Just for timings pre-calc these
         for opt_par in self.opt_pars:
             self.cells_changed_by([(opt_par.rank, None)])
@@ -261,6 +385,8 @@ class Calculator(object):
         self.elapsed_time = 0.0
         self.evaluations = 0
         self.set_tracing(trace)
+        self.set_profiling(profile)
+        self.set_cache_size(cache_size)
         self.optimised = False
 
     def graphviz(self):
@@ -310,7 +436,7 @@ class Calculator(object):
     def optimise(self, **kw):
         x = self.get_value_array()
         bounds = self.get_bounds_vectors()
-        maximise(self, x, bounds, **kw)
+        maximise(self, x, bounds, gradient=self.gradient, **kw)
         self.optimised = True
 
     def set_tracing(self, trace=False):
@@ -349,6 +475,57 @@ class Calculator(object):
                 print("-" * width, "|", end=" ")
             print()
 
+    def set_profiling(self, profile=False):
+        """With 'profile' true the number of calls and time taken by each
+        cell are accumulated, see get_profile().  Any existing counts are
+        discarded."""
+        self.profile = profile
+        self._profile_evaluations = 0
+        self._profile_calls = [0] * len(self._cells)
+        self._profile_times = [0.0] * len(self._cells)
+
+    def get_profile(self):
+        """Returns a Table of the calls made while profiling, one row per
+        defn name (eg: psubs, plh, lh). 'calls' counts recalculations and
+        'hit rate' the fraction of evaluations for which the existing
+        values were reused instead."""
+        names = []
+        groups = {}
+        for cell in self._cells:
+            if cell.is_constant or not isinstance(cell, EvaluatedCell):
+                continue
+            if cell.name not in groups:
+                names.append(cell.name)
+                groups[cell.name] = []
+            groups[cell.name].append(cell.rank)
+
+        evaluations = self._profile_evaluations
+        rows = []
+        for name in names:
+            ranks = groups[name]
+            calls = sum(self._profile_calls[r] for r in ranks)
+            total = sum(self._profile_times[r] for r in ranks)
+            opportunities = evaluations * len(ranks)
+            hits = max(opportunities - calls, 0)
+            hit_rate = hits / opportunities if opportunities else 0.0
+            mean = total / calls if calls else 0.0
+            rows.append([name, len(ranks), calls, hit_rate, total, mean])
+
+        header = ["name", "cells", "calls", "hit rate", "total time", "mean time"]
+        return Table(
+            header=header,
+            data=rows,
+            title=f"Calculator profile, {evaluations} evaluations",
+            digits=6,
+        )
+
+    def set_cache_size(self, size=0, max_bytes=None):
+        """Keeps the cell values of up to 'size' of the most recently
+        evaluated points, beyond the 1-deep undo, so that returning to one of
+        them needs no recalculation.  'max_bytes' limits the memory held by
+        the cache.  A 'size' of 0 disables it."""
+        self.cache = SnapshotCache(size, max_bytes) if size else None
+
     def get_value_array(self):
         """This being a caching function, you can ask it for its current
         input!  Handy for initialising the optimiser."""
@@ -407,6 +584,125 @@ class Calculator(object):
         """Return the current output value without changing any inputs"""
         return self._get_current_cell_value(self._cells[-1])
 
+    def gradient(self, values=None, step=1e-6):
+        """Returns the gradient of the output with respect to each optimiser
+        parameter, at 'values' if provided, otherwise at the current input.
+
+        The gradient is propagated back from the output through all cells
+        that provide a grad() function. Where that stops at a numeric value,
+        the remaining (cheap) steps back to the optimiser parameters are
+        differentiated numerically, with relative 'step', without
+        recalculating the output. Parameters that influence the output via
+        cells lacking a grad() are differentiated numerically using change().
+        """
+        if values is not None:
+            self.testoptparvector(values)
+
+        data = self.cell_values[self._switch]
+        adjoints = {self._cells[-1].rank: 1.0}
+        opaque = set()  # ranks of cells with unknown effect on the output
+        boundary = []  # numeric cells at which back propagation stops
+        for cell in self._cells[::-1]:
+            if cell.rank not in adjoints or isinstance(cell, OptPar):
+                continue
+            g = adjoints[cell.rank]
+            grads = None
+            if cell.rank not in opaque and cell.grad is not None:
+                grads = cell.grad(g, *[data[a] for a in cell.arg_ranks])
+
+            if grads is None:
+                value = data[cell.rank]
+                numeric = isinstance(value, (float, numpy.ndarray))
+                if (
+                    cell.rank not in opaque
+                    and numeric
+                    and numpy.shape(g) == numpy.shape(value)
+                ):
+                    boundary.append(cell)
+                else:
+                    opaque.add(cell.rank)
+                continue
+
+            for (arg, arg_g) in zip(cell.args, grads):
+                if arg is cell or arg.is_constant:
+                    continue
+                if arg_g is None:
+                    opaque.add(arg.rank)
+                    adjoints.setdefault(arg.rank, None)
+                elif adjoints.get(arg.rank) is None:
+                    adjoints[arg.rank] = arg_g
+                else:
+                    adjoints[arg.rank] = adjoints[arg.rank] + arg_g
+
+        # cells that need recalculating to get boundary values
+        upstream = set()
+        stack = list(boundary)
+        while stack:
+            cell = stack.pop()
+            if cell.rank not in upstream:
+                upstream.add(cell.rank)
+                stack.extend(cell.args)
+
+        result = numpy.zeros(len(self.opt_pars), Float)
+        for (i, opt_par) in enumerate(self.opt_pars):
+            x = self.last_values[i]
+            (lower, upper) = opt_par.get_optimiser_bounds()
+            h = step * max(1.0, abs(x))
+            (lo, hi) = (max(lower, x - h), min(upper, x + h))
+            if hi <= lo:
+                continue
+
+            consequences = opt_par.consequences
+            if i in opaque or any(rank in consequences for rank in opaque):
+                result[i] = self._numeric_derivative(i, x, lo, hi)
+                continue
+
+            if adjoints.get(i) is not None:
+                result[i] = adjoints[i] * opt_par.transform_from_optimiser_gradient(x)
+
+            targets = [cell for cell in boundary if cell.rank in consequences]
+            if not targets:
+                continue
+
+            program = [
+                cell
+                for cell in self.cells_changed_by([(i, None)])
+                if cell.rank in upstream
+            ]
+            if any(cell.recycled for cell in program):
+                result[i] = self._numeric_derivative(i, x, lo, hi)
+                continue
+
+            deltas = []
+            try:
+                for v in (lo, hi):
+                    scratch = list(data)
+                    scratch[i] = opt_par.transform_from_optimiser(v)
+                    for cell in program:
+                        args = [scratch[a] for a in cell.arg_ranks]
+                        scratch[cell.rank] = cell.calc(*args)
+                    deltas.append([scratch[cell.rank] for cell in targets])
+            except (ParameterOutOfBoundsError, ArithmeticError):
+                result[i] = self._numeric_derivative(i, x, lo, hi)
+                continue
+
+            for (cell, v_lo, v_hi) in zip(targets, *deltas):
+                dv = (numpy.asarray(v_hi) - v_lo) / (hi - lo)
+                result[i] += numpy.sum(adjoints[cell.rank] * dv)
+
+        return result
+
+    def _numeric_derivative(self, i, x, lo, hi):
+        # derivative of the output with respect to one optimiser parameter
+        try:
+            f_lo = self.change([(i, lo)])
+            f_hi = self.change([(i, hi)])
+        except (ParameterOutOfBoundsError, ArithmeticError):
+            return 0.0
+        finally:
+            self.change([(i, x)])
+        return (f_hi - f_lo) / (hi - lo)
+
     def change(self, changes):
         """Returns the output value after applying 'changes', a list of
         (optimisable_parameter_ordinal, new_value) tuples."""
@@ -428,7 +724,20 @@ class Calculator(object):
                     self.last_values[i] = v
 
         self.last_undo = []
-        program = self.cells_changed_by(changes)
+        cache = self.cache
+        snapshot = None
+        if cache is not None:
+            if any(i >= len(self.opt_pars) for (i, v) in changes):
+                # the cached values depend on inputs other than OptPars
+                cache.clear()
+                cache = None
+            elif changes:
+                key = list(self.last_values)
+                for (i, v) in changes:
+                    key[i] = v
+                snapshot = cache.get(tuple(key))
+
+        program = self.cells_changed_by([] if snapshot is not None else changes)
 
         if self.with_undo:
             self._switch = not self._switch
@@ -448,6 +757,14 @@ class Calculator(object):
         else:
             data = self.cell_values[self._switch]
 
+        if snapshot is not None:
+            data[:] = snapshot
+        elif cache is not None:
+            # values held by the cache must not be recycled
+            for cell in program:
+                if cell.recycled and cache.holds(data[cell.rank]):
+                    data[cell.rank] = self._get_released(cell.rank)
+
         # Set new OptPar values
         changed_optpars = []
         for (i, v) in changes:
@@ -462,6 +779,9 @@ class Calculator(object):
         try:
             if self.trace:
                 self.tracing_update(changes, program, data)
+            elif self.profile:
+                self._profile_evaluations += 1
+                self.profiling_update(program, data)
             else:
                 self.plain_update(program, data)
 
@@ -471,6 +791,14 @@ class Calculator(object):
             else:
                 self.last_undo = changed_optpars
 
+            if cache is not None:
+                cache.put(
+                    tuple(self.last_values),
+                    data,
+                    self._variable_ranks,
+                    self._recycled_ranks,
+                )
+
         except CalculationInterupted as detail:
             if self.with_undo:
                 self._switch = not self._switch
@@ -485,6 +813,18 @@ class Calculator(object):
 
         return self.cell_values[self._switch][-1]
 
+    def _get_released(self, rank):
+        # a value of recycled cell 'rank' evicted from the cache, if it
+        # is not also in use elsewhere, otherwise None
+        value = self.cache.pop_released(rank)
+        if (
+            self.cache.holds(value)
+            or value is self.spare[rank]
+            or any(value is values[rank] for values in self.cell_values)
+        ):
+            value = None
+        return value
+
     def cells_changed_by(self, changes):
         # What OptPars have been changed determines cells to update
         change_key = list(dict(changes).keys())
@@ -502,10 +842,72 @@ class Calculator(object):
             ]
         return program
 
+    def batched_program(self, program):
+        # Groups of cells from 'program' that can be calculated in one call
+        # of their batch function, being made by the same defn and sharing
+        # their first argument, eg: the psubs of edges sharing a Q.
+        # Programs are cached by cells_changed_by() so are keyed by identity.
+        key = id(program)
+        if key in self._batched_programs:
+            return self._batched_programs[key]
+        steps = []
+        last_batch = None
+        for cell in program:
+            batch = getattr(cell, "batch", None)
+            if batch is None or batch != last_batch:
+                run = {}
+            last_batch = batch
+            if batch is None:
+                steps.append([cell])
+                continue
+            first = cell.arg_ranks[0]
+            if first in run:
+                run[first].append(cell)
+            else:
+                run[first] = [cell]
+                steps.append(run[first])
+        self._batched_programs[key] = steps
+        return steps
+
+    def compiled_program(self, program):
+        # The steps of batched_program(program) flattened into (cell, rank,
+        # calc, args) tuples that are quick to run.  'args' is the rank of
+        # a cell's only argument, or a function getting the tuple of its
+        # arguments from the data list.  For a batch 'rank' is the tuple
+        # of ranks of its cells, 'calc' their batch function and 'args' a
+        # list of argument getters.
+        key = id(program)
+        if key in self._compiled_programs:
+            return self._compiled_programs[key]
+        compiled = []
+        for step in self.batched_program(program):
+            cell = step[0]
+            if len(step) > 1:
+                ranks = tuple([c.rank for c in step])
+                getters = [_arg_getter(c.arg_ranks) for c in step]
+                compiled.append((cell, ranks, cell.batch, getters))
+            elif len(cell.arg_ranks) == 1:
+                compiled.append((cell, cell.rank, cell.calc, cell.arg_ranks[0]))
+            else:
+                compiled.append(
+                    (cell, cell.rank, cell.calc, _arg_getter(cell.arg_ranks))
+                )
+        self._compiled_programs[key] = compiled
+        return compiled
+
     def plain_update(self, program, data):
+        if not self.compile_programs:
+            return self.interpreted_update(program, data)
         try:
-            for cell in program:
-                data[cell.rank] = cell.calc(*[data[a] for a in cell.arg_ranks])
+            for (cell, rank, calc, args) in self.compiled_program(program):
+                if args.__class__ is int:
+                    data[rank] = calc(data[args])
+                elif rank.__class__ is int:
+                    data[rank] = calc(*args(data))
+                else:
+                    values = calc([getter(data) for getter in args])
+                    for (r, value) in zip(rank, values):
+                        data[r] = value
         except ParameterOutOfBoundsError as detail:
             # Non-fatal error, just cancel this calculation.
             raise CalculationInterupted(cell, detail)
@@ -514,6 +916,51 @@ class Calculator(object):
             cell.report_error(detail, data)
             raise CalculationInterupted(cell, detail)
 
+    def interpreted_update(self, program, data):
+        try:
+            for step in self.batched_program(program):
+                cell = step[0]
+                if len(step) == 1:
+                    data[cell.rank] = cell.calc(*[data[a] for a in cell.arg_ranks])
+                    continue
+                args = [[data[a] for a in c.arg_ranks] for c in step]
+                for (c, value) in zip(step, cell.batch(args)):
+                    data[c.rank] = value
+        except ParameterOutOfBoundsError as detail:
+            # Non-fatal error, just cancel this calculation.
+            raise CalculationInterupted(cell, detail)
+        except ArithmeticError as detail:
+            # Non-fatal but unexpected error. Warn and cancel this calculation.
+            cell.report_error(detail, data)
+            raise CalculationInterupted(cell, detail)
+
+    def profiling_update(self, program, data):
+        # Does the same thing as plain_update, but also accumulates the
+        # number of calls and time taken by each cell.  The time taken by
+        # a batch call is shared equally by the cells in it.
+        calls = self._profile_calls
+        times = self._profile_times
+        now = time.perf_counter
+        try:
+            for step in self.batched_program(program):
+                cell = step[0]
+                t0 = now()
+                if len(step) == 1:
+                    data[cell.rank] = cell.calc(*[data[a] for a in cell.arg_ranks])
+                else:
+                    args = [[data[a] for a in c.arg_ranks] for c in step]
+                    for (c, value) in zip(step, cell.batch(args)):
+                        data[c.rank] = value
+                elapsed = (now() - t0) / len(step)
+                for c in step:
+                    calls[c.rank] += 1
+                    times[c.rank] += elapsed
+        except ParameterOutOfBoundsError as detail:
+            raise CalculationInterupted(cell, detail)
+        except ArithmeticError as detail:
+            cell.report_error(detail, data)
+            raise CalculationInterupted(cell, detail)
+
     def tracing_update(self, changes, program, data):
         # Does the same thing as plain_update, but also produces lots of
         # output showing how long each step of the calculation takes.
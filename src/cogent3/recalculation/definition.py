@@ -128,6 +128,18 @@ class CalculationDefn(_NonLeafDefn):
 
     recycling = False
 
+    # If not None, grad(g, *args) takes the same arguments as calc() preceded
+    # by the gradient of the final result with respect to the value of calc(),
+    # and returns a list of gradients with respect to each argument, None for
+    # those it can't be differentiated with respect to.  A None return means
+    # no gradients at all. Used by Calculator.gradient().
+    grad = None
+
+    # If not None, batch(arg_lists) returns the results of calc() for each
+    # list of arguments in arg_lists, all of which share their first argument.
+    # Used by the Calculator to evaluate many cells of this defn in one call.
+    batch = None
+
     # positional arguments are inputs to this step of the calculation,
     # keyword arguments are passed on to self.setup(), likely to end up
     # as static attributes of this CalculationDefn, to be used (as self.X)
@@ -145,7 +157,13 @@ class CalculationDefn(_NonLeafDefn):
     def make_cell(self, *args):
         calc = self.make_calc_function()
         cell = EvaluatedCell(
-            self.name, calc, args, recycling=self.recycling, default=self.default
+            self.name,
+            calc,
+            args,
+            recycling=self.recycling,
+            default=self.default,
+            grad=self.grad,
+            batch=self.batch,
         )
         return cell
 
@@ -164,18 +182,23 @@ class CalculationDefn(_NonLeafDefn):
 
 
 class _FuncDefn(CalculationDefn):
-    def __init__(self, calc, *args, **kw):
+    def __init__(self, calc, *args, grad=None, **kw):
         self.calc = calc
+        self.grad = grad
         CalculationDefn.__init__(self, *args, **kw)
 
 
 # Use this rather than having to subclass CalculationDefinition
 # just to supply the 'calc' method.
 class CalcDefn(object):
-    """CalcDefn(function)(arg1, arg2)"""
+    """CalcDefn(function)(arg1, arg2)
+
+    'grad', if provided, is a function as described for CalculationDefn.grad
+    """
 
-    def __init__(self, calc, name=None, **kw):
+    def __init__(self, calc, name=None, grad=None, **kw):
         self.calc = calc
+        self.grad = grad
 
         if name is None:
             name = self.calc.__name__
@@ -185,7 +208,7 @@ class CalcDefn(object):
         self.kw = kw
 
     def __call__(self, *args):
-        return _FuncDefn(self.calc, *args, **self.kw)
+        return _FuncDefn(self.calc, *args, grad=self.grad, **self.kw)
 
 
 class WeightedPartitionDefn(CalculationDefn):
@@ -663,6 +686,9 @@ class SumDefn(CalculationDefn):
     def calc(self, *args):
         return sum(args)
 
+    def grad(self, g, *args):
+        return [g] * len(args)
+
 
 class ProductDefn(CalculationDefn):
     name = "product"
@@ -670,6 +696,9 @@ class ProductDefn(CalculationDefn):
     def calc(self, *args):
         return numpy.product(args)
 
+    def grad(self, g, *args):
+        return [g * numpy.product(args[:i] + args[i + 1 :]) for i in range(len(args))]
+
 
 class CallDefn(CalculationDefn):
     name = "call"
@@ -677,6 +706,23 @@ class CallDefn(CalculationDefn):
     def calc(self, func, *args):
         return func(*args)
 
+    def grad(self, g, func, *args):
+        # func must supply a grad() for its own arguments, returning gradients
+        # for itself followed by those for its arguments
+        grad = getattr(func, "grad", None)
+        if grad is None:
+            return None
+        return grad(g, *args)
+
+    def batch(self, arg_lists):
+        # func may supply a batch() taking a sequence of values for each of
+        # its arguments, eg: an exponentiator called with many lengths
+        func = arg_lists[0][0]
+        batch = getattr(func, "batch", None)
+        if batch is None:
+            return [func(*args[1:]) for args in arg_lists]
+        return batch(*list(zip(*arg_lists))[1:])
+
 
 __all__ = [
     "ConstDefn",
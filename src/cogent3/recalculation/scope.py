@@ -858,13 +858,21 @@ class ParameterController(object):
         max_evaluations=None,
         tolerance=1e-6,
         global_tolerance=1e-1,
+        local_method="Powell",
+        profile=False,
+        cache_size=0,
         **kw,
     ):
         """Find input values that optimise this function.
         'local' controls the choice of optimiser, the default being to run
-        both the global and local optimisers. 'filename' and 'interval'
-        control checkpointing.  Unknown keyword arguments get passed on to
-        the optimiser(s)."""
+        both the global and local optimisers. 'local_method' chooses the
+        local optimiser, 'Powell' or 'L-BFGS-B' (requires scipy), the latter
+        using the gradient from the calculator. 'filename' and 'interval'
+        control checkpointing. 'profile' accumulates per-cell timings in
+        the calculator, see Calculator.get_profile(). 'cache_size' is the
+        number of previously evaluated points whose values are kept, see
+        Calculator.set_cache_size().  Unknown keyword arguments get passed
+        on to the optimiser(s)."""
         return_calculator = kw.pop("return_calculator", False)  # only for debug
         for n in [
             "local",
@@ -873,9 +881,10 @@ class ParameterController(object):
             "max_evaluations",
             "tolerance",
             "global_tolerance",
+            "local_method",
         ]:
             kw[n] = locals()[n]
-        lc = self.make_calculator()
+        lc = self.make_calculator(profile=profile, cache_size=cache_size)
         try:
             lc.optimise(**kw)
         except MaximumEvaluationsReached as detail:
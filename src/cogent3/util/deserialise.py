@@ -239,7 +239,8 @@ def deserialise_substitution_model(data):
     from cogent3.evolve.models import get_model
 
     data.pop("version", None)
-    kw = {} if "kw" not in data else data.pop("kw")
+    # copied, as it can be shared with the model that was serialised
+    kw = dict(data.pop("kw", {}))
     sm = None
     if kw and "name" in kw:
         name = kw.pop("name")
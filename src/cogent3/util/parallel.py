@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import concurrent.futures as concurrentfutures
+import itertools
 import math
 import multiprocessing
 import os
@@ -10,6 +11,10 @@ import threading
 import time
 import warnings
 
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from operator import itemgetter
+
 import numpy
 
 from cogent3.util.misc import extend_docstring_from
@@ -97,31 +102,8 @@ def set_default_chunksize(s, max_workers):
     return chunksize
 
 
-def imap(f, s, max_workers=None, use_mpi=False, if_serial="raise", chunksize=None):
-    """
-    Parameters
-    ----------
-    f : callable
-        function that operates on values in s
-    s : iterable
-        series of inputs to f
-    max_workers : int or None
-        maximum number of workers. Defaults to 1-maximum available.
-    use_mpi : bool
-        use MPI for parallel execution
-    if_serial : str
-        action to take if conditions will result in serial execution. Valid
-        values are 'raise', 'ignore', 'warn'. Defaults to 'raise'.
-    chunksize : int or None
-        Size of data chunks executed by worker processes. Defaults to None
-        where stable chunksize is determined by set_default_chunksize()
-
-    Returns
-    -------
-    imap is a generator yielding result of f(s[i]), map returns the result
-    series
-    """
-
+def _get_max_workers(max_workers, use_mpi, if_serial):
+    """returns the number of workers, checking the execution environment"""
     if_serial = if_serial.lower()
     assert if_serial in ("ignore", "raise", "warn"), f"invalid choice '{if_serial}'"
 
@@ -149,28 +131,347 @@ def imap(f, s, max_workers=None, use_mpi=False, if_serial="raise", chunksize=Non
             )
 
         max_workers = min(max_workers, COMM.Get_attr(MPI.UNIVERSE_SIZE) - 1)
-
-        if not chunksize:
-            chunksize = set_default_chunksize(s, max_workers)
-
-        with MPIfutures.MPIPoolExecutor(max_workers=max_workers) as executor:
-            for result in executor.map(f, s, chunksize=chunksize):
-                yield result
     else:
         if not max_workers:
             max_workers = multiprocessing.cpu_count() - 1
         assert max_workers < multiprocessing.cpu_count()
 
-        if not chunksize:
-            chunksize = set_default_chunksize(s, max_workers)
+    return max_workers
+
+
+def _make_executor(max_workers, use_mpi, initializer=None, initargs=()):
+    """returns a pool executor with max_workers"""
+    kwargs = dict(initializer=initializer, initargs=initargs) if initializer else {}
+    if use_mpi:
+        return MPIfutures.MPIPoolExecutor(max_workers=max_workers, **kwargs)
+    return concurrentfutures.ProcessPoolExecutor(max_workers, **kwargs)
+
+
+class WorkerPool:
+    """a pool of worker processes that can be reused by successive parallel
+    calls, avoiding the cost of starting workers for each call
+
+    Examples
+    --------
+    Pass the pool via par_kw, e.g. ``app.apply_to(dstore, parallel=True,
+    par_kw=dict(pool=pool))``. An initializer can load objects once per
+    worker, e.g. by assigning them to a module level variable.
+
+    >>> with WorkerPool(max_workers=4, initializer=load_trees) as pool:
+    ...     app1.apply_to(dstore1, parallel=True, par_kw=dict(pool=pool))
+    ...     app2.apply_to(dstore2, parallel=True, par_kw=dict(pool=pool))
+    """
+
+    def __init__(
+        self,
+        max_workers=None,
+        use_mpi=False,
+        if_serial="raise",
+        initializer=None,
+        initargs=(),
+    ):
+        """
+        Parameters
+        ----------
+        max_workers : int or None
+            maximum number of workers. Defaults to 1-maximum available.
+        use_mpi : bool
+            use MPI for parallel execution
+        if_serial : str
+            action to take if conditions will result in serial execution. Valid
+            values are 'raise', 'ignore', 'warn'. Defaults to 'raise'.
+        initializer : callable or None
+            called with initargs in each worker process when it starts
+        initargs : tuple
+            arguments for initializer
+        """
+        self.max_workers = _get_max_workers(max_workers, use_mpi, if_serial)
+        self.use_mpi = use_mpi
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self._executor = None
+
+    def __repr__(self):
+        name = self.__class__.__name__
+        return f"{name}(max_workers={self.max_workers}, use_mpi={self.use_mpi})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        # worker processes cannot be shared, a copy only records the settings
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    @property
+    def executor(self):
+        """the pool executor, started on first use"""
+        if self._executor is None:
+            self._executor = _make_executor(
+                self.max_workers, self.use_mpi, self.initializer, self.initargs
+            )
+        return self._executor
+
+    def restart(self):
+        """replaces the worker processes, e.g. after one has died"""
+        self.close(wait=False)
+
+    def close(self, wait=True):
+        """shuts down the worker processes, a subsequent use starts new ones"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _get_executor(max_workers, use_mpi, if_serial, pool):
+    """returns max_workers, use_mpi and a context manager providing an
+    executor, which is only shutdown on exit if it is not from pool"""
+    if pool is None:
+        max_workers = _get_max_workers(max_workers, use_mpi, if_serial)
+        executor = _make_executor(max_workers, use_mpi)
+    else:
+        max_workers, use_mpi = pool.max_workers, pool.use_mpi
+        executor = nullcontext(pool.executor)
+    return max_workers, use_mpi, executor
+
+
+def imap(
+    f,
+    s,
+    max_workers=None,
+    use_mpi=False,
+    if_serial="raise",
+    chunksize=None,
+    pool=None,
+):
+    """
+    Parameters
+    ----------
+    f : callable
+        function that operates on values in s
+    s : iterable
+        series of inputs to f
+    max_workers : int or None
+        maximum number of workers. Defaults to 1-maximum available.
+    use_mpi : bool
+        use MPI for parallel execution
+    if_serial : str
+        action to take if conditions will result in serial execution. Valid
+        values are 'raise', 'ignore', 'warn'. Defaults to 'raise'.
+    chunksize : int or None
+        Size of data chunks executed by worker processes. Defaults to None
+        where stable chunksize is determined by set_default_chunksize()
+    pool : WorkerPool or None
+        an existing pool of workers to use. If provided, max_workers and
+        use_mpi are taken from the pool.
+
+    Returns
+    -------
+    imap is a generator yielding result of f(s[i]), map returns the result
+    series
+    """
+    max_workers, use_mpi, executor = _get_executor(
+        max_workers, use_mpi, if_serial, pool
+    )
+    if not chunksize:
+        chunksize = set_default_chunksize(s, max_workers)
+
+    if not use_mpi:
+        f = PicklableAndCallable(f)
+
+    with executor as executor:
+        for result in executor.map(f, s, chunksize=chunksize):
+            yield result
+
+
+def as_completed(
+    f,
+    s,
+    max_workers=None,
+    use_mpi=False,
+    if_serial="raise",
+    costs=None,
+    max_retries=2,
+    pool=None,
+    max_pending=None,
+    ordered=False,
+):
+    """dynamically scheduled parallel map, yielding results as they complete
+
+    Parameters
+    ----------
+    f : callable
+        function that operates on values in s
+    s : iterable
+        series of inputs to f. Unless costs are provided, elements are taken
+        from s only as they are submitted, so s can be a generator.
+    max_workers : int or None
+        maximum number of workers. Defaults to 1-maximum available.
+    use_mpi : bool
+        use MPI for parallel execution
+    if_serial : str
+        action to take if conditions will result in serial execution. Valid
+        values are 'raise', 'ignore', 'warn'. Defaults to 'raise'.
+    costs : callable, series or None
+        estimated relative cost of f(s[i]), either as a series matching s or a
+        function applied to each element of s. The most costly are submitted
+        first.
+    max_retries : int
+        number of times an element is resubmitted after the worker process
+        evaluating it died
+    pool : WorkerPool or None
+        an existing pool of workers to use. If provided, max_workers and
+        use_mpi are taken from the pool.
+    max_pending : int or None
+        maximum number of elements submitted but not yet yielded. Defaults to
+        twice max_workers.
+    ordered : bool
+        if True, results are yielded in the order elements were submitted.
+        Completed results held back count towards max_pending.
+
+    Returns
+    -------
+    generator yielding (i, f(s[i])) in order of completion
+
+    Notes
+    -----
+    Elements are submitted individually, so a worker takes the next element
+    when it finishes its current one. This suits elements whose costs vary
+    widely. If a worker process dies, a new pool is created and the
+    unfinished elements are resubmitted. A RuntimeError is raised once an
+    element exceeds max_retries.
+    """
+    if pool is None:
+        max_workers = _get_max_workers(max_workers, use_mpi, if_serial)
+    else:
+        max_workers, use_mpi = pool.max_workers, pool.use_mpi
+
+    if costs is not None:
+        s = list(s)
+        if callable(costs):
+            costs = [costs(e) for e in s]
+        assert len(costs) == len(s), "costs and s must have the same length"
+        order = sorted(range(len(s)), key=lambda i: costs[i], reverse=True)
+        elements = ((i, s[i]) for i in order)
+    else:
+        elements = enumerate(s)
+
+    # elements are (rank, index, value), rank being the order of submission
+    ranks = itertools.count()
+    todo = deque()
+    attempts = defaultdict(int)
+
+    def have_todo():
+        if not todo:
+            element = next(elements, None)
+            if element is not None:
+                todo.append((next(ranks), *element))
+        return len(todo) > 0
 
+    if not use_mpi:
         f = PicklableAndCallable(f)
 
-        with concurrentfutures.ProcessPoolExecutor(max_workers) as executor:
-            for result in executor.map(f, s, chunksize=chunksize):
-                yield result
+    if max_pending is None:
+        max_pending = 2 * max(1, max_workers)
+    max_pending = max(1, max_pending)
+
+    # results completed out of order, by rank
+    held = {}
+    next_rank = 0
+
+    def release(rank, index, result):
+        nonlocal next_rank
+        if not ordered:
+            yield index, result
+            return
+
+        held[rank] = index, result
+        while next_rank in held:
+            yield held.pop(next_rank)
+            next_rank += 1
+
+    def can_submit(pending):
+        if ordered:
+            # a window from the earliest result not yet yielded, so held
+            # results are bounded and that earliest element is always admitted
+            return todo[0][0] < next_rank + max_pending
+        return len(pending) < max_pending
+
+    while have_todo():
+        pending = {}
+        _, _, executor = _get_executor(max_workers, use_mpi, if_serial, pool)
+        try:
+            with executor as executor:
+                try:
+                    while have_todo() or pending:
+                        while have_todo() and can_submit(pending):
+                            # only taken from todo once submitted, in case the
+                            # executor broke since the last completion
+                            future = executor.submit(f, todo[0][2])
+                            pending[future] = todo.popleft()
+
+                        done, _ = concurrentfutures.wait(
+                            pending, return_when=concurrentfutures.FIRST_COMPLETED
+                        )
+                        # futures that completed together, in order of submission
+                        for future in sorted(done, key=lambda x: pending[x][0]):
+                            result = future.result()
+                            rank, index, _ = pending.pop(future)
+                            yield from release(rank, index, result)
+                except concurrentfutures.BrokenExecutor:
+                    raise
+                except BaseException:
+                    # the caller stopped early or an element failed, so stop
+                    # work that will not be collected instead of waiting on it
+                    for future in pending:
+                        future.cancel()
+                    if pool is None:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        except concurrentfutures.BrokenExecutor as err:
+            retry = []
+            for future, element in pending.items():
+                rank, index, _ = element
+                if future.done() and not future.exception():
+                    yield from release(rank, index, future.result())
+                    continue
+
+                attempts[index] += 1
+                if attempts[index] > max_retries:
+                    raise RuntimeError(
+                        f"worker died {attempts[index]} times evaluating s[{index}]"
+                    ) from err
+                retry.append(element)
+
+            if not retry and todo:
+                # nothing was lost, so the executor broke on submitting the
+                # next element, which is charged with the attempt
+                index = todo[0][1]
+                attempts[index] += 1
+                if attempts[index] > max_retries:
+                    raise RuntimeError(
+                        f"executor broke {attempts[index]} times submitting s[{index}]"
+                    ) from err
+
+            # resubmit in order of submission
+            todo.extendleft(sorted(retry, key=itemgetter(0), reverse=True))
+            pending = {}
+            if pool is not None:
+                pool.restart()
 
 
 @extend_docstring_from(imap)
-def map(f, s, max_workers=None, use_mpi=False, if_serial="raise", chunksize=None):
-    return list(imap(f, s, max_workers, use_mpi, if_serial, chunksize))
+def map(
+    f,
+    s,
+    max_workers=None,
+    use_mpi=False,
+    if_serial="raise",
+    chunksize=None,
+    pool=None,
+):
+    return list(imap(f, s, max_workers, use_mpi, if_serial, chunksize, pool))
@@ -1,4 +1,5 @@
 import functools
+import inspect
 import io
 import sys
 import threading
@@ -128,7 +129,9 @@ class ProgressContext:
         else:
             print(*args, **kw)
 
-    def imap(self, f, s, mininterval=1.0, parallel=False, par_kw=None, **kw):
+    def imap(
+        self, f, s, mininterval=1.0, parallel=False, par_kw=None, count=None, **kw
+    ):
         self.mininterval = mininterval
         if parallel:
             # todo document parallel.map arguments
@@ -136,12 +139,24 @@ class ProgressContext:
             results = PAR.imap(f, s, **par_kw)
         else:
             results = map(f, s)
-        for result in self.series(results, count=len(s), **kw):
+        count = len(s) if count is None else count
+        for result in self.series(results, count=count, **kw):
             yield result
 
     def map(self, f, s, **kw):
         return list(self.imap(f, s, **kw))
 
+    def as_completed(self, f, s, mininterval=1.0, par_kw=None, count=None, **kw):
+        """parallel evaluation of f on s yielding (index, result) in order of
+        completion, see parallel.as_completed. count is the expected number
+        of results, required if s has no length."""
+        self.mininterval = mininterval
+        par_kw = par_kw or {}
+        results = PAR.as_completed(f, s, **par_kw)
+        count = len(s) if count is None else count
+        for result in self.series(results, count=count, **kw):
+            yield result
+
 
 class NullContext(ProgressContext):
     """A UI context which discards all output.  Useful on secondary MPI cpus,
@@ -175,8 +190,8 @@ def display_wrap(slow_function):
     The function will receive an extra argument, 'ui',
     which is used to report progress etc."""
 
-    @functools.wraps(slow_function)
-    def f(*args, **kw):
+    def enter(kw):
+        """makes the context for a call, returns it and the parent"""
         if getattr(CURRENT, "context", None) is None:
             if sys.stdout.isatty():
                 klass = tqdm
@@ -198,6 +213,25 @@ def display_wrap(slow_function):
         else:
             subcontext = parent.subcontext()
         kw["ui"] = CURRENT.context = subcontext
+        return parent, subcontext
+
+    if inspect.isgeneratorfunction(slow_function):
+        # the context is entered on the first next() and exited when the
+        # generator is exhausted or closed, not when it is created
+        @functools.wraps(slow_function)
+        def g(*args, **kw):
+            parent, subcontext = enter(kw)
+            try:
+                yield from slow_function(*args, **kw)
+            finally:
+                CURRENT.context = parent
+                subcontext.done()
+
+        return g
+
+    @functools.wraps(slow_function)
+    def f(*args, **kw):
+        parent, subcontext = enter(kw)
         try:
             result = slow_function(*args, **kw)
         finally:
@@ -36,11 +36,6 @@ from cogent3.util.union_dict import UnionDict
 from cogent3.util.warning import deprecated
 
 
-try:
-    from IPython.display import display
-except ImportError:
-    display = lambda x: print(repr(x))
-
 __author__ = "Gavin Huttley"
 __copyright__ = "Copyright 2007-2020, The Cogent Project"
 __credits__ = ["Gavin Huttley", "Felix Schill"]
@@ -50,6 +45,17 @@ __maintainer__ = "Gavin Huttley"
 __email__ = "gavin.huttley@anu.edu.au"
 __status__ = "Production"
 
+
+def display(obj):
+    """displays obj using IPython, if available, otherwise prints its repr"""
+    # IPython is slow to import, so we defer doing so until it's needed
+    try:
+        from IPython.display import display as _display
+    except ImportError:
+        _display = lambda x: print(repr(x))
+    _display(obj)
+
+
 # making reversed characters for use in reverse order sorting
 _all_chrs = [chr(i) for i in range(256)]
 _all_chrs.reverse()
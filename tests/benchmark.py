@@ -180,6 +180,75 @@ def exponentiator_switch(switch):
     cogent3.evolve.substitution_calculation.use_new = switch
 
 
+def compiled_benchmarks(taxa=20, lengths=(18, 300, 2004)):
+    """compares evaluations per second of the likelihood function when the
+    Calculator interprets each program with running its compiled form"""
+    from cogent3 import get_model
+    from cogent3.recalculation.calculation import Calculator
+
+    names, tree = subtree(taxa)
+    sm = get_model("HKY85")
+    print("HKY85, %d taxa, evaluations per second" % taxa)
+    print("%-8s %12s %12s" % ("length", "interpreted", "compiled"))
+    for length in lengths:
+        aln = ALIGNMENT.take_seqs(names).omit_gap_pos()[:length]
+        lf = sm.make_likelihood_function(tree)
+        lf.set_alignment(aln)
+        speeds = []
+        for compiled in (False, True):
+            Calculator.compile_programs = compiled
+            speeds.append(lf.measure_evals_per_second(time_limit=2.0, wall=True))
+        print("%-8d %12d %12d" % (length, *speeds))
+    Calculator.compile_programs = True
+
+
+def distance_benchmarks(repeats=3):
+    """compares filling diversity matrices one pair at a time with filling
+    the stack for all pairs in one call"""
+    import time
+
+    from numpy import float64, triu_indices, zeros
+
+    from cogent3.evolve.fast_distance import (
+        TN93Pair,
+        fill_diversity_matrices,
+        fill_diversity_matrix,
+    )
+
+    calc = TN93Pair(alignment=ALIGNMENT)
+    seqs = calc.indexed_seqs
+    seqs1, seqs2 = triu_indices(len(seqs), k=1)
+    print(
+        "%d pairs, alignment length %d, best of %d"
+        % (len(seqs1), seqs.shape[1], repeats)
+    )
+
+    def per_pair():
+        matrix = zeros((4, 4), float64)
+        for i, j in zip(seqs1, seqs2):
+            matrix.fill(0)
+            fill_diversity_matrix(matrix, seqs[i], seqs[j])
+
+    def all_pairs():
+        matrices = zeros((len(seqs1), 4, 4), float64)
+        fill_diversity_matrices(matrices, seqs, seqs1, seqs2)
+
+    def tn93_run():
+        calc.run(show_progress=False)
+
+    for label, func in [
+        ("per pair fill", per_pair),
+        ("all pairs fill", all_pairs),
+        ("TN93 run", tn93_run),
+    ]:
+        times = []
+        for _ in range(repeats):
+            start = time.time()
+            func()
+            times.append(time.time() - start)
+        print("%-15s %.4f sec" % (label, min(times)))
+
+
 if "relative" in sys.argv:
     test = CompareImplementations(exponentiator_switch)
 else:
@@ -187,7 +256,11 @@ else:
 
 parallel.inefficiency_forgiven = True
 
-if parallel.get_rank() > 0:
+if "distance" in sys.argv:
+    distance_benchmarks()
+elif "compiled" in sys.argv:
+    compiled_benchmarks()
+elif parallel.get_rank() > 0:
     # benchmarks(test)
     quiet(benchmarks, test)
 else:
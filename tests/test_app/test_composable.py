@@ -1,3 +1,4 @@
+import json
 import os
 
 from tempfile import TemporaryDirectory
@@ -122,6 +123,213 @@ class TestComposableBase(TestCase):
         with self.assertRaises(ValueError):
             proc.apply_to(["", ""])
 
+    def test_apply_to_bounded(self):
+        """apply_to with max_in_flight gives same results as without"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        reader = io_app.load_unaligned(format="fasta", moltype="dna")
+        min_length = sample_app.min_length(10)
+        proc = reader + min_length
+        expect = proc.apply_to(dstore, show_progress=False)
+        for max_in_flight in (1, 2, 5):
+            got = proc.apply_to(
+                dstore, show_progress=False, max_in_flight=max_in_flight
+            )
+            self.assertEqual([s.to_dict() for s in got], [s.to_dict() for s in expect])
+
+        with self.assertRaises(ValueError):
+            proc.apply_to(dstore, show_progress=False, max_in_flight=0)
+
+        # only counts are returned
+        got = proc.apply_to(dstore, show_progress=False, return_results=False)
+        self.assertEqual(got, {"completed": 3, "not_completed": 0})
+        proc.disconnect()
+        min_length = sample_app.min_length(3000)
+        proc = reader + min_length
+        got = proc.apply_to(
+            dstore, show_progress=False, return_results=False, max_in_flight=2
+        )
+        self.assertEqual(got, {"completed": 0, "not_completed": 3})
+
+    def test_apply_to_serialise_in_workers(self):
+        """results serialised in workers are written by the master"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        reader = io_app.load_aligned(format="fasta", moltype="dna")
+        min_length = sample_app.min_length(10)
+        expect = {}
+        for member in dstore:
+            result = min_length(reader(member))
+            if result:
+                expect[member.name.replace("fasta", "json")] = result.to_dict()
+
+        loader = io_app.load_db()
+        with TemporaryDirectory(dir=".") as dirname:
+            for suffix in ("tinydb", "sqlitedb"):
+                outpath = os.path.join(os.getcwd(), dirname, f"delme.{suffix}")
+                writer = io_app.write_db(outpath)
+                process = reader + min_length + writer
+                got = process.apply_to(
+                    dstore,
+                    show_progress=False,
+                    parallel=True,
+                    serialise_in_workers=True,
+                    max_in_flight=2,
+                )
+                self.assertEqual(len(got), 3)
+                self.assertEqual(len(process.data_store), len(expect))
+                self.assertEqual(len(process.data_store.incomplete), 3 - len(expect))
+                self.assertEqual(len(process.data_store.logs), 1)
+                got = {m.name: loader(m).to_dict() for m in process.data_store}
+                self.assertEqual(got, expect)
+                process.data_store.close()
+                process.disconnect()
+
+    def test_apply_to_bounded_single_pool(self):
+        """bounded parallel apply_to feeds one pool of workers"""
+        from unittest.mock import patch
+
+        from cogent3.util import parallel
+
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        reader = io_app.load_unaligned(format="fasta", moltype="dna")
+        proc = reader + sample_app.min_length(10)
+        expect = [s.to_dict() for s in proc.apply_to(dstore, show_progress=False)]
+        for schedule in ("static", "dynamic"):
+            with patch.object(
+                parallel, "_make_executor", wraps=parallel._make_executor
+            ) as make_executor:
+                got = proc.apply_to(
+                    dstore,
+                    show_progress=False,
+                    parallel=True,
+                    max_in_flight=1,
+                    par_kw=dict(schedule=schedule, max_workers=1),
+                )
+            self.assertEqual(make_executor.call_count, 1)
+            got = [s.to_dict() for s in got]
+            if schedule == "static":
+                self.assertEqual(got, expect)
+            else:
+                self.assertEqual(sorted(map(str, got)), sorted(map(str, expect)))
+
+    def test_iter_apply_to_progress_closed(self):
+        """progress bars made while iterating are closed when exhausted"""
+        from cogent3.util import progress_display as UI
+
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        reader = io_app.load_unaligned(format="fasta", moltype="dna")
+        bar_type = Mock()
+        UI.CURRENT.context = UI.ProgressContext(bar_type)
+        try:
+            got = reader.iter_apply_to(dstore, max_in_flight=1)
+            self.assertEqual(bar_type.call_count, 0)
+            self.assertEqual(len(list(got)), 3)
+        finally:
+            UI.CURRENT.context = None
+        bar_type.return_value.close.assert_called_once()
+
+    def test_serialise_in_workers_unpicklable_callback(self):
+        """a name_callback that cannot be pickled is applied by the master"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=2)
+        reader = io_app.load_aligned(format="fasta", moltype="dna")
+        with TemporaryDirectory(dir=".") as dirname:
+            outpath = os.path.join(os.getcwd(), dirname, "delme.sqlitedb")
+            # applied to both data store members and alignments
+            name_callback = lambda x: "renamed-" + os.path.basename(
+                str(getattr(x, "info", {}).get("source", x))
+            )
+            writer = io_app.write_db(outpath, name_callback=name_callback)
+            process = reader + writer
+            with self.assertWarns(UserWarning):
+                got = process.apply_to(
+                    dstore,
+                    show_progress=False,
+                    parallel=True,
+                    serialise_in_workers=True,
+                    logger=False,
+                )
+            self.assertEqual(len(got), 2)
+            names = [m.name for m in process.data_store]
+            self.assertTrue(all(n.startswith("renamed-") for n in names))
+            process.data_store.close()
+
+    def test_serialising_process_validates_type(self):
+        """results are checked against the writer's data types in workers"""
+        from pickle import dumps, loads
+
+        from cogent3.app.composable import _SerialisedResult, _SerialisingProcess
+
+        mapped = _SerialisingProcess(
+            str.upper, json.dumps, data_types=["ArrayAlignment"], origin="write_db"
+        )
+        got = loads(dumps(mapped))("abc")
+        self.assertIsInstance(got, NotCompleted)
+        self.assertEqual(got.origin, "write_db")
+        mapped = _SerialisingProcess(str.upper, json.dumps, data_types=["str"])
+        got = mapped("abc")
+        self.assertIsInstance(got, _SerialisedResult)
+        self.assertEqual(got.data, json.dumps("ABC"))
+
+    def test_apply_to_dynamic_schedule(self):
+        """dynamic schedule returns results in order of completion"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        reader = io_app.load_aligned(format="fasta", moltype="dna")
+        min_length = sample_app.min_length(10)
+        with TemporaryDirectory(dir=".") as dirname:
+            outpath = os.path.join(os.getcwd(), dirname, "delme.tinydb")
+            writer = io_app.write_db(outpath)
+            process = reader + min_length + writer
+            par_kw = dict(schedule="dynamic", costs=os.path.getsize)
+            got = process.apply_to(
+                dstore, show_progress=False, parallel=True, par_kw=par_kw
+            )
+            expect = [m.name.replace("fasta", "json") for m in dstore]
+            self.assertEqual(sorted(got), sorted(expect))
+            self.assertEqual(len(process.data_store), 3)
+            # inputs and outputs are correctly paired in the log
+            log = process.data_store.logs[0].read()
+            for name in expect:
+                self.assertIn(name, log)
+            process.data_store.close()
+
+    def test_background_writer(self):
+        """writes from a separate thread, errors raised in caller"""
+        from cogent3.app.composable import _BackgroundWriter
+
+        with TemporaryDirectory(dir=".") as dirname:
+            outpath = os.path.join(dirname, "delme.sqlitedb")
+            writer = io_app.write_db(outpath)
+            bg_writer = _BackgroundWriter(writer.data_store, maxsize=2)
+            for i in range(5):
+                bg_writer.put(f"{i}.json", str(i))
+            bg_writer.join()
+            self.assertEqual(len(writer.data_store), 5)
+            bg_writer.put("bad.json", object())  # not serialisable
+            with self.assertRaises(TypeError):
+                bg_writer.close()
+            writer.data_store.close()
+
+    def test_iter_apply_to(self):
+        """iter_apply_to yields results lazily and logs correctly"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
+        with TemporaryDirectory(dir=".") as dirname:
+            reader = io_app.load_aligned(format="fasta", moltype="dna")
+            min_length = sample_app.min_length(10)
+            outpath = os.path.join(os.getcwd(), dirname, "delme.tinydb")
+            writer = io_app.write_db(outpath)
+            process = reader + min_length + writer
+            got = process.iter_apply_to(dstore, show_progress=False, max_in_flight=1)
+            self.assertNotIsInstance(got, list)
+            got = list(got)
+            self.assertEqual(len(got), 3)
+            self.assertEqual(len(process.data_store), 3)
+            self.assertEqual(len(process.data_store.logs), 1)
+            # input is reconnected
+            self.assertIs(process.input, min_length)
+            # all done, so nothing further is yielded
+            got = list(process.iter_apply_to(dstore, show_progress=False))
+            self.assertEqual(got, [])
+            process.data_store.close()
+
     def test_apply_to_strings(self):
         """apply_to handles strings as paths"""
         dstore = io_app.get_data_store("data", suffix="fasta", limit=3)
@@ -175,6 +383,35 @@ class TestComposableBase(TestCase):
             self.assertEqual(len(process.data_store.incomplete), 3)
             process.data_store.close()
 
+    def test_cache(self):
+        """results of a cached app are loaded instead of recomputed"""
+        dstore = io_app.get_data_store("data", suffix="fasta", limit=2)
+        with TemporaryDirectory(dir=".") as dirname:
+            reader = io_app.load_aligned(format="fasta", moltype="dna")
+            degen = sample_app.omit_degenerates(moltype="dna")
+            min_length = sample_app.min_length(10)
+            process = reader + degen + min_length
+            degen.set_cache(dirname)
+            expect = process.apply_to(dstore, show_progress=False)
+            self.assertEqual(len(degen.cache), 2)
+            # no step up to the cached one is called when result is in the cache
+            reader.func = Mock(side_effect=AssertionError)
+            degen.func = Mock(side_effect=AssertionError)
+            got = process.apply_to(dstore, show_progress=False)
+            self.assertEqual([a.to_dict() for a in got], [a.to_dict() for a in expect])
+            self.assertEqual(got[0].info.source, expect[0].info.source)
+
+            # changing an upstream setting changes the key
+            process.disconnect()
+            process = io_app.load_aligned(format="fasta", moltype="rna") + degen
+            got = process(dstore[0])
+            self.assertIsInstance(got, NotCompleted)
+            self.assertEqual(len(degen.cache), 2)
+
+            # removing the cache
+            degen.set_cache(None)
+            self.assertIsNone(degen.cache)
+
 
 class TestNotCompletedResult(TestCase):
     def test_err_result(self):
@@ -10,10 +10,13 @@ from cogent3.app.data_store import (
     OVERWRITE,
     DataStoreMember,
     ReadOnlyDirectoryDataStore,
+    ReadOnlySqliteDataStore,
     ReadOnlyTinyDbDataStore,
     ReadOnlyZippedDataStore,
+    ResultCache,
     SingleReadDataStore,
     WritableDirectoryDataStore,
+    WritableSqliteDataStore,
     WritableTinyDbDataStore,
     WritableZippedDataStore,
 )
@@ -677,6 +680,165 @@ class TinyDBDataStoreTests(TestCase):
             dstore.close()
 
 
+class SqliteDataStoreTests(TinyDBDataStoreTests):
+    ReadClass = ReadOnlySqliteDataStore
+    WriteClass = WritableSqliteDataStore
+
+    def test_pickleable_roundtrip(self):
+        """pickling of data stores should be reversible"""
+        from pickle import dumps, loads
+
+        with TemporaryDirectory(dir=".") as dirname:
+            path = os.path.join(dirname, "data")
+            dstore = self.WriteClass(path, if_exists="ignore", compress="zlib")
+            for id_, data in self.data.items():
+                identifier = dstore.make_relative_identifier(id_)
+                dstore.write(identifier, data)
+            dstore.commit()  # make sure written to disk
+            re_dstore = loads(dumps(dstore))
+            self.assertEqual(re_dstore.compress, "zlib")
+            got = re_dstore[0].read()
+            self.assertEqual(str(dstore), str(re_dstore))
+            self.assertEqual(got, dstore[0].read())
+            re_dstore.close()
+            dstore.close()
+
+    def test_tiny_write_incomplete(self):
+        """write an incomplete result to sqlite"""
+        from cogent3.app.composable import NotCompleted
+
+        keys = list(self.data)
+        incomplete = [
+            keys.pop(0),
+            NotCompleted("FAIL", "somefunc", "checking", source="testing.txt"),
+        ]
+        with TemporaryDirectory(dir=".") as dirname:
+            path = os.path.join(dirname, self.basedir)
+            dstore = self.WriteClass(path, if_exists="overwrite")
+            id_ = dstore.make_relative_identifier(incomplete[0])
+            dstore.write_incomplete(id_, incomplete[1])
+            for k in keys:
+                id_ = dstore.make_relative_identifier(k)
+                dstore.write(id_, self.data[k])
+            dstore.close()
+
+            # all records are contained
+            dstore = self.ReadClass(path)
+            for k in self.data:
+                id_ = f"{k.split('.')[0]}.json"
+                self.assertTrue(id_ in dstore)
+
+            # but len(dstore) reflects only members with completed==True
+            self.assertEqual(len(dstore), len(keys))
+            got = dstore.incomplete[0].read()
+            self.assertTrue("notcompleted" in got["type"].lower())
+            # and the incomplete member is not returned by get_member
+            self.assertIsNone(dstore.get_member(incomplete[0]))
+            dstore.close()
+
+    def test_dblock(self):
+        """locking/unlocking of db"""
+        from cogent3.app.data_store import _sqlite_lockid
+        from pathlib import Path
+
+        keys = list(self.data)
+        with TemporaryDirectory(dir=".") as dirname:
+            path = os.path.join(dirname, self.basedir)
+            dstore = self.WriteClass(path, if_exists="overwrite")
+            for k in keys:
+                id_ = dstore.make_relative_identifier(k)
+                dstore.write(id_, self.data[k])
+            self.assertTrue(dstore.locked)
+            dstore.unlock(force=True)
+            # now introduce an artificial lock
+            dstore.db.execute("INSERT INTO lock (pid) VALUES (123)")
+            dstore.commit()
+            self.assertTrue(dstore.locked)
+            self.assertEqual(_sqlite_lockid(dstore.source), 123)
+            # now calling _source_create_delete with overwrite should have no
+            # effect
+            dstore._source_create_delete("overwrite", False)
+            path = Path(dstore.source)
+            self.assertTrue(path.exists())
+            # unlocking with wrong pid has no effect
+            dstore.unlock()
+            self.assertTrue(dstore.locked)
+            # but we can force it
+            dstore.unlock(force=True)
+            self.assertFalse(dstore.locked)
+            dstore.close()
+            # and now a call to _source_create_delete will delete
+            dstore._source_create_delete("overwrite", False)
+            self.assertFalse(path.exists())
+            dstore.close()
+
+    def test_read_only_unmodified(self):
+        """opening a read only store does not write to the database"""
+        import sqlite3
+
+        from pathlib import Path
+
+        keys = list(self.data)
+        with TemporaryDirectory(dir=".") as dirname:
+            path = os.path.join(dirname, self.basedir)
+            dstore = self.WriteClass(path, if_exists="overwrite")
+            for k in keys:
+                dstore.write(dstore.make_relative_identifier(k), self.data[k])
+            dstore.close()
+            db = sqlite3.connect(dstore.source)
+            db.execute("PRAGMA journal_mode=DELETE")
+            db.close()
+            expect = Path(dstore.source).read_bytes()
+
+            dstore = self.ReadClass(path)
+            self.assertEqual(len(dstore), len(keys))
+            self.assertFalse(dstore.locked)
+            dstore.close()
+            self.assertEqual(Path(dstore.source).read_bytes(), expect)
+            db = sqlite3.connect(dstore.source)
+            mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+            db.close()
+            self.assertEqual(mode, "delete")
+
+            # a missing path is not created
+            missing = os.path.join(dirname, "missing")
+            dstore = self.ReadClass(missing)
+            with self.assertRaises(FileNotFoundError):
+                len(dstore)
+            self.assertFalse(os.path.exists(dstore.source))
+
+    def test_compress(self):
+        """records are compressed on write and transparently decompressed"""
+        from cogent3.app.composable import NotCompleted
+
+        keys = list(self.data)
+        with TemporaryDirectory(dir=".") as dirname:
+            for compress in (None, "zlib", "lzma"):
+                path = os.path.join(dirname, f"{compress}")
+                dstore = self.WriteClass(
+                    path, if_exists="overwrite", compress=compress, batch_size=2
+                )
+                for k in keys:
+                    id_ = dstore.make_relative_identifier(k)
+                    dstore.write(id_, self.data[k])
+                dstore.write_incomplete(
+                    "failed.json",
+                    NotCompleted("FAIL", "somefunc", "checking", source="failed"),
+                )
+                dstore.close()
+
+                dstore = self.ReadClass(path)
+                self.assertEqual(len(dstore), len(keys))
+                for k in keys:
+                    got = dstore.get_member(f"{k.split('.')[0]}.json").read()
+                    self.assertEqual(got, self.data[k])
+                self.assertEqual(dstore.summary_incomplete.shape, (1, 5))
+                dstore.close()
+
+            with self.assertRaises(ValueError):
+                self.WriteClass(path, if_exists="overwrite", compress="gzip")
+
+
 class SingleReadStoreTests(TestCase):
     basedir = f"data{os.sep}brca1.fasta"
     Class = SingleReadDataStore
@@ -710,5 +872,71 @@ class SingleReadStoreTests(TestCase):
         self.assertEqual(got, expect)
 
 
+class ResultCacheTests(TestCase):
+    def test_put_get(self):
+        """stored results are deserialised"""
+        from cogent3 import make_aligned_seqs
+
+        aln = make_aligned_seqs(data=dict(a="ACGG", b="ACGT"), moltype="dna")
+        with TemporaryDirectory(dir=".") as dirname:
+            cache = ResultCache(dirname)
+            key = cache.make_key("app", "md5")
+            self.assertNotIn(key, cache)
+            self.assertIsNone(cache.get(key))
+            cache.put(key, aln)
+            self.assertIn(key, cache)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.get(key).to_dict(), aln.to_dict())
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+
+    def test_evict(self):
+        """least recently used results are deleted when max_size exceeded"""
+        from cogent3 import make_aligned_seqs
+
+        aln = make_aligned_seqs(data=dict(a="ACGG", b="ACGT"), moltype="dna")
+        with TemporaryDirectory(dir=".") as dirname:
+            cache = ResultCache(dirname)
+            keys = [cache.make_key(i) for i in range(3)]
+            for i, key in enumerate(keys):
+                cache.put(key, aln)
+                # distinct access times
+                os.utime(cache._make_path(key), (i, i))
+            size = cache.size
+            # using key 0 makes key 1 the least recently used
+            cache.get(keys[0])
+            cache.evict(size * 2 // 3)
+            self.assertEqual(len(cache), 2)
+            self.assertNotIn(keys[1], cache)
+            # max_size is applied on put
+            cache = ResultCache(dirname, max_size=size // 3)
+            cache.put(keys[1], aln)
+            self.assertEqual(len(cache), 1)
+            self.assertIn(keys[1], cache)
+
+    def test_put_scans_only_to_evict(self):
+        """the cache directory is only scanned when max_size is exceeded"""
+        from unittest.mock import patch
+
+        from cogent3 import make_aligned_seqs
+
+        aln = make_aligned_seqs(data=dict(a="ACGG", b="ACGT"), moltype="dna")
+        with TemporaryDirectory(dir=".") as dirname:
+            cache = ResultCache(dirname, max_size=10 ** 6)
+            cache.put(cache.make_key(0), aln)
+            size = cache.size
+            cache.max_size = size * 3
+            with patch.object(cache, "_entries", wraps=cache._entries) as entries:
+                for i in range(3):
+                    cache.put(cache.make_key(i), aln)
+                # replacing key 0 did not add to the total
+                self.assertEqual(entries.call_count, 0)
+                self.assertEqual(cache._size, size * 3)
+                cache.put(cache.make_key(3), aln)
+                self.assertEqual(entries.call_count, 1)
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(cache._size, cache.size)
+
+
 if __name__ == "__main__":
     main()
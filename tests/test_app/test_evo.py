@@ -6,7 +6,7 @@ from numpy.testing import assert_allclose, assert_raises
 
 from cogent3 import load_aligned_seqs, make_aligned_seqs, make_tree
 from cogent3.app import evo as evo_app
-from cogent3.app.result import hypothesis_result
+from cogent3.app.result import hypothesis_result, model_result
 from cogent3.evolve.models import get_model
 from cogent3.util.deserialise import deserialise_object
 
@@ -37,7 +37,8 @@ class TestModel(TestCase):
                 "name=None, sm_args=None, lf_args=None, "
                 "time_het='max', param_rules=None, "
                 "opt_args=None, split_codons=False, "
-                "show_progress=False, verbose=False)"
+                "show_progress=False, verbose=False, profile=False, "
+                "warm_start=False)"
             ),
         )
 
@@ -135,7 +136,8 @@ class TestModel(TestCase):
             "alternates=(model(type='model', sm='HKY85', tree=None, "
             "name='hky85-max-het', sm_args=None, lf_args=None, "
             "time_het='max', param_rules=None, opt_args=None,"
-            " split_codons=False, show_progress=False, verbose=False),),"
+            " split_codons=False, show_progress=False, verbose=False,"
+            " profile=False, warm_start=False),),"
             " init_alt=None)"
         )
         self.assertEqual(got, expect)
@@ -159,6 +161,57 @@ class TestModel(TestCase):
         aln1 = result.lf[1].get_param_value("alignment").to_dict()
         self.assertEqual(aln1, aln[::3].to_dict())
 
+    def test_model_profile(self):
+        """model_result has a profile table if requested"""
+        _data = {
+            "Human": "ATGCGGCTCGCGGAGGCCGCGCTCGCGGAG",
+            "Mouse": "ATGCCCGGCGCCAAGGCAGCGCTGGCGGAG",
+            "Opossum": "ATGCCAGTGAAAGTGGCGGCGGTGGCTGAG",
+        }
+        aln = make_aligned_seqs(data=_data, moltype="dna")
+        tree = make_tree(tip_names=aln.names)
+        opt_args = dict(max_evaluations=20, limit_action="ignore")
+        mod = evo_app.model("F81", tree=tree, opt_args=opt_args)
+        self.assertIsNone(mod(aln).profile)
+        mod = evo_app.model("F81", tree=tree, opt_args=opt_args, profile=True)
+        profile = mod(aln).profile
+        self.assertIn("psubs", profile.columns["name"])
+        mod = evo_app.model(
+            "F81", tree=tree, opt_args=opt_args, split_codons=True, profile=True
+        )
+        profile = mod(aln).profile
+        self.assertEqual(set(profile.columns["codon position"]), {"1", "2", "3"})
+
+    def test_model_warm_start(self):
+        """warm started fits match independent fits"""
+        aln = load_aligned_seqs("data/primate_brca1.fasta", moltype="dna")
+        aln = aln.take_seqs(["Human", "Rhesus", "Galago", "HowlerMon"])
+        alns = [aln[:600], aln[600:1200]]
+        tree = make_tree(tip_names=aln.names)
+        cold = evo_app.model("HKY85", tree=tree)
+        warm = evo_app.model("HKY85", tree=tree, warm_start=True)
+        results = [warm(a) for a in alns]
+        for a, got in zip(alns, results):
+            expect = cold(a)
+            assert_allclose(got.lnL, expect.lnL, rtol=1e-4)
+            self.assertEqual(got.nfp, expect.nfp)
+        # each result retains its own likelihood function
+        self.assertNotEqual(results[0].lnL, results[1].lnL)
+        assert_allclose(results[0].lf.lnL, results[0].lnL)
+        # the likelihood function is reused
+        self.assertEqual(len(warm._warm_lfs), 1)
+        # a different set of sequences gets a new likelihood function, and
+        # without a tree, a new tree
+        mod = evo_app.model("HKY85", warm_start=True)
+        for names in (["Human", "Rhesus", "Galago"], ["Human", "Rhesus", "HowlerMon"]):
+            sub = aln.take_seqs(names)[:600]
+            got = mod(sub)
+            self.assertIsInstance(got, model_result)
+            self.assertEqual(set(got.lf.seq_names), set(names))
+            expect = evo_app.model("HKY85")(sub)
+            assert_allclose(got.lnL, expect.lnL, rtol=1e-4)
+        self.assertEqual(len(mod._warm_lfs), 1)
+
     def test_split_codon_model_result_json(self):
         """round trip split_codon result"""
         _data = {
@@ -666,6 +719,25 @@ class TestBootstrap(TestCase):
         result = strapper(aln)
         self.assertIsInstance(result, evo_app.bootstrap_result)
 
+    def test_bstrap_pool(self):
+        """bootstrap uses a provided worker pool"""
+        from cogent3.util.parallel import WorkerPool
+
+        aln = load_aligned_seqs(join(data_dir, "brca1.fasta"), moltype="dna")
+        aln = aln.take_seqs(aln.names[:3])
+        aln = aln.omit_gap_pos(allowed_gap_frac=0)
+        opt_args = dict(max_evaluations=20, limit_action="ignore")
+        m1 = evo_app.model("F81", opt_args=opt_args)
+        m2 = evo_app.model("HKY85", opt_args=opt_args)
+        hyp = evo_app.hypothesis(m1, m2)
+        with WorkerPool(max_workers=1) as pool:
+            strapper = evo_app.bootstrap(
+                hyp, num_reps=2, parallel=True, par_kw=dict(pool=pool)
+            )
+            result = strapper(aln)
+            self.assertIsInstance(result, evo_app.bootstrap_result)
+            self.assertEqual(len(result.null_dist), 2)
+
 
 if __name__ == "__main__":
     main()
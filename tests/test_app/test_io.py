@@ -40,9 +40,15 @@ class TestIo(TestCase):
     basedir = "data"
 
     def tearDown(self) -> None:
-        path = pathlib.Path("delme.tinydb")
-        if path.exists():
-            path.unlink()
+        for name in (
+            "delme.tinydb",
+            "delme.sqlitedb",
+            "delme.sqlitedb-wal",
+            "delme.sqlitedb-shm",
+        ):
+            path = pathlib.Path(name)
+            if path.exists():
+                path.unlink()
 
     def test_findall(self):
         """find all files recursively"""
@@ -217,6 +223,25 @@ class TestIo(TestCase):
             dstore.close()
             self.assertEqual(got, data)
 
+    def test_write_db_load_db_sqlite(self):
+        """correctly write/load from a compressed sqlite db"""
+        with TemporaryDirectory(dir=".") as dirname:
+            outpath = join(dirname, "delme.sqlitedb")
+            writer = write_db(outpath, create=True, if_exists="ignore", compress="lzma")
+            data = dict(a=[1, 2], b="string")
+            m = writer(data, identifier=join("blah", "delme.json"))
+            writer.data_store.close()
+            dstore = io_app.get_data_store(outpath)
+            self.assertIsInstance(dstore, io_app.ReadOnlySqliteDataStore)
+            reader = io_app.load_db()
+            got = reader(dstore[0])
+            dstore.close()
+            self.assertEqual(got, data)
+
+        # compression is only supported by sqlite
+        with self.assertRaises(ValueError):
+            write_db("delme", compress="zlib")
+
     def test_load_db_failure_json_file(self):
         """informative load_db error message when given a json file path"""
         # todo this test has a trapped exception about being unable to delete
@@ -512,17 +537,18 @@ class TestIo(TestCase):
     def test_restricted_usage_of_tinydb_suffix(self):
         """can only use tinydb in a load_db, write_db context"""
         with TemporaryDirectory(dir=".") as dirname:
-            outdir = join(dirname, "delme.tinydb")
-            for writer_class in (
-                io_app.write_seqs,
-                io_app.write_json,
-                io_app.write_tabular,
-            ):
-                with self.assertRaises(ValueError):
-                    writer_class(outdir, create=True, if_exists="skip")
-            # but OK for write_db
-            w = io_app.write_db(outdir, create=True, if_exists="skip")
-            w.data_store.close()
+            for suffix in ("tinydb", "sqlitedb"):
+                outdir = join(dirname, f"delme.{suffix}")
+                for writer_class in (
+                    io_app.write_seqs,
+                    io_app.write_json,
+                    io_app.write_tabular,
+                ):
+                    with self.assertRaises(ValueError):
+                        writer_class(outdir, create=True, if_exists="skip")
+                # but OK for write_db
+                w = io_app.write_db(outdir, create=True, if_exists="skip")
+                w.data_store.close()
 
     def test_write_db_parallel(self):
         """writing with overwrite in parallel should reset db"""
@@ -530,20 +556,26 @@ class TestIo(TestCase):
         members = dstore.filtered(callback=lambda x: "brca1.fasta" not in x.split("/"))
         reader = io_app.load_unaligned()
         aligner = align_app.align_to_ref()
-        writer = write_db("delme.tinydb", create=True, if_exists="overwrite")
-        process = reader + aligner + writer
-
-        r = process.apply_to(members, logger=False, show_progress=False, parallel=True)
+        for name in ("delme.tinydb", "delme.sqlitedb"):
+            with TemporaryDirectory(dir=".") as dirname:
+                path = join(dirname, name)
+                writer = write_db(path, create=True, if_exists="overwrite")
+                process = reader + aligner + writer
+
+                r = process.apply_to(
+                    members, logger=False, show_progress=False, parallel=True
+                )
 
-        expect = [str(m) for m in process.data_store]
-        process.data_store.close()
+                expect = [str(m) for m in process.data_store]
+                process.data_store.close()
 
-        # now get read only and check what's in there
-        result = io_app.get_data_store("delme.tinydb")
-        got = [str(m) for m in result]
-        result.close()
+                # now get read only and check what's in there
+                result = io_app.get_data_store(path)
+                got = [str(m) for m in result]
+                result.close()
 
-        self.assertEqual(got, expect)
+                self.assertEqual(got, expect)
+                process.disconnect()
 
 
 if __name__ == "__main__":
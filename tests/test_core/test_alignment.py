@@ -21,9 +21,11 @@ from cogent3 import (
 )
 from cogent3.core.alignment import (
     Aligned,
+    AllowedCharacters,
     Alignment,
     ArrayAlignment,
     DataError,
+    GapsOk,
     SequenceCollection,
     _SequenceCollectionBase,
     aln_from_array,
@@ -34,6 +36,7 @@ from cogent3.core.alignment import (
     aln_from_fasta,
     aln_from_generic,
     coerce_to_string,
+    load_array_alignment,
     make_gap_filter,
     seqs_from_aln,
     seqs_from_array,
@@ -3163,6 +3166,119 @@ class ArrayAlignmentSpecificTests(TestCase):
         f = a.counts_per_seq(motif_length=2, exclude_unobserved=True)
         self.assertEqual(f.array, array([[1, 1, 0], [0, 1, 1]]))
 
+    def test_array_file(self):
+        """ArrayAlignment round trips via a memory mapped file"""
+        aln = load_aligned_seqs("data/brca1.fasta", moltype="dna")
+        fn = mktemp(suffix=".c3a")
+        aln.write_array(fn)
+        got = load_array_alignment(fn)
+        self.assertIsInstance(got.array_seqs, numpy.memmap)
+        self.assertEqual(got.names, aln.names)
+        self.assertEqual(got.moltype, aln.moltype)
+        self.assertEqual(got.to_dict(), aln.to_dict())
+        # these share the mapped data
+        names = aln.names[1:10:2]
+        views = [
+            got[10:100],
+            got.take_seqs(names),
+            got.filtered(lambda x: True),
+        ] + list(got.sliding_windows(100, 50))
+        for view in views:
+            self.assertTrue(numpy.shares_memory(view.array_seqs, got.array_seqs))
+        self.assertEqual(views[0].to_dict(), aln[10:100].to_dict())
+        self.assertEqual(views[1].to_dict(), aln.take_seqs(names).to_dict())
+        self.assertEqual(got.omit_gap_pos().to_dict(), aln.omit_gap_pos().to_dict())
+        # read only by default
+        with self.assertRaises(ValueError):
+            got.array_seqs[0, 0] = 0
+        del got, views
+        remove(fn)
+
+        with open(fn, "w") as out:
+            out.write(">a\nACGT\n")
+        with self.assertRaises(ValueError):
+            load_array_alignment(fn)
+        remove(fn)
+
+    def test_per_window(self):
+        """window statistics match those from sliding_windows"""
+        aln = load_aligned_seqs("data/brca1.fasta", moltype="dna")
+        aln = aln.take_seqs(aln.names[:10])[:400]
+        windows = list(aln.sliding_windows(50, 20, start=3))
+        # windows are views, matching an alignment constructed from the data
+        for w in windows:
+            self.assertTrue(numpy.shares_memory(w.array_seqs, aln.array_seqs))
+        view = windows[1]
+        expect = ArrayAlignment(
+            view.array_seqs.copy(),
+            names=aln.names,
+            moltype=aln.moltype,
+            force_same_data=True,
+        )
+        self.assertEqual(view.to_dict(), expect.to_dict())
+        self.assertEqual(view.seq_len, expect.seq_len)
+        self.assertEqual(view.array_positions.tolist(), expect.array_positions.tolist())
+        self.assertEqual(view[5:10].to_dict(), expect[5:10].to_dict())
+        self.assertIsNot(view.names, aln.names)
+        counts = aln.counts_per_window(50, 20, start=3)
+        self.assertEqual(counts.template.names[0], list(range(3, 351, 20)))
+        expect = [w.counts_per_pos().array.sum(axis=0) for w in windows]
+        self.assertEqual(counts.array, expect)
+        got = aln.entropy_per_window(50, 20, start=3)
+        expect = []
+        for w in windows:
+            c = w.counts_per_pos().array.sum(axis=0)
+            expect.append(safe_p_log_p(c / c.sum()).sum())
+        assert_allclose(got, expect)
+        got = aln.gap_frac_per_window(50, 20, start=3)
+        expect = [w.get_gap_array().mean() for w in windows]
+        assert_allclose(got.array, expect)
+        # no windows
+        self.assertIsNone(aln.counts_per_window(500, 10))
+        self.assertIsNone(aln.gap_frac_per_window(500, 10))
+
+    def test_counts_match_alignment(self):
+        """array based counts match those from Alignment"""
+        data = {"a": "AC-GTRNA-CAT", "b": "ACCGTA?ATCAT", "c": "TC-GNAAA-CTT"}
+        array_aln = ArrayAlignment(data, moltype=DNA)
+        aln = Alignment(data, moltype=DNA)
+        for motif_length in (1, 2, 3):
+            for include_ambiguity in (False, True):
+                for allow_gap in (False, True):
+                    kwargs = dict(
+                        motif_length=motif_length,
+                        include_ambiguity=include_ambiguity,
+                        allow_gap=allow_gap,
+                    )
+                    got = array_aln.counts_per_pos(**kwargs)
+                    expect = aln.counts_per_pos(**kwargs)
+                    self.assertEqual(len(set(got.motifs)), len(got.motifs))
+                    self.assertEqual(got.to_dict(), expect.to_dict())
+                    got = array_aln.counts_per_seq(**kwargs)
+                    expect = aln.counts_per_seq(**kwargs)
+                    self.assertEqual(got.motifs, expect.motifs)
+                    self.assertEqual(got.array, expect.array)
+
+    def test_get_identical_sets_all_columns_degenerate(self):
+        """grouping by hash matches pairwise comparison of degenerate seqs"""
+        # every column has a degenerate character, and b matches both a and
+        # c, which differ, so a is grouped with b and c is not
+        data = {
+            "a": "ACGT",
+            "b": "ACNT",
+            "c": "ACCT",
+            "d": "-CGT",
+            "e": "ACC-",
+            "f": "TCAN",
+            "g": "TNAG",
+        }
+        expect = [{"a", "b", "d"}, {"c", "e"}, {"f", "g"}]
+        expect = frozenset(frozenset(s) for s in expect)
+        for cls in (ArrayAlignment, Alignment):
+            got = cls(data, moltype=DNA).get_identical_sets(mask_degen=True)
+            got = frozenset(frozenset(s) for s in got)
+            self.assertEqual(got, expect)
+
     def test_entropy_per_pos(self):
         """entropy_per_pos should get entropy of each pos"""
         a = self.a
@@ -3215,6 +3331,31 @@ class ArrayAlignmentSpecificTests(TestCase):
         ]
         assert_allclose(f, e)
 
+    def test_filtered_array_mask(self):
+        """vectorised predicates match the per-column evaluation"""
+        aln = load_aligned_seqs("data/brca1.fasta", moltype="dna")
+        aln = aln.take_seqs(aln.names[:20])[:600]
+        alpha = aln.moltype.alphabets.degen_gapped
+        gaps = [alpha.index("-")]
+        chars = list(map(alpha.index, "ACGT"))
+        predicates = [
+            GapsOk(gaps, 0.1, is_array=True),
+            GapsOk(gaps, 0.1, is_array=True, negate=True),
+            AllowedCharacters(chars, is_array=True),
+            AllowedCharacters(gaps, is_array=True, negate=True),
+        ]
+        for motif_length in (1, 3):
+            for predicate in predicates:
+                predicate.motif_length = motif_length
+                self.assertIsNotNone(predicate.array_mask)
+                got = aln.filtered(predicate, motif_length=motif_length)
+                expect = aln.filtered(lambda x: predicate(x), motif_length=motif_length)
+                self.assertEqual(got.to_dict(), expect.to_dict())
+
+        # character based predicates evaluate per column
+        self.assertIsNone(AllowedCharacters("ACGT").array_mask)
+        self.assertIsNone(GapsOk("-").array_mask)
+
     def test_coevolution_segments(self):
         """specifying coordinate segments produces matrix with just those"""
         aln = load_aligned_seqs("data/brca1.fasta", moltype="dna")
@@ -16,6 +16,9 @@ from cogent3 import (
     make_aligned_seqs,
     make_unaligned_seqs,
 )
+from cogent3.evolve._pairwise_distance import (
+    _fill_diversity_matrices as pyx_fill_diversity_matrices,
+)
 from cogent3.evolve._pairwise_distance import (
     _fill_diversity_matrix as pyx_fill_diversity_matrix,
 )
@@ -29,9 +32,15 @@ from cogent3.evolve.fast_distance import (
     PercentIdentityPair,
     TN93Pair,
     _calculators,
+    _PairBlockStats,
+    _fill_diversity_matrices,
     _fill_diversity_matrix,
     _hamming,
     _jc69_from_matrix,
+    _logdet,
+    _logdet_from_matrices,
+    _paralinear,
+    _paralinear_from_matrices,
     _tn93_from_matrix,
     available_distances,
     get_distance_calculator,
@@ -133,6 +142,110 @@ class TestPair(TestCase):
         pyx_fill_diversity_matrix(matrix2, s1, s2)
         assert_allclose(matrix1, matrix2)
 
+    def test_fill_diversity_matrices(self):
+        """stack of diversity matrices matches per pair calculation"""
+        seqs = ["RACGTACGTACN", "AGTGTACGTACA", "AGTG-ACGTTCA"]
+        indexed = numpy.array([seq_to_indices(s, self.dna_char_indices) for s in seqs])
+        seqs1, seqs2 = numpy.triu_indices(3, k=1)
+        for fill in (_fill_diversity_matrices, pyx_fill_diversity_matrices):
+            got = numpy.zeros((3, 4, 4), float)
+            fill(got, indexed, seqs1, seqs2)
+            for k, (i, j) in enumerate(zip(seqs1, seqs2)):
+                expect = numpy.zeros((4, 4), float)
+                _fill_diversity_matrix(expect, indexed[i], indexed[j])
+                assert_equal(got[k], expect)
+
+    def test_python_vs_cython_fill_matrices(self):
+        """python & cython fill_diversity_matrices give same answer"""
+        aln = load_aligned_seqs("data/brca1_5.paml", moltype=DNA)
+        calc = TN93Pair(DNA, alignment=aln)
+        # indices >= dim are also invalid
+        indexed = calc.indexed_seqs.copy()
+        indexed[indexed < 0] = 4
+        seqs1, seqs2 = numpy.triu_indices(len(calc.names), k=1)
+        matrices1 = numpy.zeros((len(seqs1), 4, 4), float)
+        _fill_diversity_matrices(matrices1, indexed, seqs1, seqs2)
+        matrices2 = numpy.zeros((len(seqs1), 4, 4), float)
+        pyx_fill_diversity_matrices(matrices2, indexed, seqs1, seqs2)
+        assert_equal(matrices1, matrices2)
+        with self.assertRaises(IndexError):
+            pyx_fill_diversity_matrices(matrices2, indexed, seqs1, seqs2 + 10)
+
+    def test_stats_from_matrices(self):
+        """vectorised statistics match the per matrix functions"""
+        aln = load_aligned_seqs("data/brca1_5.paml", moltype=DNA)
+        calc = LogDetPair(moltype=DNA, alignment=aln)
+        seqs1, seqs2 = numpy.triu_indices(len(calc.names), k=1)
+        matrices = numpy.zeros((len(seqs1), 4, 4), float)
+        _fill_diversity_matrices(matrices, calc.indexed_seqs, seqs1, seqs2)
+        for block_func, func, args in [
+            (_paralinear_from_matrices, _paralinear, ()),
+            (_logdet_from_matrices, _logdet, (True,)),
+            (_logdet_from_matrices, _logdet, (False,)),
+        ]:
+            total, p, dist, var, valid = block_func(matrices, *args)
+            self.assertTrue(valid.all())
+            for k, matrix in enumerate(matrices):
+                expect = func(matrix, *args)
+                assert_allclose(dist[k], expect[2])
+                if expect[3] is None:
+                    self.assertIsNone(var)
+                else:
+                    assert_allclose(var[k], expect[3])
+
+    def test_run_in_blocks(self):
+        """distances are independent of the block size"""
+        aln = load_aligned_seqs("data/brca1_5.paml", moltype=DNA)
+        for name in ("tn93", "paralinear", "jc69"):
+            calc = get_distance_calculator(name, alignment=aln)
+            calc.run(show_progress=False)
+            expect = calc.get_pairwise_distances().to_dict()
+            # force one pair per block
+            calc.run(show_progress=False, max_block_bytes=1)
+            got = calc.get_pairwise_distances().to_dict()
+            self.assertEqual(got.keys(), expect.keys())
+            assert_allclose(list(got.values()), list(expect.values()))
+
+    def test_block_stats_picklable(self):
+        """block statistics can be sent to worker processes"""
+        import pickle
+
+        aln = load_aligned_seqs("data/brca1_5.paml", moltype=DNA)
+        calc = TN93Pair(DNA, alignment=aln)
+        block_stats = _PairBlockStats(
+            calc.indexed_seqs, 4, calc.func, calc._block_func, calc._func_args
+        )
+        pairs = numpy.triu_indices(len(calc.names), k=1)
+        got = pickle.loads(pickle.dumps(block_stats))(pairs)
+        expect = block_stats(pairs)
+        self.assertEqual(got, expect)
+
+    def test_run_parallel(self):
+        """parallel calculation matches serial, including duplicates"""
+        aln = load_aligned_seqs("data/brca1_5.paml", moltype=DNA)
+        data = aln.to_dict()
+        data["dupe"] = data["Human"]
+        aln = make_aligned_seqs(data=data, moltype=DNA)
+        for name in ("tn93", "paralinear"):
+            calc = get_distance_calculator(name, alignment=aln)
+            calc.run(show_progress=False)
+            expect = calc.get_pairwise_distances().to_dict()
+            duped = calc.duplicated
+            calc.run(show_progress=False, parallel=True)
+            got = calc.get_pairwise_distances().to_dict()
+            self.assertEqual(calc.duplicated, duped)
+            self.assertEqual(got, expect)
+
+    def test_array_alignment_indices(self):
+        """ArrayAlignment and Alignment produce same indexed seqs"""
+        data = dict(a="ACGTNRY-", b="AAGT??CC", c="ACGTACGT")
+        aln = make_aligned_seqs(data=data, moltype=DNA, array_align=False)
+        array_aln = make_aligned_seqs(data=data, moltype=DNA, array_align=True)
+        calc = TN93Pair(DNA, alignment=aln)
+        expect = calc.indexed_seqs
+        calc = TN93Pair(DNA, alignment=array_aln)
+        assert_equal(calc.indexed_seqs, expect)
+
     def test_hamming_from_matrix(self):
         """compute hamming from diversity matrix"""
         s1 = seq_to_indices("ACGTACGTAC", self.dna_char_indices)
@@ -26,7 +26,13 @@ from cogent3 import (
     make_aligned_seqs,
     make_tree,
 )
-from cogent3.evolve import ns_substitution_model, predicate, substitution_model
+from cogent3.evolve import (
+    likelihood_calculation,
+    likelihood_tree,
+    ns_substitution_model,
+    predicate,
+    substitution_model,
+)
 from cogent3.evolve.models import (
     CNFGTR,
     GN,
@@ -466,6 +472,179 @@ NineBande    root    1.00  1.00
         lf.set_alignment(self.data)
         result = lf.reconstruct_ancestral_seqs()
 
+    def test_ancestral_matches_fixed_motif(self):
+        """ancestral likelihoods match those from fixing the node motif"""
+        lf = self.submodel.make_likelihood_function(self.tree, bins=["low", "high"])
+        lf.set_param_rule("beta", bin="low", value=0.1)
+        lf.set_param_rule("beta", bin="high", value=10.0)
+        lf.set_alignment(self.data)
+        result = lf.reconstruct_ancestral_seqs()
+        full_length = lf.get_full_length_likelihoods()
+        for edge in lf.tree.get_edge_vector():
+            if edge.istip():
+                self.assertNotIn(edge.name, result)
+                continue
+            lhs = result[edge.name]
+            assert_allclose(lhs.array.sum(axis=1), full_length)
+            lf.set_param_rule("fixed_motif", value=2, edge=edge.name, is_constant=True)
+            assert_allclose(lhs.array[:, 2], lf.get_full_length_likelihoods())
+            lf.set_param_rule("fixed_motif", value=-1, edge=edge.name, is_constant=True)
+
+    def test_gradient(self):
+        """calculator gradient matches numerical derivatives"""
+        for bins in [None, ["low", "high"]]:
+            if bins:
+                lf = self.submodel.make_likelihood_function(self.tree, bins=bins)
+                lf.set_param_rule("beta", bin="low", value=0.1)
+                lf.set_param_rule("beta", bin="high", value=10.0)
+            else:
+                lf = self.submodel.make_likelihood_function(self.tree)
+            lf.set_alignment(self.data)
+            calc = lf.make_calculator()
+            x = calc.get_value_array()
+            got = calc.gradient(x)
+            expect = []
+            for i in range(len(x)):
+                h = 1e-6 * max(1.0, abs(x[i]))
+                expect.append(calc._numeric_derivative(i, x[i], x[i] - h, x[i] + h))
+            assert_allclose(got, expect, rtol=1e-4, atol=1e-4)
+            # the calculator is left unchanged
+            assert_allclose(calc.get_value_array(), x)
+
+    def test_optimise_lbfgsb(self):
+        """L-BFGS-B local optimisation matches that from Powell"""
+        results = []
+        for method in ["Powell", "L-BFGS-B"]:
+            lf = self.submodel.make_likelihood_function(self.tree)
+            lf.set_alignment(self.data)
+            lf.optimise(local=True, local_method=method, show_progress=False)
+            results.append(lf.lnL)
+        self.assertFloatEqual(results[0], results[1], eps=1e-4)
+
+    def test_site_blocks(self):
+        """likelihoods calculated in threaded blocks of sites match serial"""
+        from cogent3.evolve.likelihood_tree import SiteBlocks
+
+        blocks = SiteBlocks(4)
+        self.assertEqual(blocks.blocks(2), [(0, 2)])
+        self.assertEqual(blocks.blocks(2500), [(0, 1250), (1250, 2500)])
+        self.assertEqual(len(blocks.blocks(10000)), 4)
+
+        results = []
+        for threads in [None, 3]:
+            # small enough blocks that even this short alignment is split
+            SiteBlocks.min_block_size = 2
+            try:
+                lf = self.submodel.make_likelihood_function(
+                    self.tree, threads=threads
+                )
+                lf.set_alignment(self.data)
+                lht = lf.get_param_value("lht")
+                if threads:
+                    self.assertEqual(len(lht.site_blocks.blocks(len(lht.counts))), 3)
+                else:
+                    self.assertIsNone(lht.site_blocks)
+                results.append(
+                    (
+                        lf.get_log_likelihood(),
+                        lf.reconstruct_ancestral_seqs()["edge.0"],
+                    )
+                )
+            finally:
+                SiteBlocks.min_block_size = 1000
+        self.assertFloatEqual(results[0][0], results[1][0])
+        assert_allclose(results[0][1].array, results[1][1].array)
+        # likelihood trees share threads, of which there are enough for any
+        executor = likelihood_tree._get_executor(2)
+        self.assertIs(likelihood_tree._get_executor(3), executor)
+        self.assertIsNot(likelihood_tree._get_executor(50), executor)
+
+    def test_cache_size(self):
+        """revisiting cached points, with recycled arrays, gives same lnL"""
+        lf = self.submodel.make_likelihood_function(self.tree)
+        lf.set_alignment(self.data)
+        plain = lf.make_calculator()
+        cached = lf.make_calculator(cache_size=3)
+        no_undo = lf.make_calculator(cache_size=3, with_undo=False)
+        x = plain.get_value_array()
+        points = [x]
+        for i in range(len(x)):
+            y = list(points[-1])
+            y[i] *= 1.1
+            points.append(y)
+        # forwards, then back over points beyond the 1-deep undo
+        for p in points + points[::-1] + points[1::2]:
+            expect = plain(p)
+            self.assertEqual(cached(p), expect)
+            self.assertEqual(no_undo(p), expect)
+        self.assertTrue(cached.cache.hits > 0)
+        self.assertEqual(len(cached.cache), 3)
+
+    def test_single_precision(self):
+        """single precision scaled likelihoods match double precision"""
+        results = []
+        for precision in ["double", "single"]:
+            lf = self.submodel.make_likelihood_function(
+                self.tree, precision=precision
+            )
+            lf.set_alignment(self.data)
+            results.append((lf.get_log_likelihood(), lf.get_full_length_likelihoods()))
+        self.assertFloatEqual(results[0][0], results[1][0], eps=1e-6)
+        assert_allclose(results[0][1], results[1][1], rtol=1e-5)
+
+        with self.assertRaises(ValueError):
+            self.submodel.make_likelihood_function(self.tree, precision="half")
+        with self.assertRaises(ValueError):
+            self.submodel.make_likelihood_function(
+                self.tree, bins=["low", "high"], precision="single"
+            )
+
+    def test_single_precision_gradient(self):
+        """single precision gradients match those of double precision"""
+        gradients = []
+        for precision in ["double", "single"]:
+            lf = self.submodel.make_likelihood_function(
+                self.tree, precision=precision
+            )
+            lf.set_alignment(self.data)
+            calc = lf.make_calculator()
+            x = calc.get_value_array()
+            gradients.append(calc.gradient(x))
+            # the calculator is left unchanged
+            assert_allclose(calc.get_value_array(), x)
+        assert_allclose(gradients[1], gradients[0], rtol=1e-4, atol=1e-4)
+
+    def test_single_precision_deep_tree(self):
+        """single precision scaled likelihoods don't underflow"""
+        from cogent3.evolve.likelihood_tree import (
+            _PyLikelihoodTreeEdge,
+            _PyxLikelihoodTreeEdge,
+        )
+
+        rng = numpy.random.RandomState(1)
+        names = ["s%d" % i for i in range(800)]
+        tree = make_tree(tip_names=names)
+        data = {n: "".join(rng.choice(list("ACGT"), 10)) for n in names}
+        aln = make_aligned_seqs(data=data, moltype=DNA)
+        results = []
+        for (precision, klass) in [
+            ("double", _PyxLikelihoodTreeEdge),
+            ("single", _PyxLikelihoodTreeEdge),
+            ("single", _PyLikelihoodTreeEdge),
+        ]:
+            lf = self.submodel.make_likelihood_function(tree, precision=precision)
+            lf.set_param_rule("length", init=2.0)
+            orig = likelihood_calculation.LikelihoodTreeEdge
+            likelihood_calculation.LikelihoodTreeEdge = klass
+            try:
+                lf.set_alignment(aln)
+            finally:
+                likelihood_calculation.LikelihoodTreeEdge = orig
+            results.append(lf.get_log_likelihood())
+        self.assertEqual(results[0], -numpy.inf)
+        self.assertTrue(numpy.isfinite(results[1]))
+        self.assertFloatEqual(results[1], results[2], eps=1e-6)
+
     def test_likely_ancestral(self):
         """excercising the most likely ancestral sequences"""
         likelihood_function = self._makeLikelihoodFunction()
@@ -1968,6 +2147,47 @@ class ComparisonTests(TestCase):
         assert_allclose(lf.lnL, lnL, rtol=1e-5)
         assert_allclose(lf.nfp, nfp)
 
+    def test_pool_loci(self):
+        """site patterns pooled across loci give the same likelihoods"""
+        from cogent3.recalculation.scope import ALL, EACH
+
+        aln = load_aligned_seqs("data/long_testseqs.fasta")
+        third = len(aln) // 3
+        loci = [aln[:third], aln[third : 2 * third], aln[2 * third :]]
+        tree = make_tree(tip_names=aln.names)
+        sm = get_model("HKY85")
+        results = []
+        for pool_loci in (False, True):
+            lf = sm.make_likelihood_function(
+                tree, loci=["a", "b", "c"], pool_loci=pool_loci
+            )
+            lf.set_alignment(loci)
+            lf.set_param_rule("mprobs", loci=ALL, is_constant=True)
+            calc = lf.make_calculator()
+            num_plh = len([c for c in calc._cells if c.name == "plh"])
+            lnL = lf.lnL
+            # parameters differing between loci
+            lf.set_param_rule("kappa", loci=EACH, init=2.0)
+            lf.set_param_rule("kappa", locus="b", init=5.0)
+            results.append(
+                (
+                    num_plh,
+                    lnL,
+                    lf.lnL,
+                    lf.get_G_statistic(locus="b"),
+                    lf.get_full_length_likelihoods(locus="c"),
+                    lf.reconstruct_ancestral_seqs(locus="a")["root"].array,
+                )
+            )
+            lht = lf.get_param_value("lht", locus="c")
+            self.assertEqual(len(lht.index), len(loci[2]))
+
+        (unpooled, pooled) = results
+        # one set of partial likelihoods shared by the loci
+        self.assertEqual(unpooled[0], 3 * pooled[0])
+        for (expect, got) in zip(unpooled[1:], pooled[1:]):
+            assert_allclose(got, expect)
+
     def test_loci(self):
         """recap multiple-loci"""
         from cogent3.recalculation.scope import EACH, ALL
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""Tests of the top level cogent3 namespace, including import time."""
+
+import json
+import os
+import subprocess
+import sys
+
+from unittest import TestCase, main
+
+import cogent3
+
+__author__ = "Gavin Huttley"
+__copyright__ = "Copyright 2007-2020, The Cogent Project"
+__credits__ = ["Gavin Huttley"]
+__license__ = "BSD-3"
+__version__ = "2020.2.7a"
+__maintainer__ = "Gavin Huttley"
+__email__ = "gavin.huttley@anu.edu.au"
+__status__ = "Alpha"
+
+data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# run in a fresh interpreter, reports the elapsed time and the modules loaded
+_script = """
+import json, sys, time
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(elapsed=elapsed, modules=sorted(sys.modules))))
+"""
+
+
+src_dir = os.path.dirname(os.path.dirname(os.path.abspath(cogent3.__file__)))
+
+
+def _fresh_env():
+    """returns environment for a new interpreter importing from src_dir"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [src_dir] + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+    )
+    return env
+
+
+def _run_fresh(statements):
+    """returns elapsed time and loaded module names from a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", _script % statements],
+        stdout=subprocess.PIPE,
+        env=_fresh_env(),
+        check=True,
+    )
+    result = json.loads(result.stdout.decode("utf8").splitlines()[-1])
+    return result["elapsed"], set(result["modules"])
+
+
+class TopLevelTests(TestCase):
+    def test_lazy_attributes(self):
+        """top level names are resolved on access"""
+        from cogent3.core.moltype import DNA
+        from cogent3.evolve.models import get_model
+
+        self.assertIs(cogent3.DNA, DNA)
+        self.assertIs(cogent3.get_model, get_model)
+        self.assertEqual(cogent3.newick_parse_string.__module__, "cogent3.parse.newick")
+        self.assertIn("available_apps", dir(cogent3))
+        self.assertTrue(hasattr(cogent3.app, "io"))
+        with self.assertRaises(AttributeError):
+            cogent3.not_an_attribute
+
+    def test_import_loads_minimum(self):
+        """import cogent3 and loading an alignment avoids unneeded modules"""
+        path = os.path.join(data_path, "brca1.fasta")
+        _, modules = _run_fresh(
+            "import cogent3\n"
+            f"aln = cogent3.load_aligned_seqs({path!r}, moltype='dna')"
+        )
+        self.assertIn("cogent3.core.alignment", modules)
+        for name in (
+            "cogent3.app",
+            "cogent3.evolve.models",
+            "cogent3.evolve.likelihood_function",
+            "cogent3.util.table",
+            "IPython",
+        ):
+            self.assertNotIn(name, modules)
+
+    def test_import_each_module(self):
+        """every module imports in a fresh interpreter"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        names = []
+        for dirpath, _, filenames in os.walk(os.path.join(src_dir, "cogent3")):
+            package = os.path.relpath(dirpath, src_dir).replace(os.sep, ".")
+            for filename in filenames:
+                if not filename.endswith(".py"):
+                    continue
+                name = filename[:-3]
+                names.append(package if name == "__init__" else f"{package}.{name}")
+
+        def import_fresh(name):
+            result = subprocess.run(
+                [sys.executable, "-c", f"import {name}"],
+                stderr=subprocess.PIPE,
+                env=_fresh_env(),
+            )
+            return name, result.returncode, result.stderr.decode("utf8")
+
+        failed = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for name, returncode, stderr in executor.map(import_fresh, names):
+                error = stderr.strip().splitlines()[-1] if returncode else ""
+                # optional dependencies need not be installed
+                optional = error.startswith("ModuleNotFoundError") and (
+                    "cogent3" not in error
+                )
+                if returncode and not optional:
+                    failed[name] = error
+        self.assertEqual(failed, {})
+
+    def test_import_time(self):
+        """benchmark, lazy import cogent3 faster than importing everything"""
+        lazy, _ = _run_fresh("import cogent3")
+        eager, _ = _run_fresh(
+            "import cogent3; [getattr(cogent3, n) for n in cogent3._lazy_attrs]"
+        )
+        self.assertLess(lazy, eager)
+
+
+if __name__ == "__main__":
+    main()
@@ -137,6 +137,18 @@ class TestIntegratingExponentiator(TestCase):
         got = expm.expected_number_subs(moprobs, Q, length)
         self.assertNotAlmostEqual(got, length)
 
+    def test_eigen_exponentiator_batch(self):
+        """batch of exponentials matches those calculated singly"""
+        R = array([[0, 2, 1, 1], [2, 0, 1, 1], [1, 1, 0, 2], [1, 1, 2, 0]], dtype=float)
+        Q = dot(R, diag([0.1, 0.2, 0.3, 0.4]))
+        Q -= diag(np.sum(Q, axis=1))
+        eigen = cmme.FastExponentiator(Q)
+        lengths = [0.0, 0.1, 0.5, 2.0]
+        got = eigen.batch(lengths)
+        self.assertEqual(len(got), len(lengths))
+        for (P, t) in zip(got, lengths):
+            self.assertFloatEqual(P, eigen(t))
+
 
 if __name__ == "__main__":
     main()
@@ -87,6 +87,30 @@ class OptimiserTestCase(TestCase):
         # Global minimum not the nearest one
         self._test_optimisation(local=True, target=2)
 
+    def test_local_lbfgsb(self):
+        """L-BFGS-B local optimiser, with and without a gradient"""
+        self._test_optimisation(local=True, target=2, local_method="L-BFGS-B")
+
+        def gradient(x):
+            return -0.1 * (12 * x ** 3 + 24 * x ** 2 - 96 * x)
+
+        self._test_optimisation(
+            local=True, target=2, local_method="L-BFGS-B", gradient=gradient
+        )
+        self._test_optimisation(
+            bounds=([0.0], [10.0]),
+            local=True,
+            target=2,
+            local_method="L-BFGS-B",
+            gradient=gradient,
+        )
+
+    def test_local_method_invalid(self):
+        """unknown local optimisers raise ValueError"""
+        self.assertRaises(
+            ValueError, self._test_optimisation, local=True, local_method="BFGS"
+        )
+
     def test_limited(self):
         self.assertRaises(
             MaximumEvaluationsReached, self._test_optimisation, max_evaluations=5
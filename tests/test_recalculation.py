@@ -1,6 +1,13 @@
 from unittest import TestCase, main
 
-from cogent3.recalculation.definition import CalcDefn, ParamDefn
+from numpy.testing import assert_allclose
+
+from cogent3.recalculation.definition import (
+    CalcDefn,
+    CallDefn,
+    ConstDefn,
+    ParamDefn,
+)
 from cogent3.recalculation.scope import (
     InvalidDimensionError,
     InvalidScopeError,
@@ -161,6 +168,135 @@ class RecalculationTest(TestCase):
         # so don't use 'xtol=0.0', that's just to make the doctest work.
         gz = pc.graphviz()
 
+    def test_batch(self):
+        """cells sharing a function with a batch method are calculated together"""
+        calls = []
+
+        class Doubler:
+            def __call__(self, x):
+                calls.append(1)
+                return 2 * x
+
+            def batch(self, xs):
+                calls.append(len(xs))
+                return [2 * x for x in xs]
+
+        def add(*args):
+            return sum(args)
+
+        x = ParamDefn("X", dimensions=["category"])
+        doubled = CallDefn(ConstDefn(Doubler(), "doubler"), x)
+        top = CalcDefn(add)(*doubled.across_dimension("category", ["a", "b", "c"]))
+        pc = top.make_likelihood_function()
+        pc.assign_all("X", value=1.0, independent=True)
+        f = pc.make_calculator()
+        calls.clear()
+
+        # all changed, so one batch
+        self.assertEqual(f([1.5, 2.0, 3.0]), 13.0)
+        self.assertEqual(calls, [3])
+        # only the changed ones are recalculated
+        calls.clear()
+        self.assertEqual(f.change([(0, 4.0), (2, 5.0)]), 22.0)
+        self.assertEqual(calls, [2])
+        calls.clear()
+        self.assertEqual(f.change([(1, 1.0)]), 20.0)
+        self.assertEqual(calls, [1])
+
+    def test_compiled_program(self):
+        """compiled programs give the same results as interpreted ones"""
+        from cogent3.recalculation.calculation import Calculator
+
+        def add(*args):
+            return sum(args)
+
+        x = ParamDefn("X", dimensions=["category"])
+        y = ParamDefn("Y")
+        negated = CalcDefn(lambda a: -a, name="negated")(x)
+        products = CalcDefn(lambda a, b: a * b, name="products")(negated, y)
+        top = CalcDefn(add)(*products.across_dimension("category", ["a", "b"]))
+        pc = top.make_likelihood_function()
+        pc.assign_all("X", value=1.0, independent=True)
+        results = []
+        for compiled in (False, True):
+            Calculator.compile_programs = compiled
+            try:
+                f = pc.make_calculator()
+                results.append([f([1.5, 2.0, 3.0]), f.change([(2, 4.0)])])
+            finally:
+                Calculator.compile_programs = True
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1], [-10.5, -14.0])
+        program = f.cells_changed_by([(0, None)])
+        compiled = f.compiled_program(program)
+        self.assertIs(compiled, f.compiled_program(program))
+        # single argument cells get their argument directly
+        self.assertEqual(compiled[0][1:], (program[0].rank, program[0].calc, 0))
+
+    def test_profile(self):
+        """profiling counts calls and cache hits for each defn name"""
+
+        def add(*args):
+            return sum(args)
+
+        x = ParamDefn("X", dimensions=["category"])
+        doubled = CalcDefn(lambda x: 2 * x, name="doubled")(x)
+        top = CalcDefn(add, name="top")(
+            *doubled.across_dimension("category", ["a", "b"])
+        )
+        pc = top.make_likelihood_function()
+        pc.assign_all("X", value=1.0, independent=True)
+        f = pc.make_calculator(profile=True)
+        f.change([(0, 2.0)])
+        f.change([(0, 3.0)])
+        # reverting the last change is an undo, so no calls
+        f.change([(0, 2.0)])
+        profile = f.get_profile()
+        self.assertEqual(profile.columns["name"].tolist(), ["doubled", "top"])
+        self.assertEqual(profile.columns["cells"].tolist(), [2, 1])
+        self.assertEqual(profile.columns["calls"].tolist(), [2, 2])
+        assert_allclose(profile.columns["hit rate"], [4 / 6, 1 / 3])
+
+        # turning profiling on again resets the counts
+        f.set_profiling(True)
+        self.assertEqual(f.get_profile().columns["calls"].tolist(), [0, 0])
+    def test_cache_size(self):
+        """points evaluated more than one step ago are not recalculated"""
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        def add(*args):
+            return sum(args)
+
+        x = ParamDefn("X", dimensions=["category"])
+        squared = CalcDefn(square)(x)
+        top = CalcDefn(add)(*squared.across_dimension("category", ["a", "b"]))
+        pc = top.make_likelihood_function()
+        pc.assign_all("X", value=1.0, independent=True)
+        f = pc.make_calculator(cache_size=3)
+        for point in ([2.0, 1.0], [2.0, 3.0], [4.0, 3.0], [4.0, 5.0]):
+            f(point)
+        calls.clear()
+        # 2 steps back, beyond the 1-deep undo
+        self.assertEqual(f([2.0, 3.0]), 13.0)
+        self.assertEqual(calls, [])
+        # least recently used was evicted
+        self.assertEqual(f([2.0, 1.0]), 5.0)
+        self.assertEqual(calls, [1.0])
+        self.assertEqual(f.cache.hits, 1)
+
+        # memory limited, values without nbytes are free
+        f.set_cache_size(2, max_bytes=0)
+        f([1.0, 1.0])
+        self.assertEqual(len(f.cache), 1)
+        self.assertEqual(f.cache.nbytes, 0)
+
+        f.set_cache_size(0)
+        self.assertIsNone(f.cache)
+
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,12 @@
 import multiprocessing
+import os
 import sys
 import time
 
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+from tempfile import TemporaryDirectory
 from unittest import TestCase, main, skipIf
+from unittest.mock import patch
 
 import numpy
 
@@ -34,6 +38,46 @@ def check_is_master_process(n):
     return parallel.is_master_process()
 
 
+WORKER_DATA = None
+
+
+def set_worker_data(value):
+    global WORKER_DATA
+    WORKER_DATA = value
+
+
+def get_worker_data(n):
+    return os.getpid(), WORKER_DATA
+
+
+def crash_once(path):
+    # worker dies the first time path is seen
+    if not os.path.exists(path):
+        open(path, "w").close()
+        os._exit(1)
+    return path
+
+
+def crash(n):
+    os._exit(1)
+
+
+def sleep_for(duration):
+    time.sleep(duration)
+    return duration
+
+
+class BreakOnSubmit(ThreadPoolExecutor):
+    # the executor breaks on the third submission across all instances
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        BreakOnSubmit.submitted += 1
+        if BreakOnSubmit.submitted == 3:
+            raise BrokenExecutor("pool broke between completions")
+        return super().submit(*args, **kwargs)
+
+
 class ParallelTests(TestCase):
     def test_create_processes(self):
         """Procressor pool should create multiple distingue processes"""
@@ -71,6 +115,112 @@ class ParallelTests(TestCase):
                 master_processes += 1
         self.assertEqual(master_processes, 0)
 
+    def test_as_completed(self):
+        """as_completed returns all results with their index"""
+        index = [2, 3, 4, 5, 6, 7, 8, 9, 10]
+        got = list(parallel.as_completed(get_ranint, index, max_workers=1))
+        expect = parallel.map(get_ranint, index, max_workers=1)
+        self.assertEqual(sorted(got), list(enumerate(expect)))
+
+    def test_as_completed_costs(self):
+        """most costly elements are evaluated first"""
+        values = [1, 5, 3, 4]
+        # a single worker completes elements in the order submitted
+        got = parallel.as_completed(
+            get_ranint, values, max_workers=1, costs=lambda x: x
+        )
+        self.assertEqual([i for i, _ in got], [1, 3, 2, 0])
+        got = parallel.as_completed(get_ranint, values, max_workers=1, costs=values)
+        self.assertEqual([i for i, _ in got], [1, 3, 2, 0])
+
+    def test_as_completed_retry(self):
+        """elements whose worker died are resubmitted"""
+        with TemporaryDirectory(dir=".") as dirname:
+            paths = [os.path.join(dirname, f"{i}") for i in range(3)]
+            got = parallel.as_completed(crash_once, paths, max_workers=1)
+            self.assertEqual(sorted(got), list(enumerate(paths)))
+
+        # but not indefinitely
+        with self.assertRaises(RuntimeError):
+            list(parallel.as_completed(crash, [1, 2], max_workers=1, max_retries=1))
+
+    def test_as_completed_lazy_ordered(self):
+        """elements are drawn as needed and results can be kept in order"""
+        drawn = []
+
+        def values():
+            for i in range(2, 10):
+                drawn.append(i)
+                yield i
+
+        got = []
+        for index, result in parallel.as_completed(
+            get_ranint, values(), max_workers=1, max_pending=2, ordered=True
+        ):
+            # at most max_pending submitted, plus the next to submit
+            self.assertLessEqual(len(drawn), index + 3)
+            got.append((index, result))
+        expect = parallel.map(get_ranint, range(2, 10), max_workers=1)
+        self.assertEqual(got, list(enumerate(expect)))
+
+    def test_as_completed_broken_submit(self):
+        """elements are not lost if the executor breaks on submission"""
+        BreakOnSubmit.submitted = 0
+        with patch.object(
+            parallel, "_make_executor", lambda n, mpi: BreakOnSubmit(n)
+        ), patch.object(parallel.multiprocessing, "cpu_count", lambda: 3):
+            got = parallel.as_completed(lambda x: x * 10, range(6), max_workers=2)
+            got = sorted(got)
+        self.assertEqual(got, [(i, i * 10) for i in range(6)])
+
+    def test_as_completed_close_early(self):
+        """closing the generator early does not wait on outstanding work"""
+        with patch.object(parallel.multiprocessing, "cpu_count", lambda: 3):
+            got = parallel.as_completed(
+                sleep_for, [0.1] + [3] * 7, max_workers=2, max_pending=4
+            )
+            start = time.perf_counter()
+            self.assertEqual(next(got), (0, 0.1))
+            got.close()
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 2)
+
+    def test_worker_pool(self):
+        """workers in a pool are initialised once and reused"""
+        from pickle import dumps, loads
+
+        index = list(range(6))
+        with parallel.WorkerPool(
+            max_workers=1, initializer=set_worker_data, initargs=("loaded",)
+        ) as pool:
+            first = parallel.map(get_worker_data, index, pool=pool)
+            second = [
+                r for _, r in parallel.as_completed(get_worker_data, index, pool=pool)
+            ]
+            self.assertEqual({v for _, v in first + second}, {"loaded"})
+            # the same worker process evaluated all
+            self.assertEqual(len({pid for pid, _ in first + second}), 1)
+            # a pickled pool retains the settings but not the workers
+            copied = loads(dumps(pool))
+            self.assertEqual(copied.max_workers, 1)
+            self.assertIsNone(copied._executor)
+
+        # closed pools start new workers on use
+        self.assertIsNone(pool._executor)
+        got = parallel.map(get_worker_data, index, pool=pool)
+        self.assertNotEqual(got[0][0], first[0][0])
+        pool.close()
+
+    def test_worker_pool_restart(self):
+        """a pool replaces workers that died"""
+        with TemporaryDirectory(dir=".") as dirname:
+            paths = [os.path.join(dirname, f"{i}") for i in range(3)]
+            with parallel.WorkerPool(max_workers=1) as pool:
+                got = parallel.as_completed(crash_once, paths, pool=pool)
+                self.assertEqual(sorted(got), list(enumerate(paths)))
+                got = parallel.map(get_ranint, [2, 3], pool=pool)
+                self.assertEqual(len(got), 2)
+
     @skipIf(sys.version_info[1] >= 7, "exception test for Python 3.6")
     def test_is_master_process_version_exception(self):
         """